@@ -1,4 +1,6 @@
-from IMDB.analysis import movie_analysis
+import numpy as np
+
+from IMDB.data.join_engine import lookup_positions
 from IMDB.visualisation.df_visuals import printDF
 
 
@@ -65,16 +67,16 @@ def get_actor_by_id(movie_df, actor_df, actor_id):
 
 
 def get_actor_roles(movie_df, actor_df):
-    roles = actor_df['role(act)'].tolist()
-    movie_ids = actor_df['movie_id'].tolist()
-    movie_roles = []
-
-    for idx, (role, movie_id) in enumerate(zip(roles, movie_ids), start=1):
-        movie = movie_analysis.get_movie_by_id(movie_df, movie_id)
-        if movie is not None:
-            movie_roles.append(
-                [movie['year'], movie['name'], movie['director'][1], role, movie['rank']]
-            )
+    # Movie of every role, found by position in the movies (one row each) instead of a scan per role
+    movies = movie_df.drop_duplicates(subset=['movie_id'])
+    positions = lookup_positions(actor_df['movie_id'].to_numpy(np.int64), movies['movie_id'].to_numpy(np.int64))
+    found = positions >= 0
+    movies = movies.iloc[positions[found]]
+    roles = [role for role, is_found in zip(actor_df['role(act)'].tolist(), found) if is_found]
+
+    movie_roles = [list(movie_role) for movie_role in zip(
+        movies['movie_year'].tolist(), movies['movie_name'].tolist(), movies['full_name(dir)'].tolist(), roles,
+        movies['movie_rank'].tolist())]
     # Sort movie_roles based on year
     movie_roles = sorted(movie_roles, key=lambda x: x[0])
     return movie_roles
@@ -90,4 +92,9 @@ def get_actor_info(movie_df, actor_df):
 
 
 def get_role_genres(movie_df, roles_list):
-    return [movie_analysis.get_movie_genres(movie_df, movie_name=role[1]) for role in roles_list]
+    # Genres of every movie name of the roles, grouped in one pass
+    names = [role[1] for role in roles_list]
+    movies = movie_df[movie_df['movie_name'].isin(names)]
+    name_genres = {name: genres.astype('string').unique().tolist()
+                   for name, genres in movies.groupby('movie_name', sort=False, observed=True)['movie_genre']}
+    return [name_genres.get(name) for name in names]
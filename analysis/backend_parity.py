@@ -0,0 +1,94 @@
+"""
+Parity check of the analysis execution backends against the pandas reference: every backend computation is
+run on the same cleaned data frames and its result compared with pandas', values equal up to float rounding
+and dtype width. Run as a script to check the cleaned data of a data source and time each backend, e.g.
+python -m IMDB.analysis.backend_parity sqlite:///imdb_ijs.sqlite --backend polars
+"""
+import argparse
+import io
+import time
+import types
+
+import pandas as pd
+
+from IMDB.analysis.execution_backends import PandasBackend, get_backend
+
+
+def backend_results(backend, movies_df, actors_df, years=(), genres=()):
+    """{computation: result} of every backend computation, overall and for each year and genre."""
+    results = {'summary_counts': backend.summary_counts(movies_df, actors_df),
+               'actor_occurrences': backend.actor_occurrences(movies_df, actors_df),
+               'correlation_columns': backend.correlation_columns(movies_df, actors_df)}
+    for year in years:
+        results[f"summary_counts(year={year})"] = backend.summary_counts(movies_df, actors_df, year)
+    for genre in genres:
+        results[f"genre_counts(genre={genre})"] = backend.genre_counts(movies_df, actors_df, genre)
+    return results
+
+
+def check_parity(movies_df, actors_df, backend, years=(), genres=()):
+    """
+    Compares the results of backend with the pandas reference.
+    :return: [(computation, difference)] of the results that differ, empty if the backends agree.
+    """
+    expected = backend_results(get_backend(PandasBackend.name), movies_df, actors_df, years, genres)
+    actual = backend_results(get_backend(backend), movies_df, actors_df, years, genres)
+    mismatches = []
+    for computation, expected_result in expected.items():
+        try:
+            _assert_same(expected_result, actual[computation])
+        except AssertionError as error:
+            mismatches.append((computation, str(error)))
+    return mismatches
+
+
+def _assert_same(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys(), f"keys {sorted(expected)} != {sorted(actual)}"
+        for key in expected:
+            _assert_same(expected[key], actual[key])
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True),
+                                      check_dtype=False, check_categorical=False)
+    elif isinstance(expected, pd.Series):
+        # Ties of value_counts come in no particular order
+        pd.testing.assert_series_equal(expected.sort_index(), actual.sort_index(), check_dtype=False,
+                                       check_index_type=False, check_names=False)
+    elif pd.isna(expected):
+        # None and NaN are both missing, but are logged differently
+        assert pd.isna(actual) and (expected is None) == (actual is None), f"{expected!r} != {actual!r}"
+    else:
+        assert expected == actual, f"{expected} != {actual}"
+
+
+def main():
+    from IMDB.data.IMDB_Database_Obj import IMDBConnection
+    from IMDB.data.table_sources import source_from_uri
+
+    parser = argparse.ArgumentParser(description="Check an analysis backend against the pandas reference.")
+    parser.add_argument('source', help="data source URI of the imdb_ijs tables, e.g. sqlite:///imdb_ijs.sqlite")
+    parser.add_argument('--backend', default='polars', help="backend to check (default: polars)")
+    parser.add_argument('--cache-dir', help="stage cache folder (default: the package data folder)")
+    args = parser.parse_args()
+
+    imdb_data = IMDBConnection(client=types.SimpleNamespace(ready=False), logger=io.StringIO(),
+                               source=source_from_uri(args.source), cache_dir=args.cache_dir)
+    imdb_data.load_df()
+    movies_df, actors_df = imdb_data.merged_movies, imdb_data.merged_actors
+    years = sorted(movies_df['movie_year'].unique())[-3:]
+    genres = sorted(movies_df['movie_genre'].dropna().unique())
+
+    for backend in (PandasBackend.name, args.backend):
+        start = time.perf_counter()
+        backend_results(get_backend(backend), movies_df, actors_df, years, genres)
+        print(f"{backend:<10}{time.perf_counter() - start:8.3f}s")
+
+    mismatches = check_parity(movies_df, actors_df, args.backend, years, genres)
+    for computation, difference in mismatches:
+        print(f"[!] {computation}: {difference}")
+    print(f"[x] {args.backend} matches pandas" if not mismatches else f"[!] {len(mismatches)} results differ")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,437 @@
+"""
+Execution backends for the joins and aggregations of the summary analyses. The pandas backend is the eager
+reference implementation. The polars backend builds each computation as one lazy query, which polars
+optimises (filters and projections pushed down below the movies x actors join) and runs multi-threaded.
+The partitioned backend hash partitions the frames, computes partial aggregates of the partitions on worker
+processes, local or on a dask.distributed cluster, and merges them.
+All return pandas objects, so the analyses format their results the same way whichever backend ran them.
+"""
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from IMDB.data.segment_kernels import SortedGroups
+from IMDB.data.shared_dataset import attach, shared_source
+
+# Backend used when an analysis is not given one
+BACKEND_ENV = 'IMDB_ANALYSIS_BACKEND'
+# dask.distributed scheduler address the partitioned backend runs on, LOCAL_CLUSTER to start a local
+# cluster of worker processes (a stand-in for a multi-node cluster). Unset: a local process pool.
+SCHEDULER_ENV = 'IMDB_ANALYSIS_SCHEDULER'
+LOCAL_CLUSTER = 'local-cluster'
+# Order of describe(), and of the rank summaries of every backend
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+# Non-numerical and id columns dropped by prep_corr_df
+CORR_DROPPED_COLUMNS = ['movie_name', 'movie_genre', 'full_name(dir)', 'full_name(act)',
+                        'gender(act)', 'role(act)', 'movie_id', 'director_id', 'actor_id']
+# Columns the partitioned backend reads for the counts, and of the actors for the joins
+COUNT_MOVIE_COLUMNS = ['movie_id', 'movie_genre', 'director_id', 'movie_year', 'movie_rank']
+ACTOR_KEY_COLUMNS = ['movie_id', 'actor_id']
+# Columns prep_corr_df derives, in the order they are added
+CORR_DERIVED_COLUMNS = ['director_movie_count', 'actor_movie_count', 'cast_size', 'director_avg_rank',
+                        'actor_avg_rank', 'cast_avg_rank', 'crew_avg_rank']
+
+
+class PandasBackend:
+    """Eager pandas, single-threaded. Every filter, merge and groupby materialises its result."""
+    name = 'pandas'
+
+    def summary_counts(self, movies_df, actors_df, year=None):
+        """Distinct movies, genres, directors and actors, and the first and last year, of the movies with a cast."""
+        if year is not None:
+            movies_df = movies_df[movies_df['movie_year'] == year]
+        merged_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
+        return {'movies': merged_df['movie_id'].nunique(), 'genres': merged_df['movie_genre'].nunique(),
+                'directors': merged_df['director_id'].nunique(), 'actors': merged_df['actor_id'].nunique(),
+                'min_year': merged_df['movie_year'].min(), 'max_year': merged_df['movie_year'].max()}
+
+    def actor_occurrences(self, movies_df, actors_df):
+        """Number of roles of every actor in the movies of movies_df."""
+        movies_df = movies_df.drop_duplicates(subset=['movie_id'])
+        merged_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
+        return merged_df['actor_id'].value_counts()
+
+    def genre_counts(self, movies_df, actors_df, genre):
+        """Distinct movies, actors and directors, years and rank summary (describe) of the genre's cast rows."""
+        merged_movie_actor = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
+        summary = merged_movie_actor[merged_movie_actor['movie_genre'] == genre]
+        return {'movies': summary['movie_id'].nunique(), 'actors': summary['actor_id'].nunique(),
+                'directors': summary['director_id'].nunique(), 'min_year': summary['movie_year'].min(),
+                'max_year': summary['movie_year'].max(), 'rank_summary': summary['movie_rank'].describe()}
+
+    def correlation_columns(self, movies_df, actors_df):
+        """
+        Joined movies and actors with the director, actor and cast counts and average ranks, reduced to the
+        first row of every movie and to the numerical columns.
+        """
+        corr_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
+        # groupby(...).transform of each key, its rows sorted once and reduced by the segment kernels
+        director_groups = SortedGroups(corr_df['director_id'])
+        actor_groups = SortedGroups(corr_df['actor_id'])
+        movie_groups = SortedGroups(corr_df['movie_id'])
+        corr_df['director_movie_count'] = director_groups.transform(corr_df['movie_id'], 'count')
+        corr_df['actor_movie_count'] = actor_groups.transform(corr_df['movie_id'], 'count')
+        corr_df['cast_size'] = movie_groups.transform(corr_df['actor_id'], 'count')
+        corr_df['director_avg_rank'] = director_groups.transform(corr_df['movie_rank'], 'mean')
+        corr_df['actor_avg_rank'] = actor_groups.transform(corr_df['movie_rank'], 'mean')
+        corr_df['cast_avg_rank'] = movie_groups.transform(corr_df['actor_avg_rank'], 'mean')
+        corr_df['crew_avg_rank'] = (corr_df['director_avg_rank'] + corr_df['cast_avg_rank']) / 2
+
+        corr_df = corr_df.drop_duplicates(subset=['movie_id'])
+        return corr_df.drop(columns=CORR_DROPPED_COLUMNS)
+
+
+class PolarsBackend:
+    """Lazy polars queries, optimised and run multi-threaded (requires polars)."""
+    name = 'polars'
+
+    def summary_counts(self, movies_df, actors_df, year=None):
+        import polars as pl
+
+        movies = _lazy(movies_df)
+        if year is not None:
+            movies = movies.filter(pl.col('movie_year') == year)
+        merged = _join_movies_actors(movies, _lazy(actors_df))
+        counts = merged.select(movies=_n_unique('movie_id'), genres=_n_unique('movie_genre'),
+                               directors=_n_unique('director_id'), actors=_n_unique('actor_id'),
+                               min_year=pl.col('movie_year').min(), max_year=pl.col('movie_year').max())
+        return _missing_as_nan(counts.collect().row(0, named=True))
+
+    def actor_occurrences(self, movies_df, actors_df):
+        import polars as pl
+
+        # Joining the distinct movie ids is a semi join: only the actors' rows are needed
+        movie_ids = _lazy(movies_df).select(pl.col('movie_id').cast(pl.Int64)).unique()
+        actors = _lazy(actors_df).with_columns(pl.col('movie_id').cast(pl.Int64))
+        occurrences = (actors.join(movie_ids, on='movie_id', how='semi')
+                       .group_by('actor_id').agg(pl.len().alias('count'))
+                       .sort(['count', 'actor_id'], descending=[True, False]).collect())
+        actor_ids = pd.Index(occurrences['actor_id'].to_numpy(), name='actor_id')
+        return pd.Series(occurrences['count'].to_numpy(), index=actor_ids, name='count')
+
+    def genre_counts(self, movies_df, actors_df, genre):
+        import polars as pl
+
+        # The genre filter on the join result is pushed down to the movies by the optimiser
+        summary = (_join_movies_actors(_lazy(movies_df), _lazy(actors_df))
+                   .filter(pl.col('movie_genre') == genre))
+        rank = pl.col('movie_rank')
+        counts = summary.select(
+            movies=_n_unique('movie_id'), actors=_n_unique('actor_id'), directors=_n_unique('director_id'),
+            min_year=pl.col('movie_year').min(), max_year=pl.col('movie_year').max(),
+            rank_count=rank.count(), rank_mean=rank.mean(), rank_std=rank.std(), rank_min=rank.min(),
+            rank_25=rank.quantile(0.25, 'linear'), rank_50=rank.quantile(0.5, 'linear'),
+            rank_75=rank.quantile(0.75, 'linear'), rank_max=rank.max()).collect().row(0, named=True)
+
+        rank_values = [counts.pop(name) for name in ('rank_count', 'rank_mean', 'rank_std', 'rank_min',
+                                                     'rank_25', 'rank_50', 'rank_75', 'rank_max')]
+        counts['rank_summary'] = pd.Series(rank_values, index=DESCRIBE_INDEX, name='movie_rank', dtype='float64')
+        return _missing_as_nan(counts)
+
+    def correlation_columns(self, movies_df, actors_df):
+        import polars as pl
+
+        joined_columns = list(movies_df.columns) + [column for column in actors_df.columns if column != 'movie_id']
+        kept_columns = [column for column in joined_columns + CORR_DERIVED_COLUMNS
+                        if column not in CORR_DROPPED_COLUMNS]
+        corr = _join_movies_actors(_lazy(movies_df), _lazy(actors_df), ordered=True).with_columns(
+            director_movie_count=pl.col('movie_id').count().over('director_id'),
+            actor_movie_count=pl.col('movie_id').count().over('actor_id'),
+            cast_size=pl.col('actor_id').count().over('movie_id'),
+            director_avg_rank=pl.col('movie_rank').mean().over('director_id'),
+            actor_avg_rank=pl.col('movie_rank').mean().over('actor_id'),
+        ).with_columns(
+            cast_avg_rank=pl.col('actor_avg_rank').mean().over('movie_id'),
+        ).with_columns(
+            crew_avg_rank=(pl.col('director_avg_rank') + pl.col('cast_avg_rank')) / 2,
+        )
+        # Keep the first joined row of every movie, and only the columns selected, as pandas does
+        corr = corr.unique(subset=['movie_id'], keep='first', maintain_order=True).select(kept_columns)
+        corr_df = corr.collect().to_pandas()
+        # polars counts are unsigned 32-bit
+        return corr_df.astype({column: 'int64' for column in CORR_DERIVED_COLUMNS[:3]})
+
+
+class PartitionedBackend:
+    """
+    pandas on hash partitions of the frames, in parallel worker processes. Partitions by movie_id hold all
+    the rows of their movies, so each is joined on its own; partial aggregates of the partitions (counts,
+    sums, distinct values, rank histograms) are merged into the results of the whole frames.
+    Frames attached from a shared dataset are not sent to local workers: they map the dataset and select
+    their partition themselves.
+    """
+    name = 'partitioned'
+
+    def __init__(self, workers=None, scheduler=None):
+        """
+        :param workers: Number of worker processes and partitions. Defaults to the number of CPUs.
+        :param scheduler: dask.distributed scheduler address or LOCAL_CLUSTER (requires distributed).
+            Defaults to the IMDB_ANALYSIS_SCHEDULER environment variable, else a local process pool.
+        """
+        self.workers = workers
+        self.scheduler = scheduler
+
+    def summary_counts(self, movies_df, actors_df, year=None):
+        if year is not None:
+            movies_df = movies_df[movies_df['movie_year'] == year]
+        partials = self.__run_partitioned(_counts_partial, movies_df, actors_df, COUNT_MOVIE_COLUMNS,
+                                          ACTOR_KEY_COLUMNS)
+        counts = _merge_counts(partials)
+        counts['genres'] = _merge_distinct(partial['genres'] for partial in partials)
+        return {name: counts[name] for name in ('movies', 'genres', 'directors', 'actors', 'min_year', 'max_year')}
+
+    def actor_occurrences(self, movies_df, actors_df):
+        # Partitions by actor_id are disjoint, so their counts only need concatenating
+        movie_ids = movies_df['movie_id'].unique()
+        actors_parts = self.__partitions(actors_df, 'actor_id', ACTOR_KEY_COLUMNS)
+        with self.__executor() as executor:
+            futures = [executor.submit(_occurrences_partial, actors_part, movie_ids) for actors_part in actors_parts]
+            occurrences = pd.concat([future.result() for future in futures])
+        return occurrences.sort_values(ascending=False, kind='stable')
+
+    def genre_counts(self, movies_df, actors_df, genre):
+        movies_df = movies_df[movies_df['movie_genre'] == genre]
+        counts = _merge_counts(self.__run_partitioned(_counts_partial, movies_df, actors_df, COUNT_MOVIE_COLUMNS,
+                                                      ACTOR_KEY_COLUMNS))
+        counts['rank_summary'] = _describe_counts(counts['rank_counts'])
+        return {name: counts[name] for name in ('movies', 'actors', 'directors', 'min_year', 'max_year',
+                                                 'rank_summary')}
+
+    def correlation_columns(self, movies_df, actors_df):
+        kept_movie_columns = [column for column in movies_df.columns if column not in CORR_DROPPED_COLUMNS]
+        kept_actor_columns = [column for column in actors_df.columns if column not in CORR_DROPPED_COLUMNS]
+        partials = self.__run_partitioned(_correlation_partial, movies_df, actors_df,
+                                          ['movie_id', 'director_id'] + kept_movie_columns,
+                                          ACTOR_KEY_COLUMNS + kept_actor_columns)
+        director_stats = _sum_partials(partial[0] for partial in partials)
+        actor_stats = _sum_partials(partial[1] for partial in partials)
+        first_rows = pd.concat([partial[2] for partial in partials]).sort_values('__left')
+        director_avg_rank = director_stats['rank_sum'] / director_stats['ranks']
+        actor_avg_rank = actor_stats['rank_sum'] / actor_stats['ranks']
+
+        # Every joined row of a movie repeats its cast once per movie row, so the mean of the cast's actor
+        # average ranks over the joined rows is their mean over the movie's actor rows
+        actors_parts = self.__partitions(actors_df, 'actor_id', ACTOR_KEY_COLUMNS)
+        actor_avg_parts = _hash_partitions(actor_avg_rank.rename('actor_avg_rank').reset_index(), 'actor_id',
+                                           len(actors_parts))
+        with self.__executor() as executor:
+            futures = [executor.submit(_cast_rank_partial, actors_part, actor_avg_part)
+                       for actors_part, actor_avg_part in zip(actors_parts, actor_avg_parts)]
+            cast_stats = _sum_partials(future.result() for future in futures)
+        cast_avg_rank = cast_stats['rank_sum'] / cast_stats['ranks']
+
+        corr_df = first_rows.assign(
+            director_movie_count=first_rows['director_id'].map(director_stats['rows']).astype('int64'),
+            actor_movie_count=first_rows['actor_id'].map(actor_stats['rows']).astype('int64'),
+            director_avg_rank=first_rows['director_id'].map(director_avg_rank),
+            actor_avg_rank=first_rows['actor_id'].map(actor_avg_rank),
+            cast_avg_rank=first_rows['movie_id'].map(cast_avg_rank))
+        corr_df['crew_avg_rank'] = (corr_df['director_avg_rank'] + corr_df['cast_avg_rank']) / 2
+        return corr_df[kept_movie_columns + kept_actor_columns + CORR_DERIVED_COLUMNS]
+
+    def __num_workers(self):
+        return self.workers or os.cpu_count() or 1
+
+    def __scheduler(self):
+        return self.scheduler or os.environ.get(SCHEDULER_ENV)
+
+    def __executor(self):
+        """Executor of the partial aggregates, closed when its with block exits."""
+        scheduler = self.__scheduler()
+        if scheduler is None:
+            return ProcessPoolExecutor(max_workers=self.__num_workers())
+
+        from distributed import Client
+
+        if scheduler == LOCAL_CLUSTER:
+            return Client(n_workers=self.__num_workers(), threads_per_worker=1, processes=True)
+        return Client(scheduler)
+
+    def __partitions(self, df, key, columns):
+        """Partitions of df[columns] by key, as SharedPartitions if the workers can map df's shared dataset."""
+        num_partitions = self.__num_workers()
+        columns = list(dict.fromkeys(columns))
+        # Remote workers cannot map this host's shared memory
+        source = shared_source(df) if self.__scheduler() in (None, LOCAL_CLUSTER) else None
+        if source is not None:
+            return [SharedPartition(*source, columns, key, partition, num_partitions)
+                    for partition in range(num_partitions)]
+        # Row labels are the positions of the rows in df, as in a partition of a shared frame
+        return _hash_partitions(df[columns].reset_index(drop=True), key, num_partitions)
+
+    def __run_partitioned(self, partial, movies_df, actors_df, movie_columns, actor_columns):
+        """Results of partial(movies partition, actors partition) for the partitions by movie_id."""
+        movies_parts = self.__partitions(movies_df, 'movie_id', movie_columns)
+        actors_parts = self.__partitions(actors_df, 'movie_id', actor_columns)
+        with self.__executor() as executor:
+            futures = [executor.submit(partial, movies_part, actors_part)
+                       for movies_part, actors_part in zip(movies_parts, actors_parts)]
+            return [future.result() for future in futures]
+
+
+BACKENDS = {backend.name: backend for backend in (PandasBackend(), PolarsBackend(), PartitionedBackend())}
+
+
+def get_backend(name=None):
+    """
+    Returns the backend registered under name.
+    Defaults to the IMDB_ANALYSIS_BACKEND environment variable, else pandas.
+    """
+    if name is None:
+        name = os.environ.get(BACKEND_ENV, PandasBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown analysis backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+
+def _lazy(df):
+    import polars as pl
+
+    return pl.from_pandas(df).lazy()
+
+
+def _missing_as_nan(row):
+    # polars aggregates of no rows are None, pandas' are NaN
+    return {name: np.nan if value is None else value for name, value in row.items()}
+
+
+def _n_unique(column):
+    import polars as pl
+
+    # pandas' nunique does not count missing values
+    return pl.col(column).drop_nulls().n_unique()
+
+
+def _join_movies_actors(movies, actors, ordered=False):
+    """
+    Inner join on movie_id (the compact id dtypes of the two frames can differ).
+    :param ordered: Return the rows in the order of pandas' merge, left rows then their right rows in order.
+    """
+    import polars as pl
+
+    movies = movies.with_columns(pl.col('movie_id').cast(pl.Int64))
+    actors = actors.with_columns(pl.col('movie_id').cast(pl.Int64))
+    if not ordered:
+        return movies.join(actors, on='movie_id', how='inner')
+    joined = movies.with_row_index('__left').join(actors.with_row_index('__right'), on='movie_id', how='inner')
+    return joined.sort(['__left', '__right']).drop(['__left', '__right'])
+
+
+# Partition of a frame attached from a shared dataset, selected by the worker from its own mapping
+SharedPartition = namedtuple('SharedPartition', ['dataset', 'name', 'columns', 'key', 'partition',
+                                                 'num_partitions'])
+
+
+def _resolve(part):
+    """Rows of a partition, mapped from the shared dataset if it is a SharedPartition."""
+    if not isinstance(part, SharedPartition):
+        return part
+    # The mapped frames are shared by all the partials run in this worker, as in the connection's process
+    pd.set_option('mode.copy_on_write', True)
+    df = attach(part.dataset, part.name, part.columns)
+    return df[df[part.key].to_numpy(np.int64) % part.num_partitions == part.partition]
+
+
+def _hash_partitions(df, key, num_partitions):
+    """Rows of df split into num_partitions by key modulo num_partitions, each in the row order of df."""
+    partition_ids = df[key].to_numpy(np.int64) % num_partitions
+    parts = dict(iter(df.groupby(partition_ids, sort=False)))
+    return [parts.get(partition, df.iloc[:0]) for partition in range(num_partitions)]
+
+
+def _counts_partial(movies_part, actors_part):
+    """Distinct movies (disjoint between partitions), distinct values, years and rank histogram of the join."""
+    merged_df = pd.merge(_resolve(movies_part), _resolve(actors_part), on='movie_id', how='inner')
+    return {'movies': merged_df['movie_id'].nunique(), 'genres': merged_df['movie_genre'].drop_duplicates(),
+            'directors': merged_df['director_id'].drop_duplicates(),
+            'actors': merged_df['actor_id'].drop_duplicates(),
+            'min_year': merged_df['movie_year'].min(), 'max_year': merged_df['movie_year'].max(),
+            'rank_counts': merged_df['movie_rank'].value_counts()}
+
+
+def _merge_counts(partials):
+    return {'movies': sum(partial['movies'] for partial in partials),
+            'directors': _merge_distinct(partial['directors'] for partial in partials),
+            'actors': _merge_distinct(partial['actors'] for partial in partials),
+            'min_year': _merge_extreme(min, (partial['min_year'] for partial in partials)),
+            'max_year': _merge_extreme(max, (partial['max_year'] for partial in partials)),
+            'rank_counts': _sum_partials(partial['rank_counts'] for partial in partials)}
+
+
+def _merge_extreme(extreme, values):
+    # Partitions without rows have no minimum or maximum
+    values = [value for value in values if pd.notna(value)]
+    return extreme(values) if values else np.nan
+
+
+def _merge_distinct(values):
+    # Categoricals of different partitions can have different categories, compare their values
+    return pd.concat([part.astype(object) for part in values]).nunique()
+
+
+def _sum_partials(partials):
+    """Sum of the partial aggregates with the same index value."""
+    return pd.concat(list(partials)).groupby(level=0, sort=False).sum()
+
+
+def _describe_counts(value_counts):
+    """describe() of the values counted in value_counts, without expanding them to one value per count."""
+    value_counts = value_counts.sort_index()
+    values = value_counts.index.to_numpy(np.float64)
+    counts = value_counts.to_numpy(np.int64)
+    num_values = counts.sum()
+    if num_values == 0:
+        return pd.Series([0.0] + [np.nan] * 7, index=DESCRIBE_INDEX, name='movie_rank')
+
+    mean = (values * counts).sum() / num_values
+    std = math.sqrt(((values - mean) ** 2 * counts).sum() / (num_values - 1)) if num_values > 1 else np.nan
+    # Position in the sorted values after which each value ends
+    ends = np.cumsum(counts)
+
+    def quantile(q):
+        # Linear interpolation between the values around position q * (n - 1), as pandas does
+        position = q * (num_values - 1)
+        lower = math.floor(position)
+        lower_value = values[np.searchsorted(ends, lower, side='right')]
+        upper_value = values[np.searchsorted(ends, min(lower + 1, num_values - 1), side='right')]
+        return lower_value + (upper_value - lower_value) * (position - lower)
+
+    return pd.Series([num_values, mean, std, values[0], quantile(0.25), quantile(0.5), quantile(0.75), values[-1]],
+                     index=DESCRIBE_INDEX, name='movie_rank', dtype='float64')
+
+
+def _occurrences_partial(actors_part, movie_ids):
+    actors_part = _resolve(actors_part)
+    return actors_part.loc[actors_part['movie_id'].isin(movie_ids), 'actor_id'].value_counts()
+
+
+def _correlation_partial(movies_part, actors_part):
+    """
+    Per director and per actor: joined rows, rank sum and ranked rows; and the first joined row of every
+    movie with its cast size.
+    """
+    movies_part = _resolve(movies_part)
+    # Row labels are the positions of the movie rows, the order the first rows are put back in
+    movies_part = movies_part.assign(__left=movies_part.index.to_numpy())
+    joined = pd.merge(movies_part, _resolve(actors_part), on='movie_id', how='inner')
+    joined['movie_rank'] = joined['movie_rank'].astype('float64')
+    aggregations = {'rows': ('movie_id', 'count'), 'rank_sum': ('movie_rank', 'sum'),
+                    'ranks': ('movie_rank', 'count')}
+    director_stats = joined.groupby('director_id', sort=False).agg(**aggregations)
+    actor_stats = joined.groupby('actor_id', sort=False).agg(**aggregations)
+
+    first_rows = joined.drop_duplicates(subset=['movie_id'])
+    cast_size = joined.groupby('movie_id', sort=False)['actor_id'].count()
+    first_rows = first_rows.assign(cast_size=first_rows['movie_id'].map(cast_size).astype('int64'))
+    return director_stats, actor_stats, first_rows
+
+
+def _cast_rank_partial(actors_part, actor_avg_part):
+    """Per movie: sum and count of the average ranks of its actors in the partition."""
+    cast = _resolve(actors_part).merge(actor_avg_part, on='actor_id', how='inner').dropna(subset=['actor_avg_rank'])
+    return cast.groupby('movie_id', sort=False).agg(rank_sum=('actor_avg_rank', 'sum'),
+                                                    ranks=('actor_avg_rank', 'count'))
@@ -131,7 +131,7 @@ def get_movie_info(movie_df):
         'name': movie_df['movie_name'].iloc[0],
         'rank': movie_df['movie_rank'].iloc[0],
         'year': movie_df['movie_year'].iloc[0],
-        'genres': movie_df['movie_genre'].unique(),
+        'genres': movie_df['movie_genre'].astype('string').unique().tolist(),
         'director': (movie_df['director_id'].iloc[0], movie_df['full_name(dir)'].iloc[0])
     }
 
@@ -145,7 +145,7 @@ def get_movie_genres(movie_df, movie_id=None, movie_name=None):
     if movie is None:
         return
     else:
-        return movie['genres'].tolist()
+        return movie['genres']
 
 
 def get_movie_years(movie_df):
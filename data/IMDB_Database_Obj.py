@@ -1,74 +1,447 @@
+import math
 import os.path
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
 import pandas as pd
 import pkg_resources
-from sqlalchemy import create_engine
 
-from IMDB.visualisation.df_visuals import printTitle, dataframe_EDA, printDF
+from IMDB.data.cache_formats import get_cache_format
+from IMDB.data.cache_locking import FileLock, atomic_write
+from IMDB.data.compact_schema import ACTOR_SCHEMA, MOVIE_SCHEMA, compact_df, memory_mb, share_name_dictionary
+from IMDB.data.dataset_version import DatasetVersion
+from IMDB.data.eda_sketches import profile_file, profile_frame
+from IMDB.data.imputation import groupwise_fill
+from IMDB.data.join_engine import JoinStep, run_join_plan
+from IMDB.data.partitioned_store import read_partitioned, write_partitioned
+from IMDB.data.pipeline_scheduler import PipelineStage, StageLog, run_stages
+from IMDB.data.pushdown_queries import (MERGED_ACTOR_SOURCES, MERGED_MOVIE_SOURCES, merged_actors_query,
+                                        merged_movies_query, result_column_types)
+from IMDB.data.shared_dataset import SharedDataset, attach, is_published, publish, shared_directory, shared_source
+from IMDB.data.spill_join import spilled_join
+from IMDB.data.stage_manifest import StageManifest, code_version
+from IMDB.data.star_schema import WIDE_ACTOR_COLUMNS, WIDE_MOVIE_COLUMNS, StarSchema
+from IMDB.data.table_sources import MySQLSource, SQLSource
+from IMDB.data.text_normalise import normalise_strings
+from IMDB.data.warm_snapshot import read_snapshot, snapshots_available, write_snapshot
+from IMDB.visualisation.df_visuals import printTitle, dataframe_EDA, printDF, sketch_EDA
+from IMDB.visualisation.log_levels import DEBUG, INFO, NullLogger, log, log_enabled
 
 
 class IMDBConnection:
     TABLE_NAMES = ['actors', 'directors', 'directors_genres', 'movies', 'movies_directors',
                    'movies_genres', 'roles']
-
-    def __init__(self, connect_info, client=None, logger=None):
+    MOVIE_TABLES = ['movies', 'movies_directors', 'directors', 'movies_genres']
+    ACTOR_TABLES = ['actors', 'roles']
+    # Integer key each table is range-partitioned on for parallel fetches
+    PARTITION_KEYS = {'actors': 'id', 'directors': 'id', 'directors_genres': 'director_id', 'movies': 'id',
+                      'movies_directors': 'movie_id', 'movies_genres': 'movie_id', 'roles': 'actor_id'}
+    # Increasing id column used as the high-water mark of each table in incremental refreshes
+    WATERMARK_KEYS = {'actors': 'id', 'directors': 'id', 'directors_genres': 'director_id', 'movies': 'id',
+                      'movies_directors': 'movie_id', 'movies_genres': 'movie_id', 'roles': 'movie_id'}
+    # A stage is only fresh if the stages it was built from are fresh as well
+    UPSTREAM_STAGES = {'cleaned_movies': ['merged_movies'], 'cleaned_actors': ['merged_actors'],
+                       'partitions': ['cleaned_movies', 'cleaned_actors']}
+    # Columns of the merge stage outputs, as built by pushdown_queries as well
+    MERGED_MOVIE_COLUMNS = ['movie_name', 'movie_year', 'movie_rank', 'director_id', 'movie_id', 'first_name(dir)',
+                            'last_name(dir)', 'movie_genre']
+    MERGED_ACTOR_COLUMNS = ['first_name(act)', 'last_name(act)', 'gender(act)', 'actor_id', 'movie_id', 'role(act)']
+    # Column renames of the actors and roles tables in merged_actors
+    ACTOR_RENAMES = {'id': 'actor_id', 'first_name': 'first_name(act)', 'last_name': 'last_name(act)',
+                     'gender': 'gender(act)'}
+    ROLE_RENAMES = {'role': 'role(act)'}
+    # Pipeline stages run by run_pipeline and the stages they depend on
+    PIPELINE_STAGES = {'movie_tables': [], 'actor_tables': [],
+                       'merged_movies': ['movie_tables'], 'merged_actors': ['actor_tables'],
+                       'cleaned_movies': ['merged_movies'], 'cleaned_actors': ['merged_actors'],
+                       'partitions': ['cleaned_movies', 'cleaned_actors']}
+    # Snapshot sections of the star schema tables, e.g. star:movies
+    STAR_SECTION_PREFIX = 'star:'
+    # Cleaned data frames published to shared memory
+    SHARED_FRAMES = ('merged_movies', 'merged_actors')
+    CHUNK_SIZE = 100_000
+    PARTITION_SIZE = 500_000
+
+    def __init__(self, connect_info=None, client=None, logger=None, stream=False, chunk_size=CHUNK_SIZE,
+                 workers=1, partition_size=PARTITION_SIZE, cache_format=None, source=None,
+                 pushdown=False, year_range=None, genres=None, cache_dir=None, partition_by='decade',
+                 partition_by_genre=False, star_schema=False, merge_memory_mb=None, eda='exact',
+                 shared_memory=False):
         """
         Initializes the DBConnection object.
 
         Parameters:
-        - connect_info (tuple): Information required to establish a database connection.
+        - connect_info (tuple): Information required to establish a connection to the IMDB MySQL database.
+        - source: Source adapter from table_sources to read the tables from instead of the MySQL database.
+        - pushdown (bool): Build merged_movies and merged_actors with SQL joins in the database (SQL sources only).
+        - year_range (tuple): Optional (first year, last year) the pushdown fetch is restricted to.
+        - genres (list): Optional genres, spelled as in the database, the pushdown fetch is restricted to.
+        - stream (bool): Fetch tables in chunks through a server-side cursor.
+        - chunk_size (int): Number of rows per chunk when streaming.
+        - workers (int): Number of pooled connections used to fetch tables in parallel, and of the worker
+          processes fetch_df builds the pipeline stages in.
+        - partition_size (int): Approximate number of rows per key-range partition in parallel fetches.
+        - cache_format (str): Format of the on-disk stage caches ('parquet', 'arrow' or 'csv').
+          Defaults to parquet when pyarrow is installed.
+        - cache_dir (str): Root folder of the stage caches, shared by all processes on the host.
+          Defaults to the IMDB_CACHE_DIR environment variable, else the package data folder.
+        - partition_by (str): 'decade' or 'year', partitioning of the cleaned data written for load_partitions.
+        - partition_by_genre (bool): Also partition the cleaned movies by genre.
+        - star_schema (bool): Keep the cleaned data as a normalised StarSchema (self.dataset) and only rebuild
+          the wide merged_movies and merged_actors frames when they are accessed.
+        - merge_memory_mb (float): Memory budget of the actors x roles merge. When the tables are estimated to
+          need more, they are merged out of core, one on-disk hash partition at a time. Unlimited by default.
+        - eda (str): 'exact' profiles the data frames exactly, 'sketch' with single-pass streaming sketches
+          (approximate distinct counts and top values), the cached tables in parallel processes.
+        - shared_memory (bool): Publish the cleaned data frames to shared memory (pyarrow required), where
+          analysis worker processes and other sessions on the host map them instead of copying them.
         """
+        if pushdown and source is not None and not isinstance(source, SQLSource):
+            raise ValueError(f"pushdown needs a SQL data source, not {source.describe()}")
+
+        # The data frames are shared without defensive copies, between the stages, the published versions and
+        # the analysis tabs: with copy-on-write, selections are views and any change made through one is
+        # applied to a private copy, never to the shared frame. Pipeline workers build their own connection.
+        pd.set_option('mode.copy_on_write', True)
+
+        # Arguments an equivalent connection is built from in pipeline worker processes
+        self.settings = {'connect_info': tuple(connect_info) if connect_info else None, 'stream': stream,
+                         'chunk_size': chunk_size, 'workers': workers, 'partition_size': partition_size,
+                         'cache_format': cache_format, 'source': source, 'pushdown': pushdown,
+                         'year_range': year_range, 'genres': genres, 'cache_dir': cache_dir,
+                         'partition_by': partition_by, 'partition_by_genre': partition_by_genre,
+                         'star_schema': star_schema, 'merge_memory_mb': merge_memory_mb, 'eda': eda,
+                         'shared_memory': shared_memory}
+
         # DB connection
-        self.host, self.user, self.password, self.port, self.database = connect_info
+        self.host, self.user, self.password, self.port, self.database = connect_info or (None,) * 5
+        self.source = source
         self.imdb_con = None
         self.client = client
-        self.logger = logger
+        self.logger = logger if logger is not None else NullLogger()
 
+        # Streaming fetch
+        self.stream = stream
+        self.chunk_size = chunk_size
 
-        self.dataframes = {}
-        self.merged_movies = pd.DataFrame()
-        self.merged_actors = pd.DataFrame()
+        # Parallel fetch
+        self.workers = workers
+        self.partition_size = partition_size
+
+        # Pushdown fetch
+        self.pushdown = pushdown
+        self.year_range = year_range
+        self.genres = genres
 
-        self.csv_file_path_movies = pkg_resources.resource_filename(__name__, "merged/movies_df.csv")
-        self.csv_file_path_actors = pkg_resources.resource_filename(__name__, "merged/actors_df.csv")
-        self.csv_file_cleaned_movies = pkg_resources.resource_filename(__name__, "cleaned/cleaned_movies_df.csv")
-        self.csv_file_cleaned_actors = pkg_resources.resource_filename(__name__, "cleaned/cleaned_actors_df.csv")
+        self.dataframes = {}
+        self.star_schema = star_schema
+        self.merge_memory_mb = merge_memory_mb
+        self.eda = eda
+        self.shared_memory = shared_memory
+        self.shared_dataset = None
+        # Frames being built by this connection, published as the next version when complete, or the star
+        # schema loaded from a snapshot instead of them
+        self._merged_movies = self._merged_actors = None
+        self._star_dataset = None
+        self.version = DatasetVersion(pd.DataFrame(), pd.DataFrame())
+
+        # Values derived from the cleaned data frames, kept in the warm-start snapshot
+        self.derived_values = {}
+        self.snapshot_ready = False
+        self.snapshot_values = set()
+
+        # Stage caches
+        self.cache_dir = cache_dir or os.environ.get('IMDB_CACHE_DIR') or pkg_resources.resource_filename(__name__, "")
+        self.settings['cache_dir'] = self.cache_dir
+        for stage_dir in ('tables', 'merged', 'cleaned', 'locks'):
+            os.makedirs(os.path.join(self.cache_dir, stage_dir), exist_ok=True)
+        self.cache_format = get_cache_format(cache_format)
+        self.file_path_movies = self.__cache_path("merged/movies_df")
+        self.file_path_actors = self.__cache_path("merged/actors_df")
+        self.file_cleaned_movies = self.__cache_path("cleaned/cleaned_movies_df")
+        self.file_cleaned_actors = self.__cache_path("cleaned/cleaned_actors_df")
+
+        # Stage: (output file, input files, code version)
+        self.manifest = StageManifest(os.path.join(self.cache_dir, "manifest.json"))
+        self.snapshot_path = os.path.join(self.cache_dir, "snapshot.imdbsnap")
+        self.partition_by = partition_by
+        self.partition_by_genre = partition_by_genre
+        self.partitions_dir = os.path.join(self.cache_dir, "cleaned", "partitions")
+        self.stages = {
+            'merged_movies': (self.file_path_movies,
+                              [self.__table_path(table_name) for table_name in self.MOVIE_TABLES],
+                              self.__merge_version(merged_movies_query, self.__merge_movie_tables, run_join_plan,
+                                                   self.MERGED_MOVIE_COLUMNS)),
+            'merged_actors': (self.file_path_actors,
+                              [self.__table_path(table_name) for table_name in self.ACTOR_TABLES],
+                              self.__merge_version(merged_actors_query, self.__merge_actor_tables, run_join_plan,
+                                                   self.__spill_merge_actors, spilled_join, self.ACTOR_RENAMES,
+                                                   self.ROLE_RENAMES, self.MERGED_ACTOR_COLUMNS)),
+            'cleaned_movies': (self.file_cleaned_movies, [self.file_path_movies],
+                               code_version(self.__clean_movies_df, self.__standardise_movie_df,
+                                            self.__fill_missing_movie_df, normalise_strings, groupwise_fill,
+                                            compact_df, MOVIE_SCHEMA)),
+            'cleaned_actors': (self.file_cleaned_actors, [self.file_path_actors],
+                               code_version(self.__clean_actors_df, self.__standardise_actor_df,
+                                            self.__fill_missing_actor_df, normalise_strings, groupwise_fill,
+                                            compact_df, ACTOR_SCHEMA)),
+            'partitions': (os.path.join(self.partitions_dir, "zone_map.json"),
+                           [self.file_cleaned_movies, self.file_cleaned_actors],
+                           code_version(write_partitioned) + repr((partition_by, partition_by_genre))),
+        }
+
+    @property
+    def merged_movies(self):
+        # The frame being built, else the current version's. Readers that need both frames of one version
+        # should take self.version once instead.
+        if self._merged_movies is None:
+            return self.version.merged_movies
+        return self._merged_movies
+
+    @merged_movies.setter
+    def merged_movies(self, df):
+        self._merged_movies = df
+
+    @property
+    def merged_actors(self):
+        if self._merged_actors is None:
+            return self.version.merged_actors
+        return self._merged_actors
+
+    @merged_actors.setter
+    def merged_actors(self, df):
+        self._merged_actors = df
+
+    @property
+    def dataset(self):
+        return self.version.dataset
 
     '''
         Public functions
     '''
 
-    def load_df(self):
+    def load_df(self, movie_columns=None, actor_columns=None):
         """
         Loads Cleaned Data Frames from the data folder if saved, else merges and cleans the data.
+        :param movie_columns: Optional subset of merged_movies columns to load.
+        :param actor_columns: Optional subset of merged_actors columns to load.
         :return: None
         """
         printTitle("Loading DataFrames", logger=self.logger)
         self.logger.write("DataFrames in the storage:")
         self.logger.write("- merged_movies")
         self.logger.write("- merged_actors")
-        self.__load_or_merge_df()
-        self.__load_or_clean_df()
+        full_load = movie_columns is None and actor_columns is None
+        if full_load and self.__attach_shared_dataset():
+            self.logger.write(f"[x] attached shared dataset from {self.shared_dataset.directory}")
+        elif full_load and self.__load_snapshot():
+            self.logger.write("[x] warm start from snapshot")
+        else:
+            self.__load_or_clean_df(movie_columns, actor_columns)
+        # Opened if tables had to be fetched
+        if self.imdb_con is not None:
+            self.close_con()
+        self.__publish_dataset()
+        self.client.ready = True
+
+    def load_partitions(self, year_range=None, genres=None, movie_columns=None, actor_columns=None):
+        """
+        Loads only the cleaned data for movies released in year_range and of the given genres, reading
+        just the year/genre partitions that can hold them. The partitions are (re)written if stale.
+        :param year_range: Optional (first year, last year), inclusive.
+        :param genres: Optional list of cleaned (lowercase) genre names.
+        :return: None
+        """
+        printTitle("Loading DataFrame Partitions", logger=self.logger)
+        self.__ensure_partitions()
+
+        movies_df, actors_df = read_partitioned(self.partitions_dir, self.cache_format, year_range, genres,
+                                                movie_columns, actor_columns)
+        # Concatenating partitions with different category dictionaries falls back to object, so compact again
+        self.merged_movies = compact_df(movies_df, MOVIE_SCHEMA)
+        self.merged_actors = compact_df(actors_df, ACTOR_SCHEMA)
+        if 'full_name(dir)' in self.merged_movies and 'full_name(act)' in self.merged_actors:
+            self.merged_movies, self.merged_actors = share_name_dictionary(self.merged_movies, self.merged_actors)
+        self.derived_values = {}
+        self.snapshot_ready = False
+        self.logger.write(f"[x] loaded {len(self.merged_movies)} movie rows, {len(self.merged_actors)} actor rows")
+        self.__publish_dataset()
         self.client.ready = True
 
+    def unique_movies(self):
+        """
+        Returns one row per movie (movie_id, movie_rank, movie_name, movie_year), without the director and
+        genre fan-out of merged_movies: the star schema's movie dimension if enabled.
+        """
+        return self.version.unique_movies()
+
+    def run_pipeline(self, targets=('cleaned_movies', 'cleaned_actors'), workers=2):
+        """
+        Builds the stale stage caches the targets need with the pipeline scheduler, running the independent
+        movies and actors branches in parallel worker processes, then loads the cleaned data frames if both
+        were built. The critical path of the run is logged.
+        :param targets: Stages of PIPELINE_STAGES to build, together with the stages they depend on.
+        :param workers: Number of worker processes, 1 runs the stages one after the other in this process.
+        :return: None
+        """
+        printTitle("Pipeline", logger=self.logger)
+        log_level = getattr(self.logger, 'log_level', INFO)
+        stages = {name: PipelineStage(name, dependencies, _build_stage, (self.settings, name, log_level))
+                  for name, dependencies in self.PIPELINE_STAGES.items()}
+        durations = run_stages(stages, targets, workers, self.logger)
+
+        if 'cleaned_movies' in durations and 'cleaned_actors' in durations:
+            self.load_df()
+
+    def build_stage(self, stage):
+        """
+        Builds one stage of PIPELINE_STAGES into its cache, if stale. Its dependencies must be built already.
+        :return: None
+        """
+        if stage in ('movie_tables', 'actor_tables'):
+            table_names = self.MOVIE_TABLES if stage == 'movie_tables' else self.ACTOR_TABLES
+            missing_tables = [table_name for table_name in table_names
+                              if not os.path.isfile(self.__table_path(table_name))]
+            if missing_tables and not self.pushdown:
+                self.connect_db()
+                if self.workers > 1:
+                    self.__parallel_fetch_tables(missing_tables)
+                else:
+                    for table_name in missing_tables:
+                        self.__fetch_table_file(table_name)
+                self.close_con()
+            return
+
+        if self.pushdown and stage in ('merged_movies', 'merged_actors'):
+            self.connect_db()
+        {'merged_movies': self.__load_or_merge_movies,
+         'merged_actors': self.__load_or_merge_actors,
+         'cleaned_movies': self.__load_or_clean_movies,
+         'cleaned_actors': self.__load_or_clean_actors,
+         'partitions': self.__ensure_partitions}[stage]()
+        if self.imdb_con is not None:
+            self.close_con()
+
+    def derived(self, name, compute, *args):
+        """
+        Returns a value derived from the cleaned data frames (e.g. a sorted list of names), computing it
+        with compute(*args) only if it is not already in memory or in the loaded snapshot.
+        """
+        return self.version.derived(name, compute, *args)
+
+    def save_snapshot(self):
+        """
+        Saves the cleaned data frames and all derived values computed so far as a memory-mappable
+        snapshot, loaded by the next load_df instead of recomputing them.
+        :return: None
+        """
+        version = self.version
+        key = self.__snapshot_key()
+        if not self.snapshot_ready or key is None or not snapshots_available():
+            return
+        if set(version.derived_values) <= self.snapshot_values:
+            return
+        # A star schema is saved as its tables, the wide frames are not built for it
+        if version.dataset is not None:
+            frames = {f"{self.STAR_SECTION_PREFIX}{name}": table
+                      for name, table in version.dataset.tables().items()}
+        else:
+            frames = {'merged_movies': version.merged_movies, 'merged_actors': version.merged_actors}
+        with self.__cache_lock('snapshot'):
+            write_snapshot(self.snapshot_path, key, {**frames, **version.derived_values})
+        self.snapshot_values = set(version.derived_values)
+        self.logger.write(f"[x] saved warm-start snapshot ({len(version.derived_values)} derived values)")
+
+    def export_csv(self, directory):
+        """
+        Exports the cleaned merged_movies and merged_actors data frames as CSV files.
+        :param directory: Folder the CSV files are written to.
+        :return: None
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.merged_movies.to_csv(os.path.join(directory, "cleaned_movies_df.csv"), index=False)
+        self.merged_actors.to_csv(os.path.join(directory, "cleaned_actors_df.csv"), index=False)
+        self.logger.write(f"[x] exported cleaned data frames to {directory}")
+
     def fetch_df(self):
         """
-        Connects to DB, fetchs tables, merges and cleans them.
+        Connects to DB, fetchs tables, merges and cleans them. With more than one worker the stages are built
+        by the pipeline scheduler, in parallel worker processes, which profile no tables.
         :return: None
         """
+        if self.workers > 1:
+            self.run_pipeline(workers=self.workers)
+            self.logger.write("[x] table EDA skipped: the tables were fetched by the pipeline workers, "
+                              "run load_tables and table_EDA to profile them")
+            return
         self.connect_db()
-        self.load_tables()
-        self.table_EDA()
+        if not self.pushdown:
+            self.load_tables()
+            self.table_EDA()
         self.merge_df()
         self.clean_df()
         self.close_con()
         self.client.ready = True
 
+    def refresh_df(self):
+        """
+        Incrementally refreshes the cached tables with the rows added to the DB past each table's id
+        watermark, then merges and cleans only those new rows into merged_movies and merged_actors.
+        A table that also gained rows below its watermark (e.g. a new genre of an existing movie) is
+        fetched again in full, and the merged and cleaned stages are rebuilt from the tables.
+        Pushdown connections have no table caches to refresh, use fetch_df for those.
+        :return: None
+        """
+        self.__check_refreshable()
+        with self.__cache_lock('refresh'):
+            self.__load_or_clean_df()
+            cleaned_movies, cleaned_actors = self.merged_movies, self.merged_actors
+
+            self.connect_db()
+            self.__ensure_tables()
+            printTitle("Incremental Refresh", logger=self.logger)
+            delta_tables, refetched_tables = self.__fetch_table_deltas()
+            self.close_con()
+
+            if refetched_tables:
+                self.logger.write(f"[x] rows added below the watermark of {', '.join(refetched_tables)}, "
+                                  f"rebuilding the merged and cleaned stages")
+                self.__load_or_merge_df()
+                self.__load_or_clean_df()
+            elif not any(len(delta) for delta in delta_tables.values()):
+                # Nothing to merge, the cleaned frames loaded above are current
+                self.logger.write("[x] no new rows, the cleaned data frames are up to date")
+            else:
+                self.__refresh_movies(delta_tables, cleaned_movies)
+                self.__refresh_actors(delta_tables, cleaned_actors)
+        self.derived_values = {}
+        self.__publish_dataset()
+        self.client.ready = True
+
+    def refresh_in_background(self):
+        """
+        Runs refresh_df on a separate connection in a background thread, while this connection keeps serving
+        its current version, then publishes the refreshed data as this connection's next version.
+        :return: Future of the messages the refresh logged, for the caller to write to its logger.
+        """
+        self.__check_refreshable()
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.__refresh_next_version)
+        executor.shutdown(wait=False)
+        return future
+
     def connect_db(self):
         """
         Establishs a connection to the IMDB database.
         :return: None
         """
         printTitle("DB connection", logger=self.logger)
+        if self.source is not None:
+            self.logger.write(f"Connecting to data source: {self.source.describe()}")
+            self.imdb_con = self.source
+            return
+
         self.logger.write(
             f"Connecting to Database: IMDB" +
             f"\nHost:      {self.host}" +
@@ -78,9 +451,8 @@ class IMDBConnection:
             f"\nDatabase:  {self.database}"
         )
         try:
-            self.imdb_con = create_engine(
-                f"mysql+mysqlconnector://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
-            )
+            self.imdb_con = MySQLSource(self.host, self.user, self.password, self.port, self.database,
+                                        pool_size=self.workers)
         except Exception as error:
             self.logger.write("Error: Unable to connect to DB")
             self.logger.write(f"Error Details: {error}")
@@ -91,19 +463,18 @@ class IMDBConnection:
         :return: None
         """
         printTitle("Loading Tables", logger=self.logger)
+        fetched_tables = self.__parallel_fetch_tables() if self.workers > 1 else {}
+
         self.logger.write("Tables in the database:")
         for table_name in self.TABLE_NAMES:
             self.logger.write(table_name)
-            csv_file_path = pkg_resources.resource_filename(__name__, f"tables/{table_name}.csv")
 
-            if os.path.isfile(csv_file_path):
-                df = pd.read_csv(csv_file_path)
+            if table_name in fetched_tables:
+                df = fetched_tables[table_name]
             else:
-                query = f"SELECT * FROM {table_name}"
-                df = pd.read_sql(query, self.imdb_con)
-                df.to_csv(csv_file_path, index=False)
+                df = self.__load_or_fetch_table(table_name)
 
-            self.dataframes[table_name] = df.copy()
+            self.dataframes[table_name] = df
 
     def table_EDA(self):
         """
@@ -111,22 +482,32 @@ class IMDBConnection:
         :return: None
         """
         printTitle("Tables Exploratory Data Analysis", logger=self.logger)
-        for table_name, dataframe in self.dataframes.items():
-            dataframe_EDA(table_name, dataframe, logger=self.logger)
+        if self.eda != 'sketch' or not self.dataframes:
+            for table_name, dataframe in self.dataframes.items():
+                dataframe_EDA(table_name, dataframe, logger=self.logger)
+            return
+
+        # Each table is profiled from its cache file in a worker process, chunk by chunk
+        with ProcessPoolExecutor(max_workers=min(len(self.dataframes), os.cpu_count() or 1)) as executor:
+            profiles = {table_name: executor.submit(profile_file, self.cache_format, self.__table_path(table_name),
+                                                    self.chunk_size)
+                        for table_name in self.dataframes}
+            for table_name, profile in profiles.items():
+                sketch_EDA(table_name, profile.result(), logger=self.logger)
 
     def movies_EDA(self):
         """
         Perform Exploratory Data Analysis for Cleaned Merged Data frames.
         :return: None
         """
-        dataframe_EDA("Merged Movies DF", self.merged_movies, logger=self.logger)
+        self.__frame_EDA("Merged Movies DF", self.merged_movies)
 
     def actors_EDA(self):
         """
         Perform Exploratory Data Analysis for Cleaned Merged Data frames.
         :return: None
         """
-        dataframe_EDA("Merged Actors DF", self.merged_actors, logger=self.logger)
+        self.__frame_EDA("Merged Actors DF", self.merged_actors)
 
     def merge_df(self):
         """
@@ -138,11 +519,11 @@ class IMDBConnection:
         printTitle("Merge tables", logger=self.logger)
         self.__load_or_merge_df()
 
-        self.logger.write("\nMerged movies dataframe:")
-        printDF(self.merged_movies.head(), logger=self.logger)
+        log(self.logger, "\nMerged movies dataframe:", DEBUG)
+        printDF(self.merged_movies.head(), logger=self.logger, level=DEBUG)
 
-        self.logger.write("\nMerged actors dataframe:")
-        printDF(self.merged_actors.head(), logger=self.logger)
+        log(self.logger, "\nMerged actors dataframe:", DEBUG)
+        printDF(self.merged_actors.head(), logger=self.logger, level=DEBUG)
 
     def clean_df(self):
         """
@@ -153,92 +534,520 @@ class IMDBConnection:
         (4) Fill in missing/incomplete data
         (5) Handle outliers
         (6) Reorder columns
+        (7) Compact dtypes
         :return: None
         """
         printTitle("Cleaning Merged Tables", logger=self.logger)
         self.__load_or_clean_df()
 
-        dataframe_EDA("Merged Movie DF", self.merged_movies, logger=self.logger)
-        dataframe_EDA("Merged Actor DF", self.merged_actors, logger=self.logger)
+        self.__frame_EDA("Merged Movie DF", self.merged_movies, DEBUG)
+        self.__frame_EDA("Merged Actor DF", self.merged_actors, DEBUG)
+        self.__publish_dataset()
 
     '''
         Private functions
     '''
 
-    def __load_or_merge_df(self):
-        if os.path.isfile(self.csv_file_path_movies):
-            self.merged_movies = pd.read_csv(self.csv_file_path_movies)
+    def __frame_EDA(self, name, df, level=INFO):
+        if not log_enabled(self.logger, level):
+            return
+        if self.eda == 'sketch':
+            sketch_EDA(name, profile_frame(df, self.chunk_size), logger=self.logger, level=level)
         else:
+            dataframe_EDA(name, df, logger=self.logger, level=level)
+
+    def __cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.{self.cache_format.extension}")
+
+    def __cache_lock(self, name):
+        return FileLock(os.path.join(self.cache_dir, "locks", f"{name}.lock"),
+                        on_wait=lambda: self.logger.write(f"Waiting for another process to finish {name}..."))
+
+    def __write_cache(self, df, file_path):
+        atomic_write(file_path, lambda part_file_path: self.cache_format.write(df, part_file_path))
+
+    def __load_or_fetch_table(self, table_name):
+        df = self.__fetch_table_file(table_name)
+        return df if df is not None else self.cache_format.read(self.__table_path(table_name))
+
+    def __fetch_table_file(self, table_name):
+        # Makes sure the table is cached on disk, returns it if it was fetched into memory
+        table_file_path = self.__table_path(table_name)
+        if not os.path.isfile(table_file_path):
+            with self.__cache_lock(f"table_{table_name}"):
+                # Another process may have fetched the table while we waited for the lock
+                if not os.path.isfile(table_file_path):
+                    self.__ensure_connection()
+                    if self.stream:
+                        self.__stream_table(table_name, table_file_path)
+                    else:
+                        df = self.imdb_con.read_table(table_name)
+                        self.__write_cache(df, table_file_path)
+                        return df
+        return None
+
+    def __ensure_connection(self):
+        # A cold load_df, or a spilled merge, needs the source without fetch_df having connected
+        if self.imdb_con is None:
+            self.connect_db()
+
+    def __table_path(self, table_name):
+        return self.__cache_path(f"tables/{table_name}")
+
+    def __parallel_fetch_tables(self, table_names=TABLE_NAMES):
+        # Tables already cached on disk are not fetched again
+        missing_tables = [table_name for table_name in self.TABLE_NAMES
+                          if table_name in table_names and not os.path.isfile(self.__table_path(table_name))]
+        fetched_tables = {}
+        if not missing_tables:
+            return fetched_tables
+
+        with ExitStack() as table_locks:
+            # Locks are always taken in TABLE_NAMES order
+            for table_name in missing_tables:
+                table_locks.enter_context(self.__cache_lock(f"table_{table_name}"))
+            missing_tables = [table_name for table_name in missing_tables
+                              if not os.path.isfile(self.__table_path(table_name))]
+            if missing_tables:
+                fetched_tables = self.__fetch_tables(missing_tables)
+
+        return fetched_tables
+
+    def __fetch_tables(self, missing_tables):
+        fetched_tables = {}
+        self.__ensure_connection()
+        self.logger.write(f"Fetching {len(missing_tables)} table(s) with {self.workers} workers...")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            table_futures = {
+                table_name: [executor.submit(self.__fetch_key_range, table_name, key_range)
+                             for key_range in self.__partition_key_ranges(table_name)]
+                for table_name in missing_tables
+            }
+
+            # Stitch partitions back together in key order
+            for table_name, futures in table_futures.items():
+                df = pd.concat([future.result() for future in futures], ignore_index=True)
+                self.__write_cache(df, self.__table_path(table_name))
+                fetched_tables[table_name] = df
+                self.logger.write(f"[x] {table_name}: fetched in {len(futures)} partition(s) ({len(df)} rows)")
+
+        return fetched_tables
+
+    def __partition_key_ranges(self, table_name):
+        if not self.imdb_con.range_reads:
+            # Every key range would read the whole file
+            return [None]
+
+        key = self.PARTITION_KEYS[table_name]
+        min_key, max_key, row_count = self.imdb_con.key_stats(table_name, key)
+
+        if row_count <= self.partition_size:
+            return [None]
+
+        min_key, max_key, row_count = int(min_key), int(max_key), int(row_count)
+        num_partitions = -(-row_count // self.partition_size)
+        step = -(-(max_key - min_key + 1) // num_partitions)
+        return [(start, min(start + step - 1, max_key)) for start in range(min_key, max_key + 1, step)]
+
+    def __fetch_key_range(self, table_name, key_range):
+        if key_range is None:
+            return self.imdb_con.read_table(table_name)
+        return self.imdb_con.read_key_range(table_name, self.PARTITION_KEYS[table_name], *key_range)
+
+    def __check_refreshable(self):
+        if self.pushdown:
+            raise ValueError("Incremental refresh needs the table caches, it is not supported with pushdown, "
+                             "use fetch_df instead")
+
+    def __fetch_table_deltas(self):
+        # Returns ({table name: rows past the watermark}, [tables fetched again in full])
+        delta_tables = {}
+        refetched_tables = []
+        for table_name in self.TABLE_NAMES:
+            key = self.WATERMARK_KEYS[table_name]
+            table = self.dataframes[table_name]
+
+            # A re-fetched table can be ahead of the recorded watermark, never behind it
+            watermark = self.manifest.watermarks.get(table_name, -1)
+            if not table.empty:
+                watermark = max(watermark, int(table[key].max()))
+
+            if self.imdb_con.range_reads:
+                current_table = None
+                delta = self.imdb_con.read_key_range(table_name, key, low=watermark + 1)
+                # Rows added (or removed) below the watermark, e.g. bridge rows of existing movies, change the count
+                num_rows = int(self.imdb_con.key_stats(table_name, key)[2])
+            else:
+                # The delta and the count are taken from one read of the file
+                current_table = self.imdb_con.read_table(table_name)
+                delta = current_table[current_table[key] > watermark].reset_index(drop=True)
+                num_rows = len(current_table)
+            if num_rows != len(table) + len(delta):
+                if current_table is None:
+                    current_table = self.imdb_con.read_table(table_name)
+                self.dataframes[table_name] = current_table
+                self.__write_cache(self.dataframes[table_name], self.__table_path(table_name))
+                if not self.dataframes[table_name].empty:
+                    watermark = int(self.dataframes[table_name][key].max())
+                refetched_tables.append(table_name)
+                delta = delta.iloc[:0]
+                self.logger.write(f"[x] {table_name}: fetched again ({num_rows} rows, watermark {key}={watermark})")
+            elif not delta.empty:
+                self.dataframes[table_name] = pd.concat([table, delta], ignore_index=True)
+                self.__write_cache(self.dataframes[table_name], self.__table_path(table_name))
+                watermark = int(delta[key].max())
+
+            self.manifest.set_watermark(table_name, watermark)
+            if table_name not in refetched_tables:
+                self.logger.write(f"[x] {table_name}: {len(delta)} new rows (watermark {key}={watermark})")
+            delta_tables[table_name] = delta
+
+        return delta_tables, refetched_tables
+
+    def __refresh_movies(self, delta_tables, cleaned_movies):
+        # New movies are joined against the full, refreshed directors table
+        self.__merge_movie_tables(dict(delta_tables, directors=self.dataframes['directors']))
+        merged_movies = pd.concat([self.cache_format.read(self.file_path_movies), self.merged_movies],
+                                  ignore_index=True)
+        self.__save_stage('merged_movies', merged_movies)
+
+        self.__clean_movies_df()
+        # Concatenating categoricals with different dictionaries falls back to object, so compact again
+        self.merged_movies = compact_df(pd.concat([cleaned_movies, self.merged_movies], ignore_index=True),
+                                        MOVIE_SCHEMA)
+        self.__save_stage('cleaned_movies', self.merged_movies)
+
+    def __refresh_actors(self, delta_tables, cleaned_actors):
+        # New roles are joined against the full, refreshed actors table
+        self.__merge_actor_tables(dict(delta_tables, actors=self.dataframes['actors']))
+        merged_actors = pd.concat([self.cache_format.read(self.file_path_actors), self.merged_actors],
+                                  ignore_index=True)
+        self.__save_stage('merged_actors', merged_actors)
+
+        self.__clean_actors_df()
+        self.merged_actors = compact_df(pd.concat([cleaned_actors, self.merged_actors], ignore_index=True),
+                                        ACTOR_SCHEMA)
+        self.__save_stage('cleaned_actors', self.merged_actors)
+
+    def __stream_table(self, table_name, table_file_path):
+        # Only one chunk of the table is held in memory at a time. Columns are typed as declared in the
+        # source, a first chunk that is all NULL in a column does not fix its type.
+        column_types = self.imdb_con.column_types(table_name)
+        chunks = self.__log_chunks(table_name, self.imdb_con.read_table_chunks(table_name, self.chunk_size))
+        atomic_write(table_file_path,
+                     lambda part_file_path: self.cache_format.write_chunks(chunks, part_file_path, column_types))
+
+    def __log_chunks(self, table_name, chunks):
+        fetched_rows = 0
+        for chunk_num, chunk in enumerate(chunks, start=1):
+            yield chunk
+            fetched_rows += len(chunk)
+            self.logger.write(f"[x] {table_name}: chunk {chunk_num} fetched ({fetched_rows} rows)")
+
+    def __merge_version(self, pushdown_query, *merge_parts):
+        # Pushdown stages depend on the SQL and the filters instead of the pandas merge
+        if self.pushdown:
+            return code_version(pushdown_query) + repr((self.year_range, self.genres))
+        return code_version(*merge_parts)
+
+    def __fetch_merged_stage(self, stage, pushdown_query, column_sources):
+        printTitle(f"Pushdown fetch: {stage}", logger=self.logger)
+        output_path, input_paths, version = self.stages[stage]
+
+        query, params = pushdown_query(self.year_range, self.genres)
+        self.__ensure_connection()
+        column_types = result_column_types(self.imdb_con, column_sources)
+        chunks = self.__log_chunks(stage, self.imdb_con.read_query_chunks(query, self.chunk_size, params))
+        num_rows = atomic_write(output_path, lambda part_file_path: self.cache_format.write_chunks(
+            chunks, part_file_path, column_types))
+
+        self.manifest.record(stage, output_path, input_paths, version, num_rows)
+        return self.cache_format.read(output_path)
+
+    def __is_fresh(self, stage):
+        if not all(self.__is_fresh(upstream_stage) for upstream_stage in self.UPSTREAM_STAGES.get(stage, [])):
+            return False
+        output_path, input_paths, version = self.stages[stage]
+        return self.manifest.is_fresh(stage, output_path, input_paths, version)
+
+    def __load_or_build_stage(self, stage, build, columns=None):
+        # Only one process builds a stale stage, the others wait for the lock and reuse its output
+        if not self.__is_fresh(stage):
+            with self.__cache_lock(stage):
+                self.manifest.reload()
+                if not self.__is_fresh(stage):
+                    df = build()
+                    return df if columns is None else df[columns]
+        return self.cache_format.read(self.stages[stage][0], columns=columns)
+
+    def __save_stage(self, stage, df):
+        output_path, input_paths, version = self.stages[stage]
+        self.__write_cache(df, output_path)
+        self.manifest.record(stage, output_path, input_paths, version, len(df))
+        self.logger.write(f"[x] {stage} stage saved ({len(df)} rows)")
+
+    def __ensure_tables(self, table_names=TABLE_NAMES):
+        missing_tables = [table_name for table_name in table_names if table_name not in self.dataframes]
+        if len(missing_tables) == len(self.TABLE_NAMES):
             self.load_tables()
-            self.__merge_movie_tables()
-            self.merged_movies.to_csv(self.csv_file_path_movies, index=False)
-
-        if os.path.isfile(self.csv_file_path_actors):
-            self.merged_actors = pd.read_csv(self.csv_file_path_actors)
+            return
+        for table_name in missing_tables:
+            self.dataframes[table_name] = self.__load_or_fetch_table(table_name)
+
+    def __ensure_partitions(self):
+        if not self.__is_fresh('partitions'):
+            with self.__cache_lock('partitions'):
+                self.manifest.reload()
+                if not self.__is_fresh('partitions'):
+                    self.__build_partitions()
+
+    def __snapshot_key(self):
+        # The snapshot belongs to the exact cleaned stage outputs it was derived from
+        if not (self.__is_fresh('cleaned_movies') and self.__is_fresh('cleaned_actors')):
+            return None
+        return ":".join(self.manifest.stages[stage]['output'] for stage in ('cleaned_movies', 'cleaned_actors'))
+
+    def __load_snapshot(self):
+        key = self.__snapshot_key()
+        sections = read_snapshot(self.snapshot_path, key) if key is not None else None
+        if sections is None:
+            return False
+
+        if f"{self.STAR_SECTION_PREFIX}movies" in sections:
+            self._star_dataset = StarSchema(**{name: sections.pop(f"{self.STAR_SECTION_PREFIX}{name}")
+                                               for name in StarSchema.TABLE_NAMES})
         else:
-            self.load_tables()
-            self.__merge_actor_tables()
-            self.merged_actors.to_csv(self.csv_file_path_actors, index=False)
-
-    def __merge_movie_tables(self):
-        self.logger.write("1. Merging movies with directors, genre..")
-        movies_director_id = pd.merge(self.dataframes['movies'], self.dataframes['movies_directors'],
-                                      left_on='id', right_on='movie_id', how='inner')
-        self.logger.write("[x] movies_director_id created")
-
-        movies_with_director = pd.merge(movies_director_id, self.dataframes['directors'],
-                                        left_on='director_id', right_on='id', how='inner')
-        self.logger.write("[x] movies_with_director created")
-
-        movies_with_director_genre = pd.merge(movies_with_director, self.dataframes['movies_genres'],
-                                              on='movie_id', how='inner')
-        self.logger.write("[x] movies_with_director_genre created")
+            self.merged_movies = sections.pop('merged_movies')
+            self.merged_actors = sections.pop('merged_actors')
+        self.derived_values = sections
+        self.snapshot_ready = True
+        self.snapshot_values = set(sections)
+        return True
+
+    def __refresh_next_version(self):
+        # The refresh builds on its own connection, nothing this connection serves changes until the swap
+        logger = StageLog(getattr(self.logger, 'log_level', INFO))
+        builder = IMDBConnection(client=types.SimpleNamespace(ready=False), logger=logger, **self.settings)
+        builder.refresh_df()
+
+        version = builder.version
+        version.logger = self.logger
+        # Swapped like the version, a method running on the old manifest keeps a consistent one
+        self.manifest = builder.manifest
+        self.snapshot_ready, self.snapshot_values = builder.snapshot_ready, set()
+        self.shared_dataset = builder.shared_dataset
+        self.version = version
+        self.client.ready = True
+        logger.write(f"[x] published dataset version {version.number}")
+        return logger.messages
+
+    def __attach_shared_dataset(self):
+        # Frames published by another session for the current stage outputs are mapped, the stage caches and
+        # the snapshot are not decoded
+        key = self.__snapshot_key() if self.shared_memory and snapshots_available() else None
+        if key is None:
+            return False
+        dataset = SharedDataset(shared_directory(self.cache_dir), self.cache_dir, key)
+        with self.__cache_lock('shared_dataset'):
+            if not is_published(dataset, self.SHARED_FRAMES):
+                return False
+            self.merged_movies = attach(dataset, 'merged_movies')
+            self.merged_actors = attach(dataset, 'merged_actors')
+        self.shared_dataset = dataset
+        self.derived_values = {}
+        self.snapshot_ready = True
+        self.snapshot_values = set()
+        return True
+
+    def __share_dataset(self):
+        # Only complete cleaned frames are shared, under the key of the stage outputs they were built from
+        key = self.__snapshot_key()
+        if not (self.shared_memory and self.snapshot_ready and key is not None and snapshots_available()):
+            return
+        if self._star_dataset is not None:
+            # Loaded as a star schema, there are no wide frames to share
+            return
+        dataset = SharedDataset(shared_directory(self.cache_dir), self.cache_dir, key)
+        frames = {'merged_movies': self.merged_movies, 'merged_actors': self.merged_actors}
+        if all(shared_source(df) == (dataset, name) for name, df in frames.items()):
+            # Attached by load_df
+            self.shared_dataset = dataset
+            return
+        with self.__cache_lock('shared_dataset'):
+            if not is_published(dataset, frames):
+                publish(dataset, frames)
+                self.logger.write(f"[x] published shared dataset to {dataset.directory}")
+
+        # Use the shared pages in this process too, instead of keeping a private copy. Frames of the previous
+        # versions stay attached for the readers still using them.
+        self.merged_movies = attach(dataset, 'merged_movies')
+        self.merged_actors = attach(dataset, 'merged_actors')
+        self.shared_dataset = dataset
+
+    def __publish_dataset(self):
+        self.__share_dataset()
+        movies_df, actors_df = self.merged_movies, self.merged_actors
+        dataset = self._star_dataset
+        if dataset is not None:
+            movies_df = actors_df = None
+        # Projected frames cannot be split into the full schema
+        elif (self.star_schema and set(WIDE_MOVIE_COLUMNS) <= set(movies_df.columns)
+                and set(WIDE_ACTOR_COLUMNS) <= set(actors_df.columns)):
+            # Deep memory usage scans every string, only measure it if it is logged
+            wide_memory = memory_mb(movies_df) + memory_mb(actors_df) if log_enabled(self.logger, DEBUG) else None
+            dataset = StarSchema.from_wide(movies_df, actors_df)
+            movies_df = actors_df = None
+            log(self.logger, lambda: f"[x] star schema dataset: {wide_memory:.1f} MB wide -> "
+                                     f"{dataset.memory_mb():.1f} MB", DEBUG)
+
+        # Readers that took the previous version keep using it
+        self.version = DatasetVersion(movies_df, actors_df, dataset, self.derived_values, self.logger)
+        self._merged_movies = self._merged_actors = None
+        self._star_dataset = None
+        self.derived_values = {}
 
-        movies_with_director_genre.drop(columns=['id_x', 'id_y'], inplace=True)
-        self.logger.write("[x] dropped duplicate columns")
+    def __load_or_merge_df(self):
+        self.derived_values = {}
+        self.snapshot_ready = False
+        self.__load_or_merge_movies()
+        self.__load_or_merge_actors()
+
+    def __load_or_merge_movies(self):
+        self.merged_movies = self.__load_or_build_stage('merged_movies', self.__build_merged_movies)
+
+    def __build_merged_movies(self):
+        if self.pushdown:
+            return self.__fetch_merged_stage('merged_movies', merged_movies_query, MERGED_MOVIE_SOURCES)
+        self.__ensure_tables(self.MOVIE_TABLES)
+        self.__merge_movie_tables()
+        self.__save_stage('merged_movies', self.merged_movies)
+        return self.merged_movies
+
+    def __load_or_merge_actors(self):
+        self.merged_actors = self.__load_or_build_stage('merged_actors', self.__build_merged_actors)
+
+    def __build_merged_actors(self):
+        if self.pushdown:
+            return self.__fetch_merged_stage('merged_actors', merged_actors_query, MERGED_ACTOR_SOURCES)
+        num_partitions = self.__spill_partitions(self.ACTOR_TABLES)
+        if num_partitions > 1:
+            return self.__spill_merge_actors(num_partitions)
+        self.__ensure_tables(self.ACTOR_TABLES)
+        self.__merge_actor_tables()
+        self.__save_stage('merged_actors', self.merged_actors)
+        return self.merged_actors
+
+    def __spill_partitions(self, table_names):
+        # Partitions needed to merge the tables within the memory budget, 1 for an in-memory merge. The
+        # estimate is from the cached table files, whether or not the tables are loaded already.
+        if self.merge_memory_mb is None:
+            return 1
+        for table_name in table_names:
+            self.__fetch_table_file(table_name)
+        table_mb = sum(os.path.getsize(self.__table_path(table_name)) for table_name in table_names) / 2 ** 20
+        # Inputs and result of a partition are in memory together
+        needed_mb = 2 * table_mb * self.cache_format.memory_expansion
+        return max(1, math.ceil(needed_mb / self.merge_memory_mb))
+
+    def __spill_merge_actors(self, num_partitions):
+        self.logger.write(f"\n2. Merging actors with roles out of core ({num_partitions} partitions)...")
+        # The merge reads the tables from their caches, copies already loaded would count against the budget
+        for table_name in self.ACTOR_TABLES:
+            self.dataframes.pop(table_name, None)
+        roles = (chunk.rename(columns=self.ROLE_RENAMES)
+                 for chunk in self.cache_format.read_chunks(self.__table_path('roles'), self.chunk_size))
+        actors = (chunk.rename(columns=self.ACTOR_RENAMES)
+                  for chunk in self.cache_format.read_chunks(self.__table_path('actors'), self.chunk_size))
+        chunks = (chunk[self.MERGED_ACTOR_COLUMNS]
+                  for chunk in spilled_join(roles, actors, 'actor_id', 'actor_id', num_partitions,
+                                            os.path.join(self.cache_dir, "spill"), self.cache_format,
+                                            self.chunk_size, logger=self.logger))
+
+        # The result goes straight into the stage cache, typed as the cached tables
+        column_types = {}
+        for table_name, renames in (('actors', self.ACTOR_RENAMES), ('roles', self.ROLE_RENAMES)):
+            for column, column_type in self.cache_format.column_types(self.__table_path(table_name)).items():
+                column_types[renames.get(column, column)] = column_type
+        output_path, input_paths, version = self.stages['merged_actors']
+        num_rows = atomic_write(output_path, lambda part_file_path: self.cache_format.write_chunks(
+            chunks, part_file_path, column_types))
+        self.manifest.record('merged_actors', output_path, input_paths, version, num_rows)
+        self.logger.write(f"[x] merged_actors stage saved ({num_rows} rows)")
+        return self.cache_format.read(output_path)
+
+    def __merge_movie_tables(self, tables=None):
+        tables = self.dataframes if tables is None else tables
 
-        movies_with_director_genre.rename(columns={'name': 'movie_name', 'year': 'movie_year', 'rank': 'movie_rank',
-                                                   'genre': 'movie_genre', 'first_name': 'first_name(dir)',
-                                                   'last_name': 'last_name(dir)'}, inplace=True)
+        self.logger.write("1. Merging movies with directors, genre..")
+        movies = tables['movies'].rename(columns={'id': 'movie_id', 'name': 'movie_name', 'year': 'movie_year',
+                                                  'rank': 'movie_rank'})
+        directors = tables['directors'].rename(columns={'id': 'director_id', 'first_name': 'first_name(dir)',
+                                                        'last_name': 'last_name(dir)'})
+        movies_genres = tables['movies_genres'].rename(columns={'genre': 'movie_genre'})
         self.logger.write("[x] renamed columns")
 
-        # Store merged movies data
-        self.merged_movies = movies_with_director_genre
+        merged_movies = run_join_plan(movies, [
+            JoinStep('movies_directors', tables['movies_directors'], 'movie_id', 'movie_id'),
+            JoinStep('directors', directors, 'director_id', 'director_id'),
+            JoinStep('movies_genres', movies_genres, 'movie_id', 'movie_id'),
+        ], logger=self.logger)
 
-    def __merge_actor_tables(self):
-        self.logger.write("\n2. Merging actors with roles...")
-
-        actor_roles = pd.merge(self.dataframes['actors'], self.dataframes['roles'],
-                               left_on='id', right_on='actor_id', how='inner')
-        self.logger.write("[x] actor_roles created")
+        # Store merged movies data
+        self.merged_movies = merged_movies[self.MERGED_MOVIE_COLUMNS]
 
-        actor_roles.drop(columns=['id'], inplace=True)
-        self.logger.write("[x] dropped duplicate columns")
+    def __merge_actor_tables(self, tables=None):
+        tables = self.dataframes if tables is None else tables
 
-        actor_roles.rename(columns={'first_name': 'first_name(act)', 'last_name': 'last_name(act)',
-                                    'gender': 'gender(act)', 'role': 'role(act)'}, inplace=True)
+        self.logger.write("\n2. Merging actors with roles...")
+        actors = tables['actors'].rename(columns=self.ACTOR_RENAMES)
+        roles = tables['roles'].rename(columns=self.ROLE_RENAMES)
         self.logger.write("[x] renamed columns")
 
-        # Store merged actors data
-        self.merged_actors = actor_roles
+        merged_actors = run_join_plan(roles, [JoinStep('actors', actors, 'actor_id', 'actor_id')],
+                                      logger=self.logger)
 
-    def __load_or_clean_df(self):
-        if os.path.isfile(self.csv_file_cleaned_movies):
-            self.merged_movies = pd.read_csv(self.csv_file_cleaned_movies)
-        else:
-            self.__load_or_merge_df()
-            self.__clean_movies_df()
-            self.merged_movies.to_csv(self.csv_file_cleaned_movies, index=False)
-
-        if os.path.isfile(self.csv_file_cleaned_actors):
-            self.merged_actors = pd.read_csv(self.csv_file_cleaned_actors)
-        else:
-            self.__load_or_merge_df()
-            self.__clean_actors_df()
-            self.merged_actors.to_csv(self.csv_file_cleaned_actors, index=False)
+        # Store merged actors data
+        self.merged_actors = merged_actors[self.MERGED_ACTOR_COLUMNS]
+
+    def __load_or_clean_df(self, movie_columns=None, actor_columns=None):
+        self.derived_values = {}
+        self.__load_or_clean_movies(movie_columns)
+        self.__load_or_clean_actors(actor_columns)
+        if 'full_name(dir)' in self.merged_movies and 'full_name(act)' in self.merged_actors:
+            self.merged_movies, self.merged_actors = share_name_dictionary(self.merged_movies, self.merged_actors)
+        # Projected frames are incomplete and must not end up in the snapshot
+        self.snapshot_ready = movie_columns is None and actor_columns is None
+
+    def __load_or_clean_movies(self, columns=None):
+        # CSV caches do not keep dtypes, compacting an already compact frame is cheap
+        self.merged_movies = compact_df(self.__load_or_build_stage('cleaned_movies', self.__build_cleaned_movies,
+                                                                   columns), MOVIE_SCHEMA)
+
+    def __build_cleaned_movies(self):
+        self.__load_or_merge_movies()
+        self.__clean_movies_df()
+        self.__save_stage('cleaned_movies', self.merged_movies)
+        return self.merged_movies
+
+    def __load_or_clean_actors(self, columns=None):
+        self.merged_actors = compact_df(self.__load_or_build_stage('cleaned_actors', self.__build_cleaned_actors,
+                                                                   columns), ACTOR_SCHEMA)
+
+    def __build_cleaned_actors(self):
+        self.__load_or_merge_actors()
+        self.__clean_actors_df()
+        self.__save_stage('cleaned_actors', self.merged_actors)
+        return self.merged_actors
+
+    def __build_partitions(self):
+        self.__load_or_clean_df()
+        output_path, input_paths, version = self.stages['partitions']
+        num_rows = write_partitioned(self.partitions_dir, self.merged_movies, self.merged_actors, self.cache_format,
+                                     self.partition_by, self.partition_by_genre)
+        self.manifest.record('partitions', output_path, input_paths, version, num_rows)
+        self.logger.write(f"[x] partitions stage saved ({num_rows} rows, by {self.partition_by})")
 
     def __clean_movies_df(self):
-        # TODO: Uncomment (4)
         self.logger.write("\nCleaning Merged Movies table...")
 
         # (1) Standardise data
@@ -253,20 +1062,20 @@ class IMDBConnection:
 
         # (3) Drop duplicate columns/rows
         self.logger.write("\n3. Dropping duplicate columns/rows...")
-        self.merged_movies.drop(columns=['first_name(dir)', 'last_name(dir)'], inplace=True)
+        self.merged_movies = self.merged_movies.drop(columns=['first_name(dir)', 'last_name(dir)'])
         self.logger.write("[x] dropped duplicate columns: first_name(dir), last_name(dir)")
-        self.merged_movies.drop_duplicates(inplace=True)
+        self.merged_movies = self.merged_movies.drop_duplicates()
         self.logger.write("[x] dropped duplicate rows")
 
         # (4) Fill in missing data
         self.logger.write("\n4. Fill missing data...")
-        # self.__fill_missing_movie_df()
+        self.__fill_missing_movie_df()
 
         # (5) Handle Outliers
         self.logger.write("\n5. Handle Outliers...")
         # drop rows with missing or out-of-range movie_rank
         query = "not (movie_rank.isna() or movie_rank < 0 or movie_rank > 10)"
-        self.merged_movies.query(query, inplace=True)
+        self.merged_movies = self.merged_movies.query(query)
         self.logger.write("[x] dropped out-of-range movie_rank rows")
 
         # (6) Reorder columns
@@ -276,6 +1085,13 @@ class IMDBConnection:
         self.merged_movies = self.merged_movies[new_order]
         self.logger.write("[x] reordered columns")
 
+        # (7) Compact dtypes
+        self.logger.write("\n7. Compact dtypes...")
+        memory_before = memory_mb(self.merged_movies) if log_enabled(self.logger, DEBUG) else None
+        self.merged_movies = compact_df(self.merged_movies, MOVIE_SCHEMA)
+        self.logger.write("[x] compacted dtypes")
+        log(self.logger, lambda: f"- memory: {memory_before:.1f} MB -> {memory_mb(self.merged_movies):.1f} MB", DEBUG)
+
     def __standardise_movie_df(self):
         int_columns = ['movie_id', 'movie_year', 'director_id']
         float_columns = ['movie_rank']
@@ -286,41 +1102,28 @@ class IMDBConnection:
         self.merged_movies[float_columns] = self.merged_movies[float_columns].astype('float')
         self.logger.write("[x] convert movie_rank to float64")
 
-        self.merged_movies[str_columns] = self.merged_movies[str_columns].astype('string')
-        for col in str_columns:
-            self.merged_movies[col] = self.merged_movies[col].map(str.lower)
-            self.merged_movies[col] = self.merged_movies[col].map(str.strip)
+        self.merged_movies[str_columns] = normalise_strings(self.merged_movies, str_columns, self.workers)
         self.logger.write("[x] convert strings to lowercase, and strip leading/trailing spaces")
 
     def __fill_missing_movie_df(self):
-        self.logger.write("Number of missing values in each column:")
-        self.logger.write(self.merged_movies.isnull().sum())
-
         movie_columns = ['movie_name', 'movie_rank', 'movie_genre', 'movie_year']
         director_columns = ['full_name(dir)']
 
         # movie columns
-        self.merged_movies.sort_values(by=['movie_id', 'movie_rank'], inplace=True)
-        fill_values = {col: self.merged_movies[col].ffill() for col in movie_columns}
-        self.merged_movies[movie_columns] = self.merged_movies.groupby('movie_id')[movie_columns].fillna(
-            value=fill_values)
-        self.logger.write("\n[x] filled in missing movie name, rank, genre and year")
+        self.merged_movies, filled = groupwise_fill(self.merged_movies, 'movie_id', movie_columns)
+        self.__log_filled(filled)
+        self.logger.write("[x] filled in missing movie name, rank, genre and year")
 
         # director columns
-        self.merged_movies.sort_values(by='director_id', inplace=True)
-        fill_values = {col: self.merged_movies[col].ffill() for col in director_columns}
-        self.merged_movies[director_columns] = self.merged_movies.groupby('director_id')[director_columns].fillna(
-            value=fill_values)
-        self.logger.write("[x] filled in missing director first name, and last name")
-
-        self.merged_movies.dropna(inplace=True)
-        self.logger.write("[x] Dropped rows that still contain nan values")
+        self.merged_movies, filled = groupwise_fill(self.merged_movies, 'director_id', director_columns)
+        self.__log_filled(filled)
+        self.logger.write("[x] filled in missing director full name")
 
-        self.logger.write("\nNumber of missing values in each column:")
-        self.logger.write(self.merged_movies.isnull().sum())
+        num_rows = len(self.merged_movies)
+        self.merged_movies = self.merged_movies.dropna()
+        self.logger.write(f"[x] Dropped {num_rows - len(self.merged_movies)} rows that still contain nan values")
 
     def __clean_actors_df(self):
-        # TODO: Uncomment (4)
         self.logger.write("\nCleaning Merged Actors table...")
 
         # (1) Standardise data
@@ -335,14 +1138,14 @@ class IMDBConnection:
 
         # (3) Drop duplicate columns/rows
         self.logger.write("\n3. Dropping duplicate columns/rows...")
-        self.merged_actors.drop(columns=['first_name(act)', 'last_name(act)'], inplace=True)
+        self.merged_actors = self.merged_actors.drop(columns=['first_name(act)', 'last_name(act)'])
         self.logger.write("[x] dropped duplicate columns: first_name(act), last_name(act)")
-        self.merged_actors.drop_duplicates(inplace=True)
+        self.merged_actors = self.merged_actors.drop_duplicates()
         self.logger.write("[x] dropped duplicate rows")
 
         # (4) Fill in missing data
         self.logger.write("\n4. Fill missing data...")
-        # self.__fill_missing_actor_df()
+        self.__fill_missing_actor_df()
 
         # (5) Reorder columns
         self.logger.write("\n5. Reorder Columns...")
@@ -350,6 +1153,13 @@ class IMDBConnection:
         self.merged_actors = self.merged_actors[new_order]
         self.logger.write("[x] reordered columns")
 
+        # (6) Compact dtypes
+        self.logger.write("\n6. Compact dtypes...")
+        memory_before = memory_mb(self.merged_actors) if log_enabled(self.logger, DEBUG) else None
+        self.merged_actors = compact_df(self.merged_actors, ACTOR_SCHEMA)
+        self.logger.write("[x] compacted dtypes")
+        log(self.logger, lambda: f"- memory: {memory_before:.1f} MB -> {memory_mb(self.merged_actors):.1f} MB", DEBUG)
+
     def __standardise_actor_df(self):
         int_columns = ['actor_id']
         str_columns = ['gender(act)', 'role(act)', 'first_name(act)', 'last_name(act)']
@@ -357,36 +1167,38 @@ class IMDBConnection:
         self.merged_actors[int_columns] = self.merged_actors[int_columns].astype('int')
         self.logger.write("[x] convert id to int64")
 
-        self.merged_actors[str_columns] = self.merged_actors[str_columns].astype('string')
-        self.merged_actors[str_columns] = self.merged_actors[str_columns].fillna('')
-        for col in str_columns:
-            self.merged_actors[col] = self.merged_actors[col].map(str.lower)
-            self.merged_actors[col] = self.merged_actors[col].map(str.strip)
+        self.merged_actors[str_columns] = self.merged_actors[str_columns].astype('string').fillna('')
+        self.merged_actors[str_columns] = normalise_strings(self.merged_actors, str_columns, self.workers)
         self.logger.write("[x] convert strings to lowercase, and strip leading/trailing spaces")
 
     def __fill_missing_actor_df(self):
-        self.logger.write("\nNumber of missing values in each column:")
-        self.logger.write(self.merged_actors.isnull().sum())
-
         actor_columns = ['full_name(act)', 'gender(act)', 'role(act)']
 
         # actor columns
-        self.merged_actors.sort_values(by=['actors_id'], inplace=True)
-        fill_values = {col: self.merged_actors[col].ffill() for col in actor_columns}
-        self.merged_actors[actor_columns] = self.merged_actors.groupby('actor_id')[actor_columns].fillna(
-            value=fill_values)
-        self.logger.write("\n[x] filled in missing actor full name, gender and role")
+        self.merged_actors, filled = groupwise_fill(self.merged_actors, 'actor_id', actor_columns)
+        self.__log_filled(filled)
+        self.logger.write("[x] filled in missing actor full name, gender and role")
 
-        self.merged_actors.dropna(inplace=True)
-        self.logger.write("[x] Dropped rows that still contain nan values")
+        num_rows = len(self.merged_actors)
+        self.merged_actors = self.merged_actors.dropna()
+        self.logger.write(f"[x] Dropped {num_rows - len(self.merged_actors)} rows that still contain nan values")
 
-        self.logger.write("\nNumber of missing values in each column:")
-        self.logger.write(self.merged_actors.isnull().sum())
+    def __log_filled(self, filled):
+        for column, num_filled in filled.items():
+            self.logger.write(f"- {column}: {num_filled} cells filled")
 
     def close_con(self):
         """
         Terminates connection to the DB:
         :return: None
         """
-        self.imdb_con.dispose()
+        self.imdb_con.close()
+        self.imdb_con = None
         self.logger.write("\nDB Connection closed!")
+
+
+def _build_stage(settings, stage, log_level=INFO):
+    # Runs in a pipeline worker process, with its own connection and a logger replayed by the parent
+    logger = StageLog(log_level)
+    IMDBConnection(logger=logger, **settings).build_stage(stage)
+    return logger.messages
@@ -0,0 +1,166 @@
+"""
+Builds a local SQLite replica of the seven-table imdb_ijs schema, either copied from another source
+(the IMDB MySQL server, a table cache directory) or filled with synthetic data of a chosen size, so the
+fetch path can be exercised and benchmarked without a network.
+
+Usage:
+    python -m IMDB.data.build_sqlite_replica imdb_ijs.sqlite --synthetic 100000
+    python -m IMDB.data.build_sqlite_replica imdb_ijs.sqlite --copy-from parquet:///path/to/tables
+    python -m IMDB.data.build_sqlite_replica imdb_ijs.sqlite --benchmark
+"""
+import argparse
+import os.path
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from IMDB.data.IMDB_Database_Obj import IMDBConnection
+from IMDB.data.table_sources import SQLiteSource, source_from_uri
+
+IMDB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actors (
+    id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, gender TEXT
+);
+CREATE TABLE IF NOT EXISTS directors (
+    id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT
+);
+CREATE TABLE IF NOT EXISTS directors_genres (
+    director_id INTEGER NOT NULL, genre TEXT NOT NULL, prob REAL, PRIMARY KEY (director_id, genre)
+);
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY, name TEXT, year INTEGER, rank REAL
+);
+CREATE TABLE IF NOT EXISTS movies_directors (
+    director_id INTEGER NOT NULL, movie_id INTEGER NOT NULL, PRIMARY KEY (director_id, movie_id)
+);
+CREATE TABLE IF NOT EXISTS movies_genres (
+    movie_id INTEGER NOT NULL, genre TEXT NOT NULL, PRIMARY KEY (movie_id, genre)
+);
+CREATE TABLE IF NOT EXISTS roles (
+    actor_id INTEGER NOT NULL, movie_id INTEGER NOT NULL, role TEXT NOT NULL, PRIMARY KEY (actor_id, movie_id, role)
+);
+CREATE INDEX IF NOT EXISTS movies_directors_movie_id ON movies_directors (movie_id);
+CREATE INDEX IF NOT EXISTS movies_genres_movie_id ON movies_genres (movie_id);
+CREATE INDEX IF NOT EXISTS roles_movie_id ON roles (movie_id);
+"""
+
+TABLE_NAMES = IMDBConnection.TABLE_NAMES
+GENRES = ['Action', 'Adult', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Family',
+          'Fantasy', 'Film-Noir', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Short',
+          'Thriller', 'War', 'Western']
+INSERT_CHUNK_SIZE = 50_000
+
+
+def create_schema(db_path):
+    with sqlite3.connect(db_path) as con:
+        con.executescript(IMDB_SCHEMA)
+
+
+def write_tables(db_path, tables):
+    """Appends each (table name, data frame) pair to the replica."""
+    with sqlite3.connect(db_path) as con:
+        for table_name, df in tables:
+            df.to_sql(table_name, con, if_exists='append', index=False, chunksize=INSERT_CHUNK_SIZE)
+
+
+def copy_tables(source, db_path, chunk_size=INSERT_CHUNK_SIZE):
+    """Copies the seven tables from a source adapter into the replica, one chunk at a time."""
+    create_schema(db_path)
+    for table_name in TABLE_NAMES:
+        write_tables(db_path, ((table_name, chunk) for chunk in source.read_table_chunks(table_name, chunk_size)))
+        print(f"[x] copied {table_name}")
+
+
+def synthetic_tables(num_movies, seed=0):
+    """Synthetic imdb_ijs-shaped tables: ~3 actors per movie, ~8 roles per movie, 1-3 genres per movie."""
+    rng = np.random.default_rng(seed)
+    num_actors = num_movies * 3
+    num_directors = max(1, num_movies // 10)
+
+    movie_ids = np.arange(num_movies)
+    ranks = np.round(rng.uniform(1.0, 10.0, num_movies), 1)
+    ranks[rng.random(num_movies) < 0.3] = np.nan
+    movies = pd.DataFrame({'id': movie_ids, 'name': [f"Movie {i}" for i in movie_ids],
+                           'year': rng.integers(1900, 2005, num_movies), 'rank': ranks})
+
+    actor_ids = np.arange(num_actors)
+    actors = pd.DataFrame({'id': actor_ids, 'first_name': [f"First{i % 5000}" for i in actor_ids],
+                           'last_name': [f"Last{i}" for i in actor_ids],
+                           'gender': rng.choice(['M', 'F'], num_actors)})
+
+    director_ids = np.arange(num_directors)
+    directors = pd.DataFrame({'id': director_ids, 'first_name': [f"First{i % 5000}" for i in director_ids],
+                              'last_name': [f"Director{i}" for i in director_ids]})
+
+    directors_genres = pd.DataFrame({'director_id': np.repeat(director_ids, 2),
+                                     'genre': rng.choice(GENRES, num_directors * 2),
+                                     'prob': np.round(rng.random(num_directors * 2), 3)})
+    directors_genres = directors_genres.drop_duplicates(subset=['director_id', 'genre'])
+
+    movies_directors = pd.DataFrame({'director_id': rng.integers(0, num_directors, num_movies),
+                                     'movie_id': movie_ids})
+
+    genres_per_movie = rng.integers(1, 4, num_movies)
+    movies_genres = pd.DataFrame({'movie_id': np.repeat(movie_ids, genres_per_movie),
+                                  'genre': rng.choice(GENRES, genres_per_movie.sum())})
+    movies_genres = movies_genres.drop_duplicates()
+
+    cast_sizes = rng.poisson(8, num_movies)
+    roles = pd.DataFrame({'actor_id': rng.integers(0, num_actors, cast_sizes.sum()),
+                          'movie_id': np.repeat(movie_ids, cast_sizes)})
+    roles = roles.drop_duplicates()
+    roles['role'] = [f"Role {i % 1000}" for i in range(len(roles))]
+
+    return {'actors': actors, 'directors': directors, 'directors_genres': directors_genres, 'movies': movies,
+            'movies_directors': movies_directors, 'movies_genres': movies_genres, 'roles': roles}
+
+
+def benchmark_source(source, chunk_size=100_000):
+    """Times a bulk and a chunked read of every table. Returns {table: (rows, bulk seconds, chunked seconds)}."""
+    results = {}
+    for table_name in TABLE_NAMES:
+        start = time.perf_counter()
+        num_rows = len(source.read_table(table_name))
+        bulk_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in source.read_table_chunks(table_name, chunk_size):
+            pass
+        chunked_seconds = time.perf_counter() - start
+
+        results[table_name] = (num_rows, bulk_seconds, chunked_seconds)
+        print(f"{table_name:<18}{num_rows:>12} rows   bulk {bulk_seconds:8.3f}s   chunked {chunked_seconds:8.3f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an SQLite replica of the imdb_ijs database.")
+    parser.add_argument('db_path', help="SQLite file to create")
+    parser.add_argument('--synthetic', type=int, metavar='NUM_MOVIES', help="fill with synthetic data")
+    parser.add_argument('--copy-from', metavar='URI', help="copy the tables from a data source URI")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for synthetic data")
+    parser.add_argument('--benchmark', action='store_true', help="time table reads from the replica")
+    args = parser.parse_args()
+
+    if (args.synthetic or args.copy_from) and os.path.isfile(args.db_path):
+        parser.error(f"{args.db_path} already exists")
+
+    if args.synthetic:
+        create_schema(args.db_path)
+        write_tables(args.db_path, synthetic_tables(args.synthetic, args.seed).items())
+        print(f"[x] wrote synthetic imdb_ijs replica with {args.synthetic} movies to {args.db_path}")
+    elif args.copy_from:
+        source = source_from_uri(args.copy_from)
+        copy_tables(source, args.db_path)
+        source.close()
+
+    if args.benchmark:
+        source = SQLiteSource(args.db_path)
+        benchmark_source(source)
+        source.close()
+
+
+if __name__ == '__main__':
+    main()
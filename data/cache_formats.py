@@ -0,0 +1,206 @@
+import importlib.util
+
+import pandas as pd
+
+
+class CSVFormat:
+    """Plain text cache. Dtypes are re-inferred on every read."""
+    name = 'csv'
+    extension = 'csv'
+    # Rough size in memory of a data frame relative to its cache file
+    memory_expansion = 2
+
+    def read(self, file_path, columns=None):
+        return pd.read_csv(file_path, usecols=columns)
+
+    def read_chunks(self, file_path, chunk_size, columns=None):
+        """Yields the rows of the file as data frames of at most chunk_size rows."""
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+
+    def write(self, df, file_path):
+        df.to_csv(file_path, index=False)
+
+    def write_chunks(self, chunks, file_path, column_types=None):
+        """Appends each chunk to the file as it arrives. Returns the number of rows written."""
+        num_rows = 0
+        for chunk_num, chunk in enumerate(chunks, start=1):
+            first_chunk = chunk_num == 1
+            chunk.to_csv(file_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+            num_rows += len(chunk)
+        return num_rows
+
+    def column_types(self, file_path):
+        # Types are not stored in CSV files
+        return {}
+
+
+class ParquetFormat:
+    """Columnar, compressed cache that keeps the pandas dtypes (requires pyarrow)."""
+    name = 'parquet'
+    extension = 'parquet'
+    memory_expansion = 8
+    compression = 'zstd'
+
+    def read(self, file_path, columns=None):
+        return pd.read_parquet(file_path, columns=columns)
+
+    def read_chunks(self, file_path, chunk_size, columns=None):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+
+    def write(self, df, file_path):
+        df.to_parquet(file_path, index=False, compression=self.compression)
+
+    def write_chunks(self, chunks, file_path, column_types=None):
+        """
+        Writes the chunks as they arrive, as one file. Returns the number of rows written.
+        :param column_types: {column: 'int', 'float' or 'string'} of the source, the types of the other columns
+            are inferred from the first chunks.
+        """
+        import pyarrow.parquet as pq
+
+        return _write_arrow_chunks(chunks, column_types,
+                                   lambda schema: pq.ParquetWriter(file_path, schema, compression=self.compression))
+
+    def column_types(self, file_path):
+        """{column: 'int', 'float' or 'string'} of the file."""
+        import pyarrow.parquet as pq
+
+        return schema_column_types(pq.read_schema(file_path))
+
+
+class ArrowIPCFormat:
+    """Arrow IPC (Feather v2) cache: uncompressed-speed reads with lz4 compression (requires pyarrow)."""
+    name = 'arrow'
+    extension = 'arrow'
+    memory_expansion = 4
+    compression = 'lz4'
+
+    def read(self, file_path, columns=None):
+        return pd.read_feather(file_path, columns=columns)
+
+    def read_chunks(self, file_path, chunk_size, columns=None):
+        import pyarrow as pa
+
+        with pa.memory_map(file_path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for batch_num in range(reader.num_record_batches):
+                batch = reader.get_batch(batch_num)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(offset, chunk_size).to_pandas()
+
+    def write(self, df, file_path):
+        df.reset_index(drop=True).to_feather(file_path, compression=self.compression)
+
+    def write_chunks(self, chunks, file_path, column_types=None):
+        """Writes the chunks as they arrive, as one file. Returns the number of rows written, see ParquetFormat."""
+        import pyarrow as pa
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return _write_arrow_chunks(chunks, column_types,
+                                   lambda schema: pa.ipc.new_file(file_path, schema, options=options))
+
+    def column_types(self, file_path):
+        import pyarrow as pa
+
+        with pa.memory_map(file_path, 'r') as source:
+            return schema_column_types(pa.ipc.open_file(source).schema)
+
+
+CACHE_FORMATS = {cache_format.name: cache_format for cache_format in (CSVFormat(), ParquetFormat(), ArrowIPCFormat())}
+
+
+def get_cache_format(name=None):
+    """
+    Returns the cache format registered under name.
+    Defaults to parquet when pyarrow is installed, else csv.
+    """
+    if name is None:
+        name = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'csv'
+    if name not in CACHE_FORMATS:
+        raise ValueError(f"Unknown cache format: {name} (expected one of {', '.join(CACHE_FORMATS)})")
+    return CACHE_FORMATS[name]
+
+
+def _arrow_types():
+    import pyarrow as pa
+
+    return {'int': pa.int64(), 'float': pa.float64(), 'string': pa.string()}
+
+
+def schema_column_types(schema):
+    """{column: 'int', 'float' or 'string'} of the integer, floating point and string fields of a pyarrow schema."""
+    import pyarrow as pa
+
+    column_types = {}
+    for field in schema:
+        if pa.types.is_integer(field.type):
+            column_types[field.name] = 'int'
+        elif pa.types.is_floating(field.type) or pa.types.is_decimal(field.type):
+            column_types[field.name] = 'float'
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            column_types[field.name] = 'string'
+    return column_types
+
+
+def _chunk_schema(chunks, column_types):
+    """
+    Schema of the chunks: the given column types, else the types inferred from the chunks, promoted so that
+    a column all null in some of them takes its type from the others and ints with nulls become floats.
+    """
+    import pyarrow as pa
+
+    schemas = [pa.Schema.from_pandas(chunk, preserve_index=False) for chunk in chunks]
+    arrow_types = _arrow_types()
+    fields = [field.with_type(arrow_types[column_types[field.name]]) if field.name in column_types else field
+              for field in pa.unify_schemas(schemas, promote_options='permissive')]
+    if [field.type for field in fields] == schemas[0].types:
+        return schemas[0]
+    # The pandas metadata of the first chunk describes dtypes the columns no longer have
+    return pa.schema(fields)
+
+
+def _write_arrow_chunks(chunks, column_types, open_writer):
+    """
+    Writes the chunks with the writer open_writer(schema) creates. Chunks are held back while a column of
+    unknown type has only been null so far, the schema is fixed by the first chunks that give every type.
+    """
+    import pyarrow as pa
+
+    column_types = column_types or {}
+    writer = None
+    pending = []
+    num_rows = 0
+
+    def write(chunks_to_write, schema):
+        nonlocal num_rows
+        for chunk in chunks_to_write:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            num_rows += len(chunk)
+
+    try:
+        for chunk in chunks:
+            if writer is not None:
+                write([chunk], schema)
+                continue
+            pending.append(chunk)
+            schema = _chunk_schema(pending, column_types)
+            if not any(pa.types.is_null(field.type) for field in schema):
+                writer = open_writer(schema)
+                write(pending, schema)
+                pending = []
+
+        if pending:
+            # Columns null in the whole table are written as strings
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                for field in schema])
+            writer = open_writer(schema)
+            write(pending, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return num_rows
@@ -0,0 +1,77 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a lock file, held for the duration of a with block.
+    on_wait is called once if the lock is held by someone else and we have to wait for it.
+    """
+
+    def __init__(self, lock_path, on_wait=None):
+        self.lock_path = lock_path
+        self.on_wait = on_wait
+        self.lock_file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        self.lock_file = open(self.lock_path, 'a+')
+        if not self._try_lock():
+            if self.on_wait is not None:
+                self.on_wait()
+            self._lock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.lock_file.seek(0)
+            msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.lock_file.close()
+        self.lock_file = None
+
+    def _try_lock(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _lock(self):
+        if fcntl is not None:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+            return
+        # msvcrt.LK_LOCK gives up after 10 seconds
+        while True:
+            try:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass
+
+
+def atomic_write(file_path, write):
+    """
+    Calls write(path) on a private temporary path next to file_path, then renames it into place,
+    so that readers only ever see a missing or a complete file. Returns the result of write.
+    """
+    part_path = f"{file_path}.{os.getpid()}-{threading.get_ident()}.part"
+    try:
+        result = write(part_path)
+        os.replace(part_path, file_path)
+        return result
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
@@ -0,0 +1,58 @@
+"""
+Compact dtype schema for the cleaned data frames: downcast ids and years, categoricals for low-cardinality
+strings, and a single dictionary shared by the director and actor full-name columns.
+"""
+import pandas as pd
+
+# integer: smallest integer type holding the values, float: float32 when lossless,
+# category: always categorical, string: categorical when values repeat enough, else string
+MOVIE_SCHEMA = {'movie_id': 'integer', 'movie_rank': 'float', 'movie_name': 'string', 'movie_year': 'integer',
+                'movie_genre': 'category', 'director_id': 'integer', 'full_name(dir)': 'string'}
+ACTOR_SCHEMA = {'actor_id': 'integer', 'full_name(act)': 'string', 'gender(act)': 'category',
+                'role(act)': 'string', 'movie_id': 'integer'}
+
+# Strings with fewer distinct values than this fraction of the rows are dictionary encoded
+CATEGORY_RATIO = 0.5
+
+
+def compact_df(df, schema):
+    """Returns df with every column of the schema converted to its compact dtype."""
+    return df.assign(**{column: _compact_column(df[column], kind)
+                        for column, kind in schema.items() if column in df})
+
+
+def share_name_dictionary(movies_df, actors_df):
+    """
+    Re-encodes full_name(dir) and full_name(act) with one shared dictionary, so a person who both directs
+    and acts is stored once. Returns the two data frames.
+    """
+    director_names, actor_names = movies_df['full_name(dir)'], actors_df['full_name(act)']
+    if not (isinstance(director_names.dtype, pd.CategoricalDtype)
+            and isinstance(actor_names.dtype, pd.CategoricalDtype)):
+        return movies_df, actors_df
+
+    names_dtype = pd.CategoricalDtype(director_names.cat.categories.union(actor_names.cat.categories))
+    return (movies_df.assign(**{'full_name(dir)': director_names.astype(names_dtype)}),
+            actors_df.assign(**{'full_name(act)': actor_names.astype(names_dtype)}))
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def _compact_column(column, kind):
+    if kind == 'integer':
+        if column.isna().any():
+            return column
+        return pd.to_numeric(column, downcast='integer')
+    if kind == 'float':
+        downcast = column.astype('float32')
+        lossless = (downcast.astype('float64') == column) | column.isna()
+        return downcast if lossless.all() else column
+    if kind == 'category':
+        return column.astype('category')
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    if len(column) and column.nunique() < CATEGORY_RATIO * len(column):
+        return column.astype('category')
+    return column
@@ -0,0 +1,77 @@
+"""
+Immutable, numbered versions of the cleaned data an IMDBConnection serves. A load, clean or refresh builds
+the next version aside and publishes it by replacing the connection's version, a single assignment, so a
+reader that took a version (e.g. an analysis running while a refresh completes) keeps a consistent pair of
+data frames until it is done. Values derived from the data are cached on the version they were derived from.
+The frames of a version are never modified in place (copy-on-write keeps changes made through them private).
+"""
+import itertools
+
+from IMDB.data.star_schema import ACTOR_COLUMNS, MOVIE_COLUMNS
+
+# Version numbers, unique within the process
+_version_numbers = itertools.count(1)
+
+
+class DatasetVersion:
+    """merged_movies and merged_actors, or the star schema they are rebuilt from, of one version."""
+
+    def __init__(self, merged_movies, merged_actors, dataset=None, derived_values=None, logger=None):
+        """
+        :param dataset: StarSchema the wide frames are rebuilt from on every use, if they are not given.
+        :param derived_values: Values already derived from this data, e.g. loaded from a snapshot.
+        :param logger: Logger of the rebuilds of the wide frames.
+        """
+        self.number = next(_version_numbers)
+        self.dataset = dataset
+        self.derived_values = dict(derived_values or {})
+        self.logger = logger
+        self.__merged_movies = merged_movies
+        self.__merged_actors = merged_actors
+
+    @property
+    def merged_movies(self):
+        # Not kept on the version, which would hold the wide frame next to the star schema for its lifetime.
+        # Readers take the frame once and drop it when done.
+        if self.__merged_movies is None and self.dataset is not None:
+            return self.dataset.wide_movies(self.logger)
+        return self.__merged_movies
+
+    @property
+    def merged_actors(self):
+        if self.__merged_actors is None and self.dataset is not None:
+            return self.dataset.wide_actors(self.logger)
+        return self.__merged_actors
+
+    def unique_movies(self):
+        """
+        Returns one row per movie (movie_id, movie_rank, movie_name, movie_year), without the director and
+        genre fan-out of merged_movies: the star schema's movie dimension if there is one. Directors and
+        genres are in the bridge tables, see movie_genres.
+        """
+        if self.dataset is not None:
+            return self.dataset.movies
+        return self.merged_movies.drop_duplicates(subset=['movie_id'])[MOVIE_COLUMNS]
+
+    def actors(self):
+        """Returns one row per actor (actor_id, full_name(act), gender(act)), without their roles."""
+        if self.dataset is not None:
+            return self.dataset.actors
+        return self.merged_actors.drop_duplicates(subset=['actor_id'])[ACTOR_COLUMNS]
+
+    def movie_genres(self):
+        """Returns one row per movie and genre (movie_id, movie_genre)."""
+        if self.dataset is not None:
+            return self.dataset.movie_genres
+        return self.merged_movies[['movie_id', 'movie_genre']].drop_duplicates()
+
+    def derived(self, name, compute, *args):
+        """
+        Returns a value derived from this version's data (e.g. a sorted list of names), computing it with
+        compute(*args) only if it is not already cached. Pass a compute that reads merged_movies or
+        merged_actors itself, rather than the frames as args, so a cached value does not rebuild them.
+        """
+        if name not in self.derived_values:
+            # Readers on other threads may compute it too, the first value stored is kept
+            self.derived_values.setdefault(name, compute(*args))
+        return self.derived_values[name]
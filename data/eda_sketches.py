@@ -0,0 +1,169 @@
+"""
+Single-pass, mergeable sketches for exploratory data analysis of tables too large to profile exactly:
+per column a HyperLogLog distinct count, Misra-Gries heavy hitters (approximate top values), the null
+count and a numeric summary. Profiles are updated one chunk at a time and profiles of different chunks
+or processes can be merged, so a table is profiled without holding it, or its distinct values, in memory.
+"""
+import numpy as np
+import pandas as pd
+
+# 2 ** HLL_PRECISION registers, a relative error of about 1.04 / sqrt(2 ** HLL_PRECISION) = 1.6%
+HLL_PRECISION = 12
+TOP_K = 5
+# Heavy-hitter counters kept per column, more counters give more accurate top-k counts
+TOP_K_CAPACITY = 20 * TOP_K
+
+
+class HyperLogLog:
+    """Approximate distinct count of the values added to it."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        hashes = pd.util.hash_array(values)
+        value_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(value_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << value_bits) - 1)
+        # Position of the first set bit of the remaining bits, frexp's exponent is the bit length
+        bit_lengths = np.frexp(rest.astype(np.float64))[1]
+        ranks = (value_bits - bit_lengths + 1).astype(np.uint8)
+        np.maximum.at(self.registers, indexes, ranks)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        num_registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / num_registers)
+        estimate = alpha * num_registers ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty_registers = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * num_registers and empty_registers:
+            # Small range correction: linear counting
+            estimate = num_registers * np.log(num_registers / empty_registers)
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    """Misra-Gries summary: every value seen more than rows / capacity times is kept, with a lower-bound count."""
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+
+    def add(self, values):
+        counts = values.value_counts(sort=False)
+        # Categoricals also count their unused categories
+        self.__add_counts(counts[counts > 0])
+
+    def merge(self, other):
+        self.__add_counts(other.counts)
+
+    def top(self, k=TOP_K):
+        return self.counts.nlargest(k)
+
+    def __add_counts(self, counts):
+        counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+        if len(counts) > self.capacity:
+            # Decrement all counters by the (capacity + 1)-th largest count, dropping those that reach 0
+            counts = counts - counts.nlargest(self.capacity + 1).iloc[-1]
+            counts = counts[counts > 0]
+        self.counts = counts
+
+
+class ColumnProfile:
+    """Sketches of one column: rows, nulls, distinct values, top values and, if numeric, a summary."""
+
+    def __init__(self, dtype):
+        self.dtype = str(dtype)
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.heavy_hitters = HeavyHitters()
+        # Count, mean and sum of squared deviations (merged with Chan et al.'s parallel formula), min and max
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = None, None
+
+    def update(self, column):
+        self.rows += len(column)
+        values = column.dropna()
+        self.nulls += len(column) - len(values)
+        if values.empty:
+            return
+        self.distinct.add(values.to_numpy())
+        self.heavy_hitters.add(values)
+        if self.numeric:
+            numbers = values.to_numpy(np.float64)
+            self.__merge_moments(len(numbers), numbers.mean(), ((numbers - numbers.mean()) ** 2).sum(),
+                                 numbers.min(), numbers.max())
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        if self.numeric and other.count:
+            self.__merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+
+    def summary(self):
+        summary = {'dtype': self.dtype, 'nulls': self.nulls, '~distinct': self.distinct.estimate(),
+                   '~top': ", ".join(f"{value} ({count})" for value, count in self.heavy_hitters.top().items())}
+        if self.numeric and self.count:
+            std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+            summary.update({'min': self.min, 'max': self.max, 'mean': round(self.mean, 3), 'std': round(std, 3)})
+        return summary
+
+    def __merge_moments(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = minimum if self.min is None else min(self.min, minimum)
+        self.max = maximum if self.max is None else max(self.max, maximum)
+
+
+class TableProfile:
+    """Column profiles of a table, built from its chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for column_name in chunk.columns:
+            if column_name not in self.columns:
+                self.columns[column_name] = ColumnProfile(chunk[column_name].dtype)
+            self.columns[column_name].update(chunk[column_name])
+
+    def merge(self, other):
+        self.rows += other.rows
+        for column_name, column in other.columns.items():
+            if column_name in self.columns:
+                self.columns[column_name].merge(column)
+            else:
+                self.columns[column_name] = column
+
+    def summary(self):
+        """Data frame of the column summaries, one row per column."""
+        return pd.DataFrame.from_dict({column_name: column.summary()
+                                       for column_name, column in self.columns.items()}, orient='index')
+
+
+def profile_chunks(chunks):
+    profile = TableProfile()
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def profile_frame(df, chunk_size):
+    return profile_chunks(df.iloc[offset:offset + chunk_size] for offset in range(0, len(df), chunk_size))
+
+
+def profile_file(cache_format, file_path, chunk_size):
+    """Profiles a cached table one chunk at a time (picklable, for worker processes)."""
+    return profile_chunks(cache_format.read_chunks(file_path, chunk_size))
@@ -0,0 +1,22 @@
+"""
+Groupwise imputation for the clean stage: missing values are filled from other rows of the same group
+(the same movie, director or actor), never from an unrelated row.
+"""
+
+
+def groupwise_fill(df, key, columns):
+    """
+    Forward then backward fills the columns within each group of key, keeping the row order of df, so
+    a value missing in one row of a group is taken from the nearest row of that group that has it.
+    :return: (filled data frame, {column: number of cells filled})
+    """
+    missing_before = df[columns].isna().sum()
+    # Complete columns need no work
+    missing_columns = missing_before.index[missing_before > 0].tolist()
+    if missing_columns:
+        groups = df.groupby(key, sort=False)[missing_columns]
+        filled = groups.ffill().fillna(groups.bfill())
+        df = df.assign(**{column: filled[column] for column in missing_columns})
+
+    filled_counts = (missing_before - df[columns].isna().sum()).to_dict()
+    return df, filled_counts
@@ -0,0 +1,158 @@
+"""
+Year-partitioned (optionally also genre-partitioned) on-disk layout of the cleaned data frames, with a
+zone map holding per-partition row counts, min/max statistics and genres. Readers use the zone map to
+load only the partitions a year or genre query can touch.
+
+Layout:
+    <directory>/zone_map.json
+    <directory>/<generation>/movies/part-00000.<ext>
+    <directory>/<generation>/actors/part-00000.<ext>
+Each write goes to a new generation folder and the zone map is swapped in last, so readers never see
+a half-written layout. Readers take no lock: the generation the zone map pointed to before a write is only
+removed by the write after it, so a read that started before a swap can still finish on the old files.
+"""
+import json
+import os.path
+import shutil
+import uuid
+
+import pandas as pd
+
+from IMDB.data.cache_locking import atomic_write
+
+PARTITION_SCHEMES = {
+    'decade': lambda years: years // 10 * 10,
+    'year': lambda years: years,
+}
+STAT_COLUMNS = ['movie_year', 'movie_rank', 'movie_id', 'director_id', 'actor_id']
+
+
+def write_partitioned(directory, movies_df, actors_df, cache_format, partition_by='decade', by_genre=False):
+    """
+    Writes movies partitioned by movie_year (and movie_genre if by_genre) and actors partitioned by the
+    year of the movie they acted in. Returns the total number of rows written.
+    """
+    partition_key = PARTITION_SCHEMES[partition_by]
+    # Keep the generation readers may be using, older ones are no longer referenced
+    zone_map_path = os.path.join(directory, 'zone_map.json')
+    if os.path.isfile(zone_map_path):
+        _remove_old_generations(directory, load_zone_map(directory)['generation'])
+    generation = uuid.uuid4().hex
+    root = os.path.join(directory, generation)
+
+    movie_years = movies_df.drop_duplicates(subset=['movie_id']).set_index('movie_id')['movie_year']
+    actor_years = actors_df['movie_id'].map(movie_years)
+
+    movie_keys = [partition_key(movies_df['movie_year'])] + ([movies_df['movie_genre']] if by_genre else [])
+    zone_map = {
+        'generation': generation,
+        'partition_by': partition_by,
+        'by_genre': by_genre,
+        'extension': cache_format.extension,
+        'datasets': {
+            'movies': _write_dataset(root, 'movies', movies_df, movie_keys, None, cache_format),
+            'actors': _write_dataset(root, 'actors', actors_df, [partition_key(actor_years)], actor_years,
+                                     cache_format),
+        },
+    }
+
+    atomic_write(zone_map_path, lambda path: _dump_json(zone_map, path))
+    return len(movies_df) + len(actors_df)
+
+
+def read_partitioned(directory, cache_format, year_range=None, genres=None, movie_columns=None,
+                     actor_columns=None):
+    """
+    Returns (movies_df, actors_df) restricted to movies released in year_range (inclusive) and of the
+    given genres, reading only the partitions whose zone map overlaps the query.
+    """
+    zone_map = load_zone_map(directory)
+    root = os.path.join(directory, zone_map['generation'])
+
+    movie_parts = [part for part in zone_map['datasets']['movies']['partitions']
+                   if _may_contain(part, year_range, genres)]
+    movies_df = _read_parts(root, 'movies', movie_parts, zone_map, cache_format)
+    if year_range is not None:
+        movies_df = movies_df[movies_df['movie_year'].between(*year_range)]
+    if genres is not None:
+        movies_df = movies_df[movies_df['movie_genre'].isin(genres)]
+
+    # Actor partitions carry no genres, the exact filter is on the selected movies
+    actor_parts = [part for part in zone_map['datasets']['actors']['partitions']
+                   if _may_contain(part, year_range, None)]
+    actors_df = _read_parts(root, 'actors', actor_parts, zone_map, cache_format)
+    if year_range is not None or genres is not None:
+        actors_df = actors_df[actors_df['movie_id'].isin(movies_df['movie_id'])]
+
+    movies_df = movies_df.reset_index(drop=True)
+    actors_df = actors_df.reset_index(drop=True)
+    if movie_columns is not None:
+        movies_df = movies_df[movie_columns]
+    if actor_columns is not None:
+        actors_df = actors_df[actor_columns]
+    return movies_df, actors_df
+
+
+def load_zone_map(directory):
+    with open(os.path.join(directory, 'zone_map.json')) as zone_map_file:
+        return json.load(zone_map_file)
+
+
+def _write_dataset(root, name, df, keys, years, cache_format):
+    os.makedirs(os.path.join(root, name))
+    partitions = []
+    for part_num, (_, part_df) in enumerate(df.groupby(keys, sort=True, dropna=False, observed=True)):
+        file_name = f"part-{part_num:05d}.{cache_format.extension}"
+        cache_format.write(part_df.reset_index(drop=True), os.path.join(root, name, file_name))
+        part_years = part_df['movie_year'] if years is None else years.loc[part_df.index]
+        partitions.append(_zone(file_name, part_df, part_years))
+    return {'columns': list(df.columns), 'partitions': partitions}
+
+
+def _zone(file_name, part_df, part_years):
+    zone = {'file': file_name, 'rows': len(part_df), 'min': {}, 'max': {}}
+    for column in STAT_COLUMNS:
+        values = part_years if column == 'movie_year' else part_df.get(column)
+        if values is None or values.isna().all():
+            continue
+        zone['min'][column] = _to_python(values.min())
+        zone['max'][column] = _to_python(values.max())
+    if 'movie_genre' in part_df:
+        zone['genres'] = sorted(part_df['movie_genre'].dropna().unique().tolist())
+    return zone
+
+
+def _to_python(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _may_contain(zone, year_range, genres):
+    if year_range is not None:
+        if 'movie_year' not in zone['min']:
+            return False
+        if zone['max']['movie_year'] < year_range[0] or zone['min']['movie_year'] > year_range[1]:
+            return False
+    if genres is not None and 'genres' in zone and not set(zone['genres']) & set(genres):
+        return False
+    return True
+
+
+def _read_parts(root, name, parts, zone_map, cache_format):
+    frames = [cache_format.read(os.path.join(root, name, part['file'])) for part in parts]
+    if not frames:
+        return pd.DataFrame(columns=zone_map['datasets'][name]['columns'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _dump_json(value, file_path):
+    with open(file_path, 'w') as json_file:
+        json.dump(value, json_file, indent=2)
+
+
+def _remove_old_generations(directory, generation):
+    if not os.path.isdir(directory):
+        return
+    for entry in os.listdir(directory):
+        entry_path = os.path.join(directory, entry)
+        if entry != generation and os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
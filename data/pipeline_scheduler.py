@@ -0,0 +1,121 @@
+"""
+Scheduler for a pipeline described as a dependency graph of stages. Stages whose dependencies are done run
+concurrently in worker processes, so independent branches overlap and the wall-clock time approaches the
+length of the critical path (the slowest chain of dependent stages), which is reported after the run.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from IMDB.visualisation.log_levels import INFO
+
+# function(*args) runs the stage in a worker process and returns the messages it logged
+PipelineStage = namedtuple('PipelineStage', ['name', 'dependencies', 'function', 'args'])
+
+
+class StageLog:
+    """
+    Logger of a stage run in a worker process, its messages are written to the real logger afterwards.
+    It takes the log level of the real logger, so the worker skips the payloads the real logger would not show.
+    """
+
+    def __init__(self, log_level=INFO):
+        self.log_level = log_level
+        self.messages = []
+
+    def write(self, text):
+        self.messages.append(str(text))
+
+
+def required_stages(stages, targets):
+    """Names of the targets and of all the stages they depend on, in dependency order."""
+    ordered = []
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        if name in ordered:
+            return
+        if name not in stages:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        for dependency in stages[name].dependencies:
+            visit(dependency, path + [name])
+        ordered.append(name)
+
+    for target in targets:
+        visit(target, [])
+    return ordered
+
+
+def run_stages(stages, targets, workers=2, logger=None):
+    """
+    Runs the targets and their dependencies, each stage as soon as its dependencies are done, with up to
+    workers stages at a time.
+    :param stages: {name: PipelineStage}
+    :return: {stage name: seconds it took}
+    """
+    selected = required_stages(stages, targets)
+    durations = {}
+    start = time.perf_counter()
+
+    if workers <= 1:
+        for name in selected:
+            durations[name] = _run_stage(stages[name], logger)
+    else:
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while len(durations) < len(selected):
+                for name in selected:
+                    ready = all(dependency in durations for dependency in stages[name].dependencies)
+                    if ready and name not in durations and name not in running.values():
+                        running[executor.submit(_timed, stages[name].function, stages[name].args)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    messages, durations[name] = future.result()
+                    _replay(logger, name, messages, durations[name])
+
+    if logger is not None:
+        path, length = critical_path(stages, durations)
+        logger.write(f"\nPipeline finished in {time.perf_counter() - start:.2f}s")
+        logger.write(f"Critical path ({length:.2f}s): {' -> '.join(path)}")
+    return durations
+
+
+def critical_path(stages, durations):
+    """(stage names, seconds) of the longest chain of dependent stages, by the durations of the run."""
+    finish, previous = {}, {}
+    for name in durations:
+        dependencies = [dependency for dependency in stages[name].dependencies if dependency in finish]
+        slowest = max(dependencies, key=finish.get, default=None)
+        finish[name] = durations[name] + (finish[slowest] if slowest is not None else 0)
+        previous[name] = slowest
+
+    name = max(finish, key=finish.get, default=None)
+    length = finish.get(name, 0)
+    path = []
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], length
+
+
+def _timed(function, args):
+    start = time.perf_counter()
+    messages = function(*args)
+    return messages, time.perf_counter() - start
+
+
+def _run_stage(stage, logger):
+    messages, seconds = _timed(stage.function, stage.args)
+    _replay(logger, stage.name, messages, seconds)
+    return seconds
+
+
+def _replay(logger, name, messages, seconds):
+    if logger is None:
+        return
+    for message in messages:
+        logger.write(message)
+    logger.write(f"[x] stage {name} done ({seconds:.2f}s)")
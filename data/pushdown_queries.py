@@ -0,0 +1,71 @@
+"""
+SQL that builds merged_movies and merged_actors inside the database, with only the columns the cleaning
+stage needs and optional year and genre filters, instead of fetching every table with SELECT *.
+The result columns match the output of IMDBConnection's merge stage.
+"""
+
+# (table, column) each result column of the queries is selected from
+MERGED_MOVIE_SOURCES = {'movie_name': ('movies', 'name'), 'movie_year': ('movies', 'year'),
+                        'movie_rank': ('movies', 'rank'), 'director_id': ('movies_directors', 'director_id'),
+                        'movie_id': ('movies_directors', 'movie_id'), 'first_name(dir)': ('directors', 'first_name'),
+                        'last_name(dir)': ('directors', 'last_name'), 'movie_genre': ('movies_genres', 'genre')}
+MERGED_ACTOR_SOURCES = {'first_name(act)': ('actors', 'first_name'), 'last_name(act)': ('actors', 'last_name'),
+                        'gender(act)': ('actors', 'gender'), 'actor_id': ('roles', 'actor_id'),
+                        'movie_id': ('roles', 'movie_id'), 'role(act)': ('roles', 'role')}
+
+
+def merged_movies_query(year_range=None, genres=None):
+    """
+    Returns (sql, params) for movies joined with their directors and genres.
+    :param year_range: Optional (first year, last year), inclusive.
+    :param genres: Optional list of genres, spelled as in the database (e.g. 'Drama').
+    """
+    where, params = _movie_filters(year_range, genres)
+    sql = ("SELECT m.name AS movie_name, m.year AS movie_year, m.`rank` AS movie_rank, "
+           "md.director_id, md.movie_id, d.first_name AS `first_name(dir)`, d.last_name AS `last_name(dir)`, "
+           "mg.genre AS movie_genre "
+           "FROM movies m "
+           "JOIN movies_directors md ON md.movie_id = m.id "
+           "JOIN directors d ON d.id = md.director_id "
+           "JOIN movies_genres mg ON mg.movie_id = m.id"
+           f"{where}")
+    return sql, params
+
+
+def merged_actors_query(year_range=None, genres=None):
+    """Returns (sql, params) for actors joined with their roles in the movies selected by the same filters."""
+    where, params = _movie_filters(year_range, genres)
+    sql = ("SELECT a.first_name AS `first_name(act)`, a.last_name AS `last_name(act)`, a.gender AS `gender(act)`, "
+           "r.actor_id, r.movie_id, r.role AS `role(act)` "
+           "FROM actors a "
+           "JOIN roles r ON r.actor_id = a.id")
+    if where:
+        sql += (" WHERE r.movie_id IN (SELECT m.id FROM movies m "
+                "JOIN movies_genres mg ON mg.movie_id = m.id"
+                f"{where})")
+    return sql, params
+
+
+def result_column_types(source, column_sources):
+    """{result column: 'int', 'float' or 'string'}, the types of the table columns they are selected from."""
+    table_types = {}
+    column_types = {}
+    for column, (table_name, table_column) in column_sources.items():
+        if table_name not in table_types:
+            table_types[table_name] = source.column_types(table_name)
+        if table_column in table_types[table_name]:
+            column_types[column] = table_types[table_name][table_column]
+    return column_types
+
+
+def _movie_filters(year_range, genres):
+    conditions, params = [], {}
+    if year_range is not None:
+        conditions.append("m.year BETWEEN :first_year AND :last_year")
+        params['first_year'], params['last_year'] = year_range
+    if genres:
+        names = [f"genre_{i}" for i in range(len(genres))]
+        conditions.append(f"mg.genre IN ({', '.join(':' + name for name in names)})")
+        params.update(zip(names, genres))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
@@ -0,0 +1,327 @@
+"""
+Segment reductions (count, sum, mean, min and max of the values of every key) for integer keys. The rows are
+sorted by key once, so the rows of each key form a contiguous segment, and every reduction is then a single
+pass over the segments. The passes are compiled with numba when it is installed, else run as NumPy reduceat
+calls. Missing values are skipped, as in pandas. Run as a script to benchmark them against pandas' groupby,
+on random keys or, with --source, on the cleaned data of a data source, e.g.
+python -m IMDB.data.segment_kernels --source sqlite:///imdb_ijs.sqlite
+"""
+import argparse
+import importlib.util
+import io
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+REDUCTIONS = ('count', 'sum', 'mean', 'min', 'max')
+JIT_AVAILABLE = importlib.util.find_spec('numba') is not None
+
+# Sizes of the imdb_ijs roles table and of its distinct actors, the default benchmark
+BENCHMARK_ROWS = 3_431_966
+BENCHMARK_KEYS = 817_718
+# Actors, those with the most roles, whose roles summary is timed in the benchmark of the cleaned data
+BENCHMARK_ACTORS = 20
+
+
+class SortedGroups:
+    """Rows grouped by an integer key: the order that sorts them by key and where the segment of each key starts."""
+
+    def __init__(self, keys):
+        """
+        :param keys: Integer keys, array or Series. Missing keys belong to no group, as in groupby.
+        """
+        keys = pd.Series(keys, copy=False)
+        self.num_rows = len(keys)
+        if keys.hasnans:
+            keys = keys.to_numpy(np.float64, na_value=np.nan)
+            present = np.flatnonzero(~np.isnan(keys))
+            self.order = present[np.argsort(keys[present], kind='stable')]
+        else:
+            keys = keys.to_numpy(np.int64)
+            self.order = np.argsort(keys, kind='stable')
+        self.grouped_rows = len(self.order)
+
+        sorted_keys = keys[self.order]
+        self.starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(sorted_keys) else \
+            np.empty(0, dtype=np.int64)
+        self.keys = sorted_keys[self.starts]
+        self.lengths = np.diff(np.r_[self.starts, self.grouped_rows])
+
+    def reduce(self, values, how, jit=None):
+        """Reduction how of the values of every key, in the order of self.keys."""
+        return segment_reduce(_float_values(values)[self.order], self.starts, how, jit)
+
+    def transform(self, values, how, jit=None):
+        """The reduction of the values of each row's key, for every row: groupby(keys)[values].transform(how)."""
+        reduced = self.reduce(values, how, jit)
+        if self.grouped_rows == self.num_rows:
+            result = np.empty(self.num_rows, dtype=reduced.dtype)
+        else:
+            result = np.full(self.num_rows, np.nan)
+        result[self.order] = np.repeat(reduced, self.lengths)
+        return result
+
+
+def segment_reduce(values, starts, how, jit=None):
+    """
+    Reduction how of every segment values[starts[i]:starts[i + 1]], the last segment running to the end.
+    :param jit: Use the compiled kernels. Defaults to whether numba is installed.
+    """
+    if how not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction: {how} (expected one of {', '.join(REDUCTIONS)})")
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64 if how == 'count' else np.float64)
+    if JIT_AVAILABLE if jit is None else jit:
+        return _compiled_kernels()[how](values, starts)
+    return _NUMPY_KERNELS[how](values, starts)
+
+
+def _float_values(values):
+    return pd.Series(values, copy=False).to_numpy(np.float64, na_value=np.nan)
+
+
+'''
+    NumPy kernels
+'''
+
+
+def _numpy_count(values, starts):
+    return np.add.reduceat((~np.isnan(values)).astype(np.int64), starts)
+
+
+def _numpy_sum(values, starts):
+    return np.add.reduceat(np.where(np.isnan(values), 0.0, values), starts)
+
+
+def _numpy_mean(values, starts):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _numpy_sum(values, starts) / _numpy_count(values, starts)
+
+
+def _numpy_min(values, starts):
+    # fmin and fmax only return NaN if all the values are
+    return np.fmin.reduceat(values, starts)
+
+
+def _numpy_max(values, starts):
+    return np.fmax.reduceat(values, starts)
+
+
+_NUMPY_KERNELS = {'count': _numpy_count, 'sum': _numpy_sum, 'mean': _numpy_mean, 'min': _numpy_min,
+                  'max': _numpy_max}
+
+
+'''
+    Loop kernels, compiled with numba
+'''
+
+
+def _loop_count(values, starts):
+    counts = np.zeros(len(starts), dtype=np.int64)
+    for segment in range(len(starts)):
+        end = starts[segment + 1] if segment + 1 < len(starts) else len(values)
+        for row in range(starts[segment], end):
+            if not np.isnan(values[row]):
+                counts[segment] += 1
+    return counts
+
+
+def _loop_sum(values, starts):
+    sums = np.zeros(len(starts), dtype=np.float64)
+    for segment in range(len(starts)):
+        end = starts[segment + 1] if segment + 1 < len(starts) else len(values)
+        for row in range(starts[segment], end):
+            if not np.isnan(values[row]):
+                sums[segment] += values[row]
+    return sums
+
+
+def _loop_mean(values, starts):
+    means = np.full(len(starts), np.nan)
+    for segment in range(len(starts)):
+        end = starts[segment + 1] if segment + 1 < len(starts) else len(values)
+        total, count = 0.0, 0
+        for row in range(starts[segment], end):
+            if not np.isnan(values[row]):
+                total += values[row]
+                count += 1
+        if count:
+            means[segment] = total / count
+    return means
+
+
+def _loop_min(values, starts):
+    minimums = np.full(len(starts), np.nan)
+    for segment in range(len(starts)):
+        end = starts[segment + 1] if segment + 1 < len(starts) else len(values)
+        for row in range(starts[segment], end):
+            if values[row] < minimums[segment] or np.isnan(minimums[segment]):
+                minimums[segment] = values[row]
+    return minimums
+
+
+def _loop_max(values, starts):
+    maximums = np.full(len(starts), np.nan)
+    for segment in range(len(starts)):
+        end = starts[segment + 1] if segment + 1 < len(starts) else len(values)
+        for row in range(starts[segment], end):
+            if values[row] > maximums[segment] or np.isnan(maximums[segment]):
+                maximums[segment] = values[row]
+    return maximums
+
+
+_LOOP_KERNELS = {'count': _loop_count, 'sum': _loop_sum, 'mean': _loop_mean, 'min': _loop_min, 'max': _loop_max}
+_compiled = {}
+
+
+def _compiled_kernels():
+    if not _compiled:
+        import numba
+
+        # Compiled once per process, numba's on-disk cache would write into the package folder
+        _compiled.update({how: numba.njit(nogil=True)(kernel) for how, kernel in _LOOP_KERNELS.items()})
+    return _compiled
+
+
+'''
+    Benchmark
+'''
+
+
+def benchmark(num_rows=BENCHMARK_ROWS, num_keys=BENCHMARK_KEYS, seed=0):
+    """
+    Times the transform of every reduction over random keys and values with pandas' groupby, the NumPy
+    kernels and, if numba is installed, the compiled kernels (compiled before timing).
+    :return: {implementation: seconds for all the reductions, sorting included}
+    """
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, num_keys, num_rows)
+    values = rng.integers(0, 100, num_rows) / 10
+    values[rng.random(num_rows) < 0.02] = np.nan
+
+    def run_pandas():
+        series = pd.Series(values)
+        return [series.groupby(keys).transform(how) for how in REDUCTIONS]
+
+    def run_kernels(jit):
+        groups = SortedGroups(keys)
+        return [groups.transform(values, how, jit) for how in REDUCTIONS]
+
+    implementations = {'pandas groupby': run_pandas, 'numpy kernels': lambda: run_kernels(False)}
+    if JIT_AVAILABLE:
+        _compiled_kernels()
+        run_kernels(True)
+        implementations['numba kernels'] = lambda: run_kernels(True)
+
+    return _time_all(implementations)
+
+
+def benchmark_frames(movies_df, actors_df, num_actors=BENCHMARK_ACTORS):
+    """
+    Times, on cleaned data frames:
+    - the director, actor and cast count and mean rank transforms of the correlation columns, on the join of
+      the frames, with pandas' groupby and the kernels;
+    - the roles and role genres lookups of the actors with the most roles, one movie scan per role as they
+      were first written and vectorised as they are now.
+    :return: {implementation: seconds}
+    """
+    from IMDB.analysis import actor_analysis
+
+    joined = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
+    transforms = [(key, values, how) for key in ('director_id', 'actor_id', 'movie_id')
+                  for values, how in (('actor_id', 'count'), ('movie_rank', 'mean'))]
+
+    def run_pandas():
+        return [joined.groupby(key)[values].transform(how) for key, values, how in transforms]
+
+    def run_kernels(jit):
+        groups = {key: SortedGroups(joined[key]) for key in ('director_id', 'actor_id', 'movie_id')}
+        return [groups[key].transform(joined[values], how, jit) for key, values, how in transforms]
+
+    actor_ids = actors_df['actor_id'].value_counts().index[:num_actors]
+    actor_frames = [actors_df[actors_df['actor_id'] == actor_id] for actor_id in actor_ids]
+
+    def run_lookups(get_roles, get_genres):
+        for actor_df in actor_frames:
+            get_genres(movies_df, get_roles(movies_df, actor_df))
+
+    implementations = {'pandas groupby': run_pandas, 'numpy kernels': lambda: run_kernels(False)}
+    if JIT_AVAILABLE:
+        _compiled_kernels()
+        run_kernels(True)
+        implementations['numba kernels'] = lambda: run_kernels(True)
+    implementations['per-role lookups'] = lambda: run_lookups(_per_role_actor_roles, _per_role_genres)
+    implementations['vectorised lookups'] = lambda: run_lookups(actor_analysis.get_actor_roles,
+                                                                actor_analysis.get_role_genres)
+    return _time_all(implementations)
+
+
+def _per_role_actor_roles(movie_df, actor_df):
+    # get_actor_roles as first written: a scan of the movies for every role
+    from IMDB.analysis import movie_analysis
+
+    movie_roles = []
+    for role, movie_id in zip(actor_df['role(act)'].tolist(), actor_df['movie_id'].tolist()):
+        movie = movie_analysis.get_movie_by_id(movie_df, movie_id)
+        if movie is not None:
+            movie_roles.append([movie['year'], movie['name'], movie['director'][1], role, movie['rank']])
+    return sorted(movie_roles, key=lambda x: x[0])
+
+
+def _per_role_genres(movie_df, roles_list):
+    from IMDB.analysis import movie_analysis
+
+    return [movie_analysis.get_movie_genres(movie_df, movie_name=role[1]) for role in roles_list]
+
+
+def _time_all(implementations):
+    timings = {}
+    for implementation, run in implementations.items():
+        start = time.perf_counter()
+        run()
+        timings[implementation] = time.perf_counter() - start
+    return timings
+
+
+def _load_cleaned_frames(source_uri, cache_dir):
+    from IMDB.data.IMDB_Database_Obj import IMDBConnection
+    from IMDB.data.table_sources import source_from_uri
+
+    imdb_data = IMDBConnection(client=types.SimpleNamespace(ready=False), logger=io.StringIO(),
+                               source=source_from_uri(source_uri), cache_dir=cache_dir)
+    imdb_data.load_df()
+    return imdb_data.merged_movies, imdb_data.merged_actors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the segment reduction kernels against pandas.")
+    parser.add_argument('--rows', type=int, default=BENCHMARK_ROWS, help="number of rows (default: imdb_ijs roles)")
+    parser.add_argument('--keys', type=int, default=BENCHMARK_KEYS, help="number of distinct keys (default: actors)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--source', help="benchmark on the cleaned data of this data source URI instead")
+    parser.add_argument('--cache-dir', help="stage cache folder of --source (default: the package data folder)")
+    args = parser.parse_args()
+
+    if args.source:
+        movies_df, actors_df = _load_cleaned_frames(args.source, args.cache_dir)
+        timings = benchmark_frames(movies_df, actors_df)
+        print(f"{len(movies_df)} movie rows, {len(actors_df)} actor rows, correlation transforms and the roles "
+              f"of the {BENCHMARK_ACTORS} actors with the most roles:")
+        baselines = {'pandas groupby': ('numpy kernels', 'numba kernels'), 'per-role lookups': ('vectorised lookups',)}
+    else:
+        timings = benchmark(args.rows, args.keys, args.seed)
+        print(f"{args.rows} rows, {args.keys} keys, {', '.join(REDUCTIONS)} transforms:")
+        baselines = {'pandas groupby': ('numpy kernels', 'numba kernels')}
+    for baseline, implementations in baselines.items():
+        for implementation in (baseline,) + implementations:
+            if implementation in timings:
+                speedup = timings[baseline] / timings[implementation]
+                print(f"{implementation:<20}{timings[implementation]:8.3f}s   {speedup:5.1f}x")
+    if not JIT_AVAILABLE:
+        print("numba is not installed, the numpy kernels are used")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Cleaned data frames published once as uncompressed Arrow IPC files on a shared-memory file system, which
+worker processes and other sessions on the host memory-map instead of receiving pickled copies. Numeric
+columns are used straight from the mapped pages and repeated strings stay dictionary encoded (categoricals),
+so attaching takes milliseconds and any number of processes share one copy of the data.
+A dataset's files are kept while a frame attached from it is alive in the publishing process, so the worker
+processes of an analysis still running on an older version can map them; they are removed by a later publish.
+"""
+import glob
+import hashlib
+import os.path
+import threading
+import weakref
+from collections import namedtuple
+
+import pandas as pd
+
+from IMDB.data.cache_locking import atomic_write
+
+# tmpfs mount used when present, files in it are kept in memory and shared between processes
+SHARED_MEMORY_DIR = '/dev/shm'
+FILE_PREFIX = 'imdb-dataset-'
+
+# Picklable handle of a published dataset: its folder, the namespace of its publisher (e.g. its cache
+# folder, datasets of other namespaces are left alone) and the key of the data it was built from
+SharedDataset = namedtuple('SharedDataset', ['directory', 'namespace', 'key'])
+
+# Memory-mapped tables of the datasets attached by this process, {file path: pyarrow Table}
+_tables = {}
+# Frames attached with all their columns and still alive, {id(frame): (weak reference, dataset, name)}
+_attached_frames = {}
+# Frames are attached by any thread (e.g. a background refresh) and released by the garbage collector, which
+# can run while the lock is held
+_lock = threading.RLock()
+
+
+def shared_directory(fallback_dir):
+    """Folder datasets are published in: the shared-memory file system if there is one, else fallback_dir."""
+    return SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else fallback_dir
+
+
+def publish(dataset, frames):
+    """
+    Publishes the frames ({name: DataFrame}) of the dataset, unless they are published already, and removes
+    the other datasets of its namespace that no frame attached in this process uses any more (processes
+    attached to them keep their mapping).
+    """
+    import pyarrow as pa
+
+    for name, df in frames.items():
+        file_path = _file_path(dataset, name)
+        if os.path.isfile(file_path):
+            continue
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        def write(part_file_path):
+            with pa.OSFile(part_file_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        atomic_write(file_path, write)
+
+    kept_prefixes = tuple(_dataset_prefix(kept) for kept in {dataset} | _datasets_in_use())
+    namespace_files = os.path.join(dataset.directory, f"{FILE_PREFIX}{_digest(dataset.namespace)}-*.arrow")
+    for file_path in glob.glob(namespace_files):
+        if not file_path.startswith(kept_prefixes):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                # Removed by another process of the namespace
+                pass
+
+
+def is_published(dataset, names):
+    return all(os.path.isfile(_file_path(dataset, name)) for name in names)
+
+
+def attach(dataset, name, columns=None):
+    """
+    Data frame name of the dataset, mapped from shared memory. Only the columns given are converted.
+    Strings are backed by the mapped Arrow buffers (string[pyarrow]) instead of being copied into objects.
+    """
+    import pyarrow as pa
+
+    file_path = _file_path(dataset, name)
+    with _lock:
+        if file_path not in _tables:
+            _tables[file_path] = pa.ipc.open_file(pa.memory_map(file_path, 'r')).read_all()
+        table = _tables[file_path]
+    if columns is not None:
+        table = table.select(columns)
+
+    df = table.to_pandas(split_blocks=True, types_mapper=_string_dtype)
+    if columns is None:
+        with _lock:
+            _attached_frames[id(df)] = (weakref.ref(df, lambda ref, key=id(df): _release(key, ref)), dataset, name)
+    return df
+
+
+def shared_source(df):
+    """(dataset, name) df was attached from, if it is an attached frame with all its columns, else None."""
+    with _lock:
+        attached = _attached_frames.get(id(df))
+    if attached is None or attached[0]() is not df:
+        return None
+    return attached[1:]
+
+
+def _release(key, ref):
+    # The frame was garbage collected, its table is unmapped once no other frame attached from it is alive
+    with _lock:
+        attached = _attached_frames.get(key)
+        if attached is None or attached[0] is not ref:
+            return
+        del _attached_frames[key]
+        file_path = _file_path(*attached[1:])
+        if all(_file_path(*other[1:]) != file_path for other in _attached_frames.values()):
+            _tables.pop(file_path, None)
+
+
+def _datasets_in_use():
+    with _lock:
+        return {dataset for _, dataset, _ in _attached_frames.values()}
+
+
+def _string_dtype(arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def _file_path(dataset, name):
+    return f"{_dataset_prefix(dataset)}{name}.arrow"
+
+
+def _dataset_prefix(dataset):
+    return os.path.join(dataset.directory, f"{FILE_PREFIX}{_digest(dataset.namespace)}-{_digest(dataset.key)}-")
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
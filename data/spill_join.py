@@ -0,0 +1,117 @@
+"""
+Out-of-core join for tables that do not fit in memory together with their join result. Both inputs are
+read in chunks and hash partitioned on their integer key into spill files, each partition is joined on
+its own with join_engine.join, and the partition results are merged back into the row order of the left
+input. The output is the same as join_engine.join on the whole tables, yielded in chunks.
+"""
+import os.path
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from IMDB.data.join_engine import join
+
+# Position of each left row in the left input, used to restore the row order after the join
+ROW_COLUMN = '__row'
+
+
+def spilled_join(left_chunks, right_chunks, left_on, right_on, num_partitions, spill_dir, cache_format,
+                 chunk_size, logger=None):
+    """
+    Yields the inner join of the left and right chunks on left_on == right_on as data frames of about
+    chunk_size rows, holding only about one partition of the inputs in memory at a time.
+    :param spill_dir: Folder for the temporary partition files, removed when done.
+    """
+    spill_root = os.path.join(spill_dir, uuid.uuid4().hex)
+    os.makedirs(spill_root)
+    try:
+        left_parts, num_left_rows, left_columns = _spill(left_chunks, left_on, num_partitions,
+                                                         os.path.join(spill_root, 'left'), cache_format, True)
+        right_parts, _, right_columns = _spill(right_chunks, right_on, num_partitions,
+                                               os.path.join(spill_root, 'right'), cache_format, False)
+        if logger is not None:
+            logger.write(f"[x] spilled {num_left_rows} rows into {num_partitions} partitions")
+
+        joined_dir = os.path.join(spill_root, 'joined')
+        os.makedirs(joined_dir)
+        joined_files = []
+        for partition in range(num_partitions):
+            left = _read_part(left_parts.get(partition, []), cache_format)
+            right = _read_part(right_parts.get(partition, []), cache_format)
+            if left is None or right is None:
+                continue
+            joined, _ = join(left, right, left_on, right_on)
+            joined_file = os.path.join(joined_dir, f"part-{partition:05d}.{cache_format.extension}")
+            cache_format.write(joined, joined_file)
+            joined_files.append(joined_file)
+
+        num_rows = 0
+        for chunk in _merge_by_row(joined_files, num_left_rows, cache_format, chunk_size):
+            num_rows += len(chunk)
+            yield chunk
+        if num_rows == 0:
+            # An empty result still has the columns of the join
+            yield pd.DataFrame(columns=left_columns + [column for column in right_columns if column != right_on])
+        if logger is not None:
+            logger.write(f"[x] joined {len(joined_files)} partitions -> {num_rows} rows")
+    finally:
+        shutil.rmtree(spill_root, ignore_errors=True)
+
+
+def _spill(chunks, key, num_partitions, directory, cache_format, number_rows):
+    """
+    Writes the rows of every chunk to a file of their key's partition.
+    :return: ({partition: files in chunk order}, number of rows, columns of the chunks)
+    """
+    os.makedirs(directory)
+    parts = {}
+    num_rows = 0
+    columns = []
+    for chunk_num, chunk in enumerate(chunks):
+        columns = list(chunk.columns)
+        if number_rows:
+            chunk = chunk.assign(**{ROW_COLUMN: np.arange(num_rows, num_rows + len(chunk))})
+        num_rows += len(chunk)
+
+        partition_ids = chunk[key].to_numpy(np.int64) % num_partitions
+        for partition, part_df in chunk.groupby(partition_ids, sort=False):
+            part_file = os.path.join(directory, f"{partition:05d}-{chunk_num:06d}.{cache_format.extension}")
+            cache_format.write(part_df.reset_index(drop=True), part_file)
+            parts.setdefault(partition, []).append(part_file)
+    return parts, num_rows, columns
+
+
+def _read_part(part_files, cache_format):
+    # Files are in chunk order, so rows keep their input order within the partition
+    if not part_files:
+        return None
+    return pd.concat([cache_format.read(part_file) for part_file in part_files], ignore_index=True)
+
+
+def _merge_by_row(joined_files, num_left_rows, cache_format, chunk_size):
+    """Merges the joined partitions, each in left row order, into one stream in left row order."""
+    readers = [cache_format.read_chunks(joined_file, chunk_size) for joined_file in joined_files]
+    buffers = [None] * len(readers)
+
+    for window_end in range(chunk_size, num_left_rows + chunk_size, chunk_size):
+        window_parts = []
+        for reader_num, reader in enumerate(readers):
+            buffer = buffers[reader_num]
+            while reader is not None and (buffer is None or buffer[ROW_COLUMN].iloc[-1] < window_end):
+                chunk = next(reader, None)
+                if chunk is None:
+                    readers[reader_num] = reader = None
+                elif not chunk.empty:
+                    buffer = chunk if buffer is None else pd.concat([buffer, chunk], ignore_index=True)
+            if buffer is None:
+                continue
+            in_window = buffer[ROW_COLUMN].to_numpy() < window_end
+            window_parts.append(buffer[in_window])
+            buffers[reader_num] = buffer[~in_window].reset_index(drop=True) if not in_window.all() else None
+
+        if window_parts:
+            window = pd.concat(window_parts, ignore_index=True).sort_values(ROW_COLUMN, kind='stable')
+            if not window.empty:
+                yield window.drop(columns=ROW_COLUMN).reset_index(drop=True)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os.path
+import types
+
+from IMDB.data.cache_locking import FileLock, atomic_write
+
+
+# Functions of this package that a stage's code calls by global name are part of its version, as are the
+# constants it reads by global name (e.g. MOVIE_SCHEMA)
+VERSIONED_PACKAGE = 'IMDB.data'
+CONSTANT_TYPES = (str, int, float, bool, tuple, list, dict, frozenset, set)
+
+
+def code_version(*parts):
+    """
+    Fingerprint of what builds a stage: the bytecode, constants and names of its functions and of the package
+    functions and constants they use, and any other parts (e.g. column lists read as attributes) by value.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    hashed_code = set()
+    for part in parts:
+        _hash_part(digest, part, hashed_code)
+    return digest.hexdigest()
+
+
+def _hash_part(digest, part, hashed_code):
+    code = getattr(part, '__code__', None)
+    if code is None:
+        digest.update(_stable_repr(part).encode())
+    elif code not in hashed_code:
+        hashed_code.add(code)
+        _hash_code(digest, code, part.__globals__, hashed_code)
+
+
+def _hash_code(digest, code, scope, hashed_code):
+    digest.update(code.co_code)
+    # Global, attribute and method names: .ffill() and .bfill() only differ here
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _hash_code(digest, const, scope, hashed_code)
+        else:
+            digest.update(_stable_repr(const).encode())
+
+    for name in code.co_names:
+        value = scope.get(name)
+        if isinstance(value, types.FunctionType) and value.__module__.startswith(VERSIONED_PACKAGE):
+            _hash_part(digest, value, hashed_code)
+        elif isinstance(value, CONSTANT_TYPES):
+            digest.update(f"{name}={_stable_repr(value)}".encode())
+
+
+def _stable_repr(value):
+    # Set order changes with the string hash seed of each process
+    if isinstance(value, (set, frozenset)):
+        return repr(sorted(_stable_repr(item) for item in value))
+    return repr(value)
+
+
+class StageManifest:
+    """
+    Records, for every cached pipeline stage, the fingerprints of its input files, the version of the
+    code that built it and its row count, so that only stages whose inputs changed are rebuilt.
+    Also keeps the per-table id high-water marks used by incremental refreshes.
+    Updates are merged into the file on disk under a lock, so several processes can share one manifest.
+    """
+    READ_BLOCK_SIZE = 1 << 20
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.lock_path = f"{manifest_path}.lock"
+        self.stages = {}
+        self.file_digests = {}
+        self.watermarks = {}
+        self.reload()
+
+    def reload(self):
+        """Re-reads the manifest, e.g. after another process built a stage."""
+        file_digests = self.file_digests
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.stages = manifest.get('stages', {})
+            self.file_digests = manifest.get('files', {})
+            self.watermarks = manifest.get('watermarks', {})
+        # Digests are validated against size and mtime, so known ones stay usable
+        self.file_digests = {**file_digests, **self.file_digests}
+
+    def is_fresh(self, stage, output_path, input_paths, version):
+        """
+        A stage is fresh when its output exists, it was built by the same code version and none of its
+        inputs changed since. Inputs that are no longer on disk cannot have changed and are skipped.
+        """
+        entry = self.stages.get(stage)
+        if entry is None or entry['version'] != version or not os.path.isfile(output_path):
+            return False
+        if entry['output'] != self.file_digest(output_path):
+            return False
+
+        for input_path in input_paths:
+            recorded_digest = entry['inputs'].get(input_path)
+            if os.path.isfile(input_path) and recorded_digest != self.file_digest(input_path):
+                return False
+        return True
+
+    def record(self, stage, output_path, input_paths, version, num_rows):
+        entry = {
+            'version': version,
+            'output': self.file_digest(output_path),
+            'inputs': {input_path: self.file_digest(input_path)
+                       for input_path in input_paths if os.path.isfile(input_path)},
+            'rows': num_rows,
+        }
+        self.__update('stages', stage, entry)
+
+    def set_watermark(self, table_name, watermark):
+        self.__update('watermarks', table_name, watermark)
+
+    def file_digest(self, file_path):
+        # Content hash, only recomputed when the file size or modification time changed
+        stat = os.stat(file_path)
+        cached = self.file_digests.get(file_path)
+        if cached is not None and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['digest']
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.READ_BLOCK_SIZE), b''):
+                digest.update(block)
+
+        self.file_digests[file_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                        'digest': digest.hexdigest()}
+        return self.file_digests[file_path]['digest']
+
+    def save(self):
+        atomic_write(self.manifest_path, self.__write)
+
+    def __write(self, file_path):
+        with open(file_path, 'w') as manifest_file:
+            json.dump({'stages': self.stages, 'files': self.file_digests, 'watermarks': self.watermarks},
+                      manifest_file, indent=2)
+
+    def __update(self, section, key, value):
+        # Merge the change into the latest manifest on disk, other processes may have recorded stages meanwhile
+        with FileLock(self.lock_path):
+            self.reload()
+            getattr(self, section)[key] = value
+            self.save()
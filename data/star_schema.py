@@ -0,0 +1,91 @@
+"""
+Normalised, star-schema model of the cleaned data: a movie dimension with one row per movie, director and
+actor dimensions, movie-director and movie-genre bridge tables and a roles fact table. Unlike merged_movies,
+which holds one row per movie x director x genre, no table repeats a movie, so analyses can work on the
+smallest table that answers them. The legacy wide frames are rebuilt on request and never kept, so the
+schema's memory saving holds while they are in use.
+"""
+import time
+
+import pandas as pd
+
+from IMDB.data.compact_schema import memory_mb
+from IMDB.visualisation.log_levels import DEBUG, log
+
+MOVIE_COLUMNS = ['movie_id', 'movie_rank', 'movie_name', 'movie_year']
+DIRECTOR_COLUMNS = ['director_id', 'full_name(dir)']
+ACTOR_COLUMNS = ['actor_id', 'full_name(act)', 'gender(act)']
+ROLE_COLUMNS = ['actor_id', 'movie_id', 'role(act)']
+
+# Column order of the cleaned merged_movies and merged_actors frames
+WIDE_MOVIE_COLUMNS = ['movie_id', 'movie_rank', 'movie_name', 'movie_year', 'movie_genre', 'director_id',
+                      'full_name(dir)']
+WIDE_ACTOR_COLUMNS = ['actor_id', 'full_name(act)', 'gender(act)', 'role(act)', 'movie_id']
+
+
+class StarSchema:
+    """
+    Tables:
+    - movies: movie_id, movie_rank, movie_name, movie_year (one row per movie)
+    - directors: director_id, full_name(dir) (one row per director)
+    - movie_directors: movie_id, director_id
+    - movie_genres: movie_id, movie_genre
+    - actors: actor_id, full_name(act), gender(act) (one row per actor)
+    - roles: actor_id, movie_id, role(act) (one row per role)
+    """
+
+    TABLE_NAMES = ['movies', 'directors', 'movie_directors', 'movie_genres', 'actors', 'roles']
+
+    def __init__(self, movies, directors, movie_directors, movie_genres, actors, roles):
+        self.movies = movies
+        self.directors = directors
+        self.movie_directors = movie_directors
+        self.movie_genres = movie_genres
+        self.actors = actors
+        self.roles = roles
+
+    @classmethod
+    def from_wide(cls, movies_df, actors_df):
+        """Splits the cleaned merged_movies and merged_actors frames into the star schema tables."""
+        return cls(
+            movies=_unique(movies_df, MOVIE_COLUMNS, 'movie_id'),
+            directors=_unique(movies_df, DIRECTOR_COLUMNS, 'director_id'),
+            movie_directors=_unique(movies_df, ['movie_id', 'director_id']),
+            movie_genres=_unique(movies_df, ['movie_id', 'movie_genre']),
+            actors=_unique(actors_df, ACTOR_COLUMNS, 'actor_id'),
+            roles=actors_df[ROLE_COLUMNS].reset_index(drop=True),
+        )
+
+    def tables(self):
+        return {'movies': self.movies, 'directors': self.directors, 'movie_directors': self.movie_directors,
+                'movie_genres': self.movie_genres, 'actors': self.actors, 'roles': self.roles}
+
+    def memory_mb(self):
+        return sum(memory_mb(table) for table in self.tables().values())
+
+    def wide_movies(self, logger=None):
+        """The legacy merged_movies frame (one row per movie x director x genre), built on every call."""
+        start = time.perf_counter()
+        wide_df = (self.movies
+                   .merge(self.movie_directors, on='movie_id')
+                   .merge(self.directors, on='director_id')
+                   .merge(self.movie_genres, on='movie_id'))[WIDE_MOVIE_COLUMNS]
+        _log_built(logger, 'merged_movies', wide_df, start)
+        return wide_df
+
+    def wide_actors(self, logger=None):
+        """The legacy merged_actors frame (one row per role), built on every call in the order of the roles."""
+        start = time.perf_counter()
+        wide_df = self.roles.merge(self.actors, on='actor_id', how='left')[WIDE_ACTOR_COLUMNS]
+        _log_built(logger, 'merged_actors', wide_df, start)
+        return wide_df
+
+
+def _unique(df, columns, key=None):
+    return df[columns].drop_duplicates(subset=key).reset_index(drop=True)
+
+
+def _log_built(logger, name, df, start):
+    # Built on every use of the wide frame, so only shown at debug level
+    log(logger, lambda: f"[x] built wide {name} from the star schema ({len(df)} rows, "
+                        f"{time.perf_counter() - start:.2f}s)", DEBUG)
@@ -0,0 +1,53 @@
+"""
+Vectorised lowercasing and stripping of string columns, giving exactly the values of str.lower followed by
+str.strip on every element. ASCII values (nearly all of the IMDB data) go through pyarrow's ASCII kernels,
+the few others through Python's own str methods, since Arrow's Unicode case mapping differs from Python's
+for some characters (e.g. final sigma). Large frames can be split across worker processes.
+"""
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Below this many rows process start-up and pickling cost more than they save
+PARALLEL_MIN_ROWS = 1_000_000
+# ASCII characters str.strip() removes, a wider set than C's isspace()
+ASCII_WHITESPACE = "".join(chr(code) for code in range(128) if chr(code).isspace())
+
+
+def normalise_strings(df, columns, workers=1):
+    """
+    Returns a data frame of the given columns as lowercase, stripped strings ('string' dtype), with the
+    index of df.
+    :param workers: Number of processes to split the rows across, for frames of PARALLEL_MIN_ROWS or more.
+    """
+    if workers <= 1 or len(df) < PARALLEL_MIN_ROWS:
+        return _normalise_frame(df[columns])
+
+    row_chunks = np.array_split(np.arange(len(df)), workers)
+    with ProcessPoolExecutor(workers) as executor:
+        parts = executor.map(_normalise_frame, [df[columns].iloc[rows] for rows in row_chunks])
+        return pd.concat(list(parts))
+
+
+def _normalise_frame(df):
+    return pd.DataFrame({column: _normalise_series(df[column]) for column in df.columns}, index=df.index)
+
+
+def _normalise_series(series):
+    series = series.astype('string')
+    if importlib.util.find_spec('pyarrow') is None:
+        return series.str.lower().str.strip()
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = pa.array(series)
+    normalised = pc.ascii_trim(pc.ascii_lower(values), ASCII_WHITESPACE)
+    result = pd.Series(normalised.to_numpy(zero_copy_only=False), index=series.index, dtype='string')
+
+    not_ascii = ~pc.fill_null(pc.string_is_ascii(values), True).to_numpy(zero_copy_only=False)
+    if not_ascii.any():
+        result[not_ascii] = series[not_ascii].str.lower().str.strip()
+    return result
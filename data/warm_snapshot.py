@@ -0,0 +1,94 @@
+"""
+Single-file, memory-mappable snapshot of the prepared in-memory state: the cleaned data frames plus the
+derived lists and frames the analysis tabs build from them.
+
+File layout: MAGIC, a little-endian uint64 header length, a JSON header, then one Arrow IPC file per
+section. The header holds the snapshot format version, the key of the cleaned data the snapshot was built
+from, and the kind, offset and length of every section. Sections are read straight out of the memory map,
+without a copy of the file, but converting them to pandas copies the columns: a load takes about the memory
+of the frames it returns, as a load from the stage caches does, and saves their cleaning and derivation.
+"""
+import importlib.util
+import json
+import os.path
+import struct
+
+import pandas as pd
+
+from IMDB.data.cache_locking import atomic_write
+
+MAGIC = b"IMDBSNAP"
+FORMAT_VERSION = 1
+_HEADER_LENGTH = struct.Struct('<Q')
+
+
+def snapshots_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def write_snapshot(file_path, key, sections):
+    """
+    Writes the sections ({name: DataFrame or list}) to file_path.
+    :param key: Identifies the data the sections were derived from, a snapshot is only loaded for the same key.
+    """
+    import pyarrow as pa
+
+    section_buffers = []
+    header = {'version': FORMAT_VERSION, 'key': key, 'sections': {}}
+    offset = 0
+    for name, value in sections.items():
+        if isinstance(value, pd.DataFrame):
+            kind, table = 'frame', pa.Table.from_pandas(value, preserve_index=False)
+        else:
+            kind, table = 'list', pa.table({'value': list(value)})
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        buffer = sink.getvalue()
+
+        header['sections'][name] = {'kind': kind, 'offset': offset, 'length': buffer.size}
+        section_buffers.append(buffer)
+        offset += buffer.size
+
+    header_bytes = json.dumps(header).encode()
+
+    def write(part_file_path):
+        with open(part_file_path, 'wb') as snapshot_file:
+            snapshot_file.write(MAGIC)
+            snapshot_file.write(_HEADER_LENGTH.pack(len(header_bytes)))
+            snapshot_file.write(header_bytes)
+            for buffer in section_buffers:
+                snapshot_file.write(buffer)
+
+    atomic_write(file_path, write)
+
+
+def read_snapshot(file_path, key):
+    """
+    Maps the snapshot and returns its sections, or None if it is missing, of another format version
+    or was built from data with another key.
+    """
+    if not snapshots_available() or not os.path.isfile(file_path):
+        return None
+    import pyarrow as pa
+
+    # Closing the map leaves the mapped pages of the converted columns valid until they are released
+    with pa.memory_map(file_path, 'r') as source:
+        if source.read(len(MAGIC)) != MAGIC:
+            return None
+        header_length, = _HEADER_LENGTH.unpack(source.read(_HEADER_LENGTH.size))
+        header = json.loads(source.read(header_length))
+        if header['version'] != FORMAT_VERSION or header['key'] != key:
+            return None
+
+        data_start = len(MAGIC) + _HEADER_LENGTH.size + header_length
+        sections = {}
+        for name, section in header['sections'].items():
+            source.seek(data_start + section['offset'])
+            table = pa.ipc.open_file(source.read_buffer(section['length'])).read_all()
+            if section['kind'] == 'frame':
+                sections[name] = table.to_pandas(split_blocks=True)
+            else:
+                sections[name] = table.column('value').to_pylist()
+    return sections
@@ -30,14 +30,14 @@ class IMDBActorTab(ttk.Frame):
         self.selected_actor = None
 
     def create_widgets(self):
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
         label_actor_heading = ttk.Label(self, text="IMDB Actor Analysis")
         label_actor_heading.grid(row=0, column=0, columnspan=2, rowspan=1, sticky="nswe", padx=5, pady=5)
 
         # Actor Name Label & Combobox
         label_actor_name = ttk.Label(self, text="Select Actor:")
         self.selected_actor = tk.StringVar()
-        actor_names = actor_analysis.get_actors(actors_df)
+        actor_names = version.derived('actor_names', actor_analysis.get_actors, version.actors())
         combo_actor = ttk.Combobox(self, textvariable=self.selected_actor, values=actor_names, state='readonly')
         combo_actor.set(ACTOR_PARAMETERS['name'])
         label_actor_name.grid(row=1, column=0, pady=5, padx=5, sticky="nswe")
@@ -77,10 +77,11 @@ class IMDBActorTab(ttk.Frame):
             self.grid_rowconfigure(i, weight=1)
 
     def show_actor_distribution(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
-        movies_df = movies_df.drop_duplicates(subset=['movie_id']).copy()
+        movies_df = movies_df.drop_duplicates(subset=['movie_id'])
         merged_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
 
         new_window = tk.Toplevel(self)
@@ -93,10 +94,10 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def show_actor_count_year(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.unique_movies()
+        actors_df = version.merged_actors
 
-        movies_df = movies_df.drop_duplicates(subset=['movie_id']).copy()
         merged_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
 
         new_window = tk.Toplevel(self)
@@ -109,10 +110,10 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def show_actor_occurrences(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.unique_movies()
+        actors_df = version.merged_actors
 
-        movies_df = movies_df.drop_duplicates(subset=['movie_id']).copy()
         merged_df = pd.merge(movies_df, actors_df, on='movie_id', how='inner')
         actor_occurrences = merged_df['actor_id'].value_counts()
 
@@ -126,8 +127,9 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def show_actor_performance(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         actor = actor_analysis.get_actor_by_name(movies_df, actors_df, self.selected_actor.get())
         actor_roles = actor['movie_roles']
@@ -142,8 +144,9 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def show_actor_genre(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         actor = actor_analysis.get_actor_by_name(movies_df, actors_df, self.selected_actor.get())
         actor_roles = actor['movie_roles']
@@ -159,8 +162,9 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def show_actor_activity(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         actor = actor_analysis.get_actor_by_name(movies_df, actors_df, self.selected_actor.get())
         actor_roles = actor['movie_roles']
@@ -175,8 +179,9 @@ class IMDBActorTab(ttk.Frame):
         canvas_widget.pack()
 
     def generate_summary(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.unique_movies()
+        actors_df = version.merged_actors
 
         log_buffer = io.StringIO()
         actors_general(movies_df, actors_df, logger=log_buffer)
@@ -188,8 +193,9 @@ class IMDBActorTab(ttk.Frame):
         IMDBMsg.show_imdb_msg(self, "Actor Summary", summary_info)
 
     def generate_actor_summary(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
         actor_name = self.selected_actor.get()
         actor = actor_analysis.get_actor_by_name(movies_df, actors_df, actor_name)
 
@@ -203,8 +209,9 @@ class IMDBActorTab(ttk.Frame):
         IMDBMsg.show_imdb_msg(self, f"Actor {actor_name} Summary", actor_info)
 
     def show_actor_roles(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
         actor_name = self.selected_actor.get()
         actor = actor_analysis.get_actor_by_name(movies_df, actors_df, actor_name)
         actor_roles = actor['movie_roles']
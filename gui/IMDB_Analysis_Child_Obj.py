@@ -65,3 +65,6 @@ class IMDBAnalyzerChild(tk.Toplevel):
         corr_tab = IMDBCorrTab(self.notebook, logger=self.root, imdb_data=imdb_data)
         corr_tab.create_widgets()
         self.notebook.add(corr_tab, text='Correlation')
+
+        # Everything the tabs derived from the data is now in memory
+        imdb_data.save_snapshot()
@@ -5,10 +5,11 @@ from IMDB.gui.IMDB_Analysis_Child_Obj import IMDBAnalyzerChild
 from IMDB.gui.IMDB_Msg_Obj import IMDBMsg
 from IMDB.gui.SplashScreen import Splash
 from IMDB.gui.IMDB_Data_Obj import IMDBDataTab
+from IMDB.visualisation.log_levels import DEBUG
 
 
 class IMDBAnalyzer(tk.Tk):
-    def __init__(self):
+    def __init__(self, connection_options=None, partition_query=None):
         tk.Tk.__init__(self)  # Initialize superclass
         self.title("IMDB Data")
         self.geometry("600x500")
@@ -17,7 +18,12 @@ class IMDBAnalyzer(tk.Tk):
         self.child_frame = IMDBAnalyzerChild(self)
         self.child_frame.withdraw()
         self.logger = None
+        # The log pane shows everything, including the stage previews and summaries logged at DEBUG
+        self.log_level = DEBUG
         self.data_tab = None
+        # IMDBConnection keyword arguments, and the load_partitions ones of the Load Partitions button
+        self.connection_options = connection_options
+        self.partition_query = partition_query
 
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(expand=1, fill="both")
@@ -58,7 +64,8 @@ class IMDBAnalyzer(tk.Tk):
         self.notebook.add(logs_tab, text='Logs')
 
         # IMDB Data Preparation
-        self.data_tab = IMDBDataTab(self.notebook, logger=self)
+        self.data_tab = IMDBDataTab(self.notebook, logger=self, connection_options=self.connection_options,
+                                    partition_query=self.partition_query)
         self.data_tab.create_widgets()
         self.notebook.add(self.data_tab, text='Data')
 
@@ -36,8 +36,6 @@ class IMDBCorrTab(ttk.Frame):
         self.selected_column = None
 
     def create_widgets(self):
-        self.corr_df = prep_corr_df(self.imdb_data.merged_movies, self.imdb_data.merged_actors, logger=self.logger)
-
         label_corr_heading = ttk.Label(self, text="IMDB Correlation Analysis")
         label_corr_heading.grid(row=0, column=0, columnspan=2, rowspan=1, sticky="nswe", padx=5, pady=5)
 
@@ -88,7 +86,7 @@ class IMDBCorrTab(ttk.Frame):
         new_window.title(f"Linear regression ({self.selected_column.get()}) vs Movie Rank")
         rank_type = CORR_COLUMNS_DICT[self.selected_column.get()]
 
-        figure = plot_linear_regression(self.corr_df, rank_type, self.selected_column.get(), return_figure=True)
+        figure = plot_linear_regression(self.corr_data(), rank_type, self.selected_column.get(), return_figure=True)
 
         canvas = FigureCanvasTkAgg(figure, master=new_window)
         canvas_widget = canvas.get_tk_widget()
@@ -100,7 +98,7 @@ class IMDBCorrTab(ttk.Frame):
         new_window.title(f"Correlation ({self.selected_column.get()}) vs Movie Rank")
         rank_type = CORR_COLUMNS_DICT[self.selected_column.get()]
 
-        figure = plot_correlation(self.corr_df, rank_type, self.selected_column.get(), return_figure=True)
+        figure = plot_correlation(self.corr_data(), rank_type, self.selected_column.get(), return_figure=True)
 
         canvas = FigureCanvasTkAgg(figure, master=new_window)
         canvas_widget = canvas.get_tk_widget()
@@ -110,7 +108,7 @@ class IMDBCorrTab(ttk.Frame):
         new_window = tk.Toplevel(self)
         new_window.title(f"Correlation Heatmap ({self.selected_column.get()})")
         rank_type = CORR_COLUMNS_DICT[self.selected_column.get()]
-        corr_matrix = self.corr_df.corr()
+        corr_matrix = self.corr_data().corr()
         rank_corr = round(corr_matrix[[rank_type]].sort_values(by=rank_type, ascending=False), 3)
 
         figure = plot_corr_heatmap(rank_corr, self.selected_column.get(), return_figure=True)
@@ -121,7 +119,7 @@ class IMDBCorrTab(ttk.Frame):
 
     def generate_filtered_corr_matrix(self):
         rank_type = CORR_COLUMNS_DICT[self.selected_column.get()]
-        corr_matrix = self.corr_df.corr()
+        corr_matrix = self.corr_data().corr()
         rank_corr = round(corr_matrix[[rank_type]].sort_values(by=rank_type, ascending=False), 3)
 
         log_buffer = io.StringIO()
@@ -136,7 +134,7 @@ class IMDBCorrTab(ttk.Frame):
         new_window = tk.Toplevel(self)
         new_window.title("Correlation Heatmap")
 
-        figure = plot_corr_heatmap(round(self.corr_df.corr(), 3), return_figure=True)
+        figure = plot_corr_heatmap(round(self.corr_data().corr(), 3), return_figure=True)
 
         canvas = FigureCanvasTkAgg(figure, master=new_window)
         canvas_widget = canvas.get_tk_widget()
@@ -145,16 +143,25 @@ class IMDBCorrTab(ttk.Frame):
     def generate_corr_matrix(self):
         log_buffer = io.StringIO()
 
-        show_corr_matrix(round(self.corr_df.corr(), 3), logger=log_buffer)
+        show_corr_matrix(round(self.corr_data().corr(), 3), logger=log_buffer)
 
         corr_matrix = log_buffer.getvalue()
         log_buffer.close()
         self.logger.write(corr_matrix)
         IMDBMsg.show_imdb_msg(self, "Correlation Matrix", corr_matrix)
 
+    def corr_data(self):
+        # Prepared on first use: it joins the wide frames, which star-schema datasets only build on demand
+        if self.corr_df is None:
+            version = self.imdb_data.version
+            self.corr_df = version.derived('corr_df', lambda: prep_corr_df(version.merged_movies,
+                                                                           version.merged_actors, self.logger))
+        return self.corr_df
+
     def generate_corr_df(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         log_buffer = io.StringIO()
         self.corr_df = prep_corr_df(movies_df, actors_df, logger=log_buffer)
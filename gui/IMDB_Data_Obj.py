@@ -1,7 +1,9 @@
+import os
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 
 from IMDB.data.IMDB_Database_Obj import IMDBConnection
+from IMDB.data.table_sources import source_from_uri
 
 # Constants
 IMDB_PARAMETERS = {
@@ -11,14 +13,20 @@ IMDB_PARAMETERS = {
     'port': 3306,
     'database': "imdb_ijs"
 }
+# How often a background refresh is checked for completion
+REFRESH_POLL_MS = 200
+# Optional data source URI (e.g. sqlite:///imdb_ijs.sqlite) used instead of the IMDB MySQL server
+IMDB_SOURCE = os.environ.get('IMDB_SOURCE')
 
 
 class IMDBDataTab(ttk.Frame):
-    def __init__(self, parent, logger):
+    def __init__(self, parent, logger, connection_options=None, partition_query=None):
         ttk.Frame.__init__(self, parent)
         self.title = "IMDB Data Preparation"
         self.logger = logger
-        self.imdb_db = IMDBConnection(IMDB_PARAMETERS.values(), client=self, logger=self.logger)
+        options = {'source': source_from_uri(IMDB_SOURCE) if IMDB_SOURCE else None, **(connection_options or {})}
+        self.imdb_db = IMDBConnection(IMDB_PARAMETERS.values(), client=self, logger=self.logger, **options)
+        self.partition_query = partition_query or {}
         self.ready = False
 
     def create_widgets(self):
@@ -32,9 +40,13 @@ class IMDBDataTab(ttk.Frame):
         load_data_button = tk.Button(self, text="Load Data", command=self.imdb_db.load_df)
         fetch_data_button = tk.Button(self, text="Fetch Data", command=self.imdb_db.fetch_df)
         clean_data_button = tk.Button(self, text="Clean Data", command=self.imdb_db.clean_df)
+        refresh_data_button = tk.Button(self, text="Refresh Data", command=self.refresh_data)
+        load_partitions_button = tk.Button(self, text="Load Partitions", command=self.load_partitions)
         load_data_button.grid(row=2, column=0, pady=5, padx=5, sticky="nswe")
         fetch_data_button.grid(row=3, column=0, pady=5, padx=5, sticky="nswe")
         clean_data_button.grid(row=4, column=0, pady=5, padx=5, sticky="nswe")
+        refresh_data_button.grid(row=5, column=0, pady=5, padx=5, sticky="nswe")
+        load_partitions_button.grid(row=6, column=0, pady=5, padx=5, sticky="nswe")
 
         # EDA
         label_eda = tk.Label(self, text="Exploratory Data Analysis:")
@@ -46,10 +58,12 @@ class IMDBDataTab(ttk.Frame):
         tables_eda_button.grid(row=2, column=1, pady=5, padx=5, sticky="nswe")
         movies_eda_button.grid(row=3, column=1, pady=5, padx=5, sticky="nswe")
         actors_eda_button.grid(row=4, column=1, pady=5, padx=5, sticky="nswe")
+        export_csv_button = tk.Button(self, text="Export CSV", command=self.export_csv)
+        export_csv_button.grid(row=6, column=1, pady=5, padx=5, sticky="nswe")
 
         # Spacer row
         spacer_label = tk.Label(self, text="")
-        spacer_label.grid(row=5, column=0, columnspan=2, pady=5, padx=5)
+        spacer_label.grid(row=7, column=0, columnspan=2, pady=5, padx=5)
 
         # Configure row and column weights
         self.columnconfigure(0, weight=1)
@@ -59,3 +73,39 @@ class IMDBDataTab(ttk.Frame):
         self.rowconfigure(2, weight=1)
         self.rowconfigure(3, weight=1)
         self.rowconfigure(4, weight=1)
+        self.rowconfigure(5, weight=1)
+        self.rowconfigure(6, weight=1)
+
+    def load_partitions(self):
+        # Only the year/genre partitions of the configured query are read
+        self.imdb_db.load_partitions(**self.partition_query)
+
+    def export_csv(self):
+        if not self.ready:
+            self.logger.write("[!] Export failed: data not ready, fetch or load it first")
+            return
+        directory = filedialog.askdirectory()
+        if directory:
+            self.imdb_db.export_csv(directory)
+
+    def refresh_data(self):
+        # The analysis tabs keep working on the current data until the refreshed version is published
+        try:
+            refresh = self.imdb_db.refresh_in_background()
+        except ValueError as error:
+            self.logger.write(f"[!] Refresh failed: {error}")
+            return
+        self.logger.write("Refreshing data in the background...")
+        self.after(REFRESH_POLL_MS, self.check_refresh, refresh)
+
+    def check_refresh(self, refresh):
+        if not refresh.done():
+            self.after(REFRESH_POLL_MS, self.check_refresh, refresh)
+            return
+        try:
+            messages = refresh.result()
+        except Exception as error:
+            self.logger.write(f"[!] Refresh failed: {error}")
+            return
+        for message in messages:
+            self.logger.write(message)
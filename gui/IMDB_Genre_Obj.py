@@ -19,14 +19,14 @@ class IMDBGenreTab(ttk.Frame):
         self.selected_genre = None
 
     def create_widgets(self):
-        movies_df = self.imdb_data.merged_movies
+        version = self.imdb_data.version
         label_genre_heading = ttk.Label(self, text="IMDB Genre Analysis")
         label_genre_heading.grid(row=0, column=0, columnspan=2, rowspan=1, sticky="nswe", padx=5, pady=5)
 
         # Genre Label & Combobox
         label_genre_name = ttk.Label(self, text="Select Genre:")
         self.selected_genre = tk.StringVar()
-        genre_names = movie_analysis.get_genres_list(movies_df)
+        genre_names = version.derived('genre_names', movie_analysis.get_genres_list, version.movie_genres())
         combo_genre = ttk.Combobox(self, textvariable=self.selected_genre, values=genre_names, state='readonly')
         combo_genre.set('drama')
         label_genre_name.grid(row=1, column=0, pady=5, padx=5, sticky="w")
@@ -67,8 +67,9 @@ class IMDBGenreTab(ttk.Frame):
         IMDBMsg.show_imdb_msg(self, "Genre Summary", genre_summary_info)
 
     def genre_summary(self):
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
         genre = self.selected_genre.get()
 
         log_buffer = io.StringIO()
@@ -32,14 +32,15 @@ class IMDBMovieTab(ttk.Frame):
         self.selected_bin = None
 
     def create_widgets(self):
-        movies_df = self.imdb_data.merged_movies
+        version = self.imdb_data.version
+        movies_df = version.unique_movies()
         label_movie_heading = ttk.Label(self, text="IMDB Movie Analysis")
         label_movie_heading.grid(row=0, column=0, columnspan=2, sticky="nswe", padx=5, pady=5)
 
         # Movie Selection Section
         label_movie_name = ttk.Label(self, text="Select Movie:")
         self.selected_movie = tk.StringVar()
-        movie_names = movie_analysis.get_movies(movies_df)
+        movie_names = version.derived('movie_names', movie_analysis.get_movies, movies_df)
         combo_movie = ttk.Combobox(self, textvariable=self.selected_movie, values=movie_names, state='readonly')
         combo_movie.set(MOVIE_PARAMETERS['name'])
         label_movie_name.grid(row=1, column=0, pady=5, padx=5, sticky="nswe")
@@ -47,7 +48,7 @@ class IMDBMovieTab(ttk.Frame):
 
         label_genre_name = ttk.Label(self, text="Select Genre:")
         self.selected_genre = tk.StringVar()
-        genre_names = movie_analysis.get_genres_list(movies_df)
+        genre_names = version.derived('genre_names', movie_analysis.get_genres_list, version.movie_genres())
         combo_genre = ttk.Combobox(self, textvariable=self.selected_genre, values=genre_names, state='readonly')
         combo_genre.set(MOVIE_PARAMETERS['genre'])
         label_genre_name.grid(row=2, column=0, pady=5, padx=5, sticky="nswe")
@@ -55,7 +56,7 @@ class IMDBMovieTab(ttk.Frame):
 
         label_year = ttk.Label(self, text="Select Year:")
         self.selected_year = tk.StringVar()
-        years = movie_analysis.get_movie_years(movies_df)
+        years = version.derived('movie_years', movie_analysis.get_movie_years, movies_df)
         combo_year = ttk.Combobox(self, textvariable=self.selected_year, values=years, state='readonly')
         combo_year.set(str(MOVIE_PARAMETERS['year']))
         label_year.grid(row=3, column=0, pady=5, padx=5, sticky="nswe")
@@ -95,14 +96,15 @@ class IMDBMovieTab(ttk.Frame):
             self.grid_rowconfigure(i, weight=1)
 
     def plot_movie_rank_overall(self):
-        movies_df = self.imdb_data.merged_movies
+        version = self.imdb_data.version
+        movies_df = version.merged_movies
         movie = movie_analysis.get_movie_by_name(movies_df, self.selected_movie.get())
 
         new_window = tk.Toplevel(self)
         new_window.title("Movie Rank vs Overall")
 
         figure = plot_movie_rank_binning(
-            movies_df, self.get_selected_bin(),
+            version.unique_movies(), self.get_selected_bin(),
             f"{self.selected_movie.get()} vs Overall Avg ({self.selected_bin.get()})",
             movie['rank'], return_figure=True
         )
@@ -112,10 +114,12 @@ class IMDBMovieTab(ttk.Frame):
         canvas_widget.pack()
 
     def plot_movie_rank_year(self):
+        version = self.imdb_data.version
         year = int(self.selected_year.get())
-        movies_df = self.imdb_data.merged_movies
+        movies_df = version.merged_movies
         movie = movie_analysis.get_movie_by_name(movies_df, self.selected_movie.get())
 
+        movies_df = version.unique_movies()
         movies_df = movies_df[movies_df['movie_year'] == year]
         new_window = tk.Toplevel(self)
         new_window.title("Movie Rank vs Year")
@@ -183,9 +187,10 @@ class IMDBMovieTab(ttk.Frame):
 
 
     def show_actors(self):
+        version = self.imdb_data.version
         movie_name = self.selected_movie.get()
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         log_buffer = io.StringIO()
 
@@ -21,13 +21,14 @@ class IMDBSummaryTab(ttk.Frame):
 
 
     def create_widgets(self):
+        version = self.imdb_data.version
         # Heading
         label_summary_heading = ttk.Label(self, text="IMDB Summary")
         label_summary_heading.grid(row=0, column=0, columnspan=2, rowspan=1, sticky="nswe", padx=5, pady=5)
 
         # Select Year Label and Combobox
         label_year = ttk.Label(self, text="Select Year:")
-        years = ['All'] + movie_analysis.get_movie_years(self.imdb_data.merged_movies)
+        years = ['All'] + version.derived('movie_years', movie_analysis.get_movie_years, version.unique_movies())
         self.selected_year = tk.StringVar()
         combo_year = ttk.Combobox(self, textvariable=self.selected_year, values=years, state='readonly')
         combo_year.set('All')
@@ -63,14 +64,15 @@ class IMDBSummaryTab(ttk.Frame):
 
 
     def generate_summary(self):
+        version = self.imdb_data.version
         year = self.selected_year.get()
         log_buffer = io.StringIO()
 
         if year == 'All':
-            summary_statistics(self.imdb_data.merged_movies, self.imdb_data.merged_actors, logger=log_buffer)
+            summary_statistics(version.merged_movies, version.merged_actors, logger=log_buffer)
         else:
             int_year = int(year)
-            summary_statistics(self.imdb_data.merged_movies, self.imdb_data.merged_actors,
+            summary_statistics(version.merged_movies, version.merged_actors,
                                year=int_year, logger=log_buffer)
 
         summary_info = log_buffer.getvalue()
@@ -81,7 +83,7 @@ class IMDBSummaryTab(ttk.Frame):
 
     def plot_movie_count_vs_year(self):
         year = self.selected_year.get()
-        movies_df = self.imdb_data.merged_movies
+        movies_df = self.imdb_data.unique_movies()
 
         if year != 'All':
             int_year = int(year)
@@ -102,7 +104,7 @@ class IMDBSummaryTab(ttk.Frame):
 
     def plot_movie_rank(self, fine=False):
         year = self.selected_year.get()
-        movies_df = self.imdb_data.merged_movies
+        movies_df = self.imdb_data.unique_movies()
         new_window = tk.Toplevel(self)
 
         if year != 'All':
@@ -140,9 +142,10 @@ class IMDBSummaryTab(ttk.Frame):
         canvas_widget.pack()
 
     def plot_gender_distribution(self):
+        version = self.imdb_data.version
         year = self.selected_year.get()
-        movies_df = self.imdb_data.merged_movies
-        actors_df = self.imdb_data.merged_actors
+        movies_df = version.merged_movies
+        actors_df = version.merged_actors
 
         new_window = tk.Toplevel(self)
 
@@ -1,8 +1,43 @@
+import argparse
+
+from IMDB.data.cache_formats import CACHE_FORMATS
+from IMDB.data.table_sources import source_from_uri
 from IMDB.gui.IMDB_App_Obj import IMDBAnalyzer
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="IMDB data analysis app.")
+    parser.add_argument('--source', help="data source URI used instead of the IMDB MySQL server, "
+                                         "e.g. sqlite:///imdb_ijs.sqlite (default: IMDB_SOURCE)")
+    parser.add_argument('--cache-dir', help="stage cache folder (default: IMDB_CACHE_DIR, else the package folder)")
+    parser.add_argument('--cache-format', choices=list(CACHE_FORMATS), help="format of the stage caches")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="fetch tables and build the pipeline stages in parallel (default: 1)")
+    parser.add_argument('--stream', action='store_true', help="fetch tables in chunks")
+    parser.add_argument('--pushdown', action='store_true', help="merge the tables with SQL joins in the database")
+    parser.add_argument('--star-schema', action='store_true', help="keep the cleaned data as a star schema")
+    parser.add_argument('--shared-memory', action='store_true', help="publish the cleaned data to shared memory")
+    parser.add_argument('--eda', choices=['exact', 'sketch'], default='exact', help="table profiling (default: exact)")
+    parser.add_argument('--merge-memory-mb', type=float, help="memory budget of the actors merge (default: unlimited)")
+    parser.add_argument('--partition-years', type=int, nargs=2, metavar=('FIRST', 'LAST'),
+                        help="years loaded by Load Partitions (default: all)")
+    parser.add_argument('--partition-genres', nargs='+', metavar='GENRE',
+                        help="lowercase genres loaded by Load Partitions (default: all)")
+    return parser.parse_args()
+
+
 def main():
-    app = IMDBAnalyzer()
+    args = parse_args()
+    connection_options = {'cache_dir': args.cache_dir, 'cache_format': args.cache_format, 'workers': args.workers,
+                          'stream': args.stream, 'pushdown': args.pushdown, 'star_schema': args.star_schema,
+                          'shared_memory': args.shared_memory, 'eda': args.eda,
+                          'merge_memory_mb': args.merge_memory_mb}
+    if args.source:
+        connection_options['source'] = source_from_uri(args.source)
+    partition_query = {'year_range': args.partition_years, 'genres': args.partition_genres}
+
+    # The data connection enables copy-on-write, the tabs share its data frames without defensive copies
+    app = IMDBAnalyzer(connection_options, partition_query)
     app.mainloop()
 
 
@@ -0,0 +1,76 @@
+"""
+Shared fixtures. Run from the folder that contains the IMDB package: python -m pytest IMDB/tests
+"""
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from IMDB.data.IMDB_Database_Obj import IMDBConnection
+from IMDB.data.build_sqlite_replica import create_schema, synthetic_tables, write_tables
+from IMDB.data.compact_schema import ACTOR_SCHEMA, MOVIE_SCHEMA, compact_df, share_name_dictionary
+from IMDB.data.table_sources import SQLiteSource
+
+# Movies of the synthetic replica, about 8 roles and 2 genres each
+REPLICA_MOVIES = 200
+
+
+@pytest.fixture(scope='session')
+def replica_tables():
+    """{table name: data frame} of the synthetic tables in the replica."""
+    return synthetic_tables(REPLICA_MOVIES)
+
+
+@pytest.fixture(scope='session')
+def replica_path(tmp_path_factory, replica_tables):
+    """SQLite replica of the imdb_ijs schema filled with synthetic tables."""
+    db_path = str(tmp_path_factory.mktemp('replica') / 'imdb_ijs.sqlite')
+    create_schema(db_path)
+    write_tables(db_path, replica_tables.items())
+    return db_path
+
+
+@pytest.fixture
+def make_connection(replica_path, tmp_path):
+    """Creates IMDBConnections on the replica, each with its own cache folder."""
+    def make(name, **settings):
+        return IMDBConnection(client=types.SimpleNamespace(ready=False), source=SQLiteSource(replica_path),
+                              cache_dir=str(tmp_path / name), **settings)
+
+    return make
+
+
+@pytest.fixture(scope='session')
+def cleaned_frames():
+    """
+    Small (movies_df, actors_df) shaped like the cleaned data frames, with compact dtypes: movies in one to
+    three genres, directors and actors of several movies, rank ties, and roles of movies that were dropped.
+    """
+    rng = np.random.default_rng(0)
+    num_movies, num_actors, num_directors = 60, 90, 12
+
+    genres_per_movie = rng.integers(1, 4, num_movies)
+    movie_ids = np.repeat(np.arange(num_movies), genres_per_movie)
+    ranks = np.round(rng.uniform(1.0, 10.0, num_movies) * 2) / 2
+    years = rng.integers(1990, 2000, num_movies)
+    directors = rng.integers(0, num_directors, num_movies)
+    movies_df = pd.DataFrame({'movie_id': movie_ids, 'movie_rank': ranks[movie_ids],
+                              'movie_name': [f"movie {movie_id}" for movie_id in movie_ids],
+                              'movie_year': years[movie_ids],
+                              'movie_genre': rng.choice(['drama', 'comedy', 'horror', 'documentary'], len(movie_ids)),
+                              'director_id': directors[movie_ids],
+                              'full_name(dir)': [f"director {director}" for director in directors[movie_ids]]})
+    movies_df = movies_df.drop_duplicates(subset=['movie_id', 'movie_genre'], ignore_index=True)
+
+    # Some roles are of movies past num_movies, which are not in movies_df
+    cast_sizes = rng.integers(1, 6, num_movies + 5)
+    role_movies = np.repeat(np.arange(num_movies + 5), cast_sizes)
+    role_actors = rng.integers(0, num_actors, len(role_movies))
+    actors_df = pd.DataFrame({'actor_id': role_actors, 'full_name(act)': [f"actor {actor}" for actor in role_actors],
+                              'gender(act)': np.where(role_actors % 2 == 0, 'm', 'f'),
+                              'role(act)': [f"role {role % 7}" for role in range(len(role_movies))],
+                              'movie_id': role_movies})
+    actors_df = actors_df.drop_duplicates(subset=['actor_id', 'movie_id'], ignore_index=True)
+
+    return share_name_dictionary(compact_df(movies_df, MOVIE_SCHEMA), compact_df(actors_df, ACTOR_SCHEMA))
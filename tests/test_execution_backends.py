@@ -0,0 +1,88 @@
+import io
+
+import pandas as pd
+import pytest
+
+from IMDB.analysis import execution_backends
+from IMDB.analysis.backend_parity import _assert_same, check_parity
+from IMDB.analysis.execution_backends import SCHEDULER_ENV, PartitionedBackend
+from IMDB.analysis.summary_analsis import actors_general, genre_specific, prep_corr_df, summary_statistics
+
+
+def _years_and_genres(movies_df):
+    # Every year and genre of the data, plus a year without movies and a genre no movie has
+    years = sorted(movies_df['movie_year'].unique().tolist())
+    genres = sorted(movies_df['movie_genre'].astype(str).unique().tolist())
+    return years + [years[-1] + 50], genres + ['no such genre']
+
+
+def _analysis_results(movies_df, actors_df, backend):
+    """Text each summary analysis logs with backend, and the correlation frame it prepares."""
+    years, genres = _years_and_genres(movies_df)
+    analyses = {'summary_statistics': lambda logger: summary_statistics(movies_df, actors_df, None, logger, backend),
+                'actors_general': lambda logger: actors_general(movies_df, actors_df, logger, backend)}
+    for year in years:
+        analyses[f"summary_statistics(year={year})"] = \
+            lambda logger, year=year: summary_statistics(movies_df, actors_df, year, logger, backend)
+    for genre in genres:
+        analyses[f"genre_specific(genre={genre})"] = \
+            lambda logger, genre=genre: genre_specific(movies_df, actors_df, genre, logger, backend)
+
+    logs = {}
+    for name, analysis in analyses.items():
+        logger = io.StringIO()
+        analysis(logger)
+        logs[name] = logger.getvalue()
+    return logs, prep_corr_df(movies_df, actors_df, io.StringIO(), backend)
+
+
+def test_polars_backend_matches_pandas(cleaned_frames):
+    pytest.importorskip('polars')
+    movies_df, actors_df = cleaned_frames
+
+    assert check_parity(movies_df, actors_df, 'polars', *_years_and_genres(movies_df)) == []
+
+
+def test_polars_analyses_match_pandas(cleaned_frames):
+    pytest.importorskip('polars')
+    movies_df, actors_df = cleaned_frames
+    expected_logs, expected_corr_df = _analysis_results(movies_df, actors_df, 'pandas')
+    actual_logs, actual_corr_df = _analysis_results(movies_df, actors_df, 'polars')
+
+    assert actual_logs == expected_logs
+    pd.testing.assert_frame_equal(actual_corr_df.reset_index(drop=True), expected_corr_df.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_polars_backend_matches_pandas_without_movies(cleaned_frames):
+    pytest.importorskip('polars')
+    movies_df, actors_df = cleaned_frames
+    years, genres = _years_and_genres(movies_df)
+
+    assert check_parity(movies_df.iloc[:0], actors_df, 'polars', years[:1], genres[:1]) == []
+
+
+@pytest.mark.parametrize('workers', [2, 7])
+def test_partitioned_backend_matches_pandas(cleaned_frames, monkeypatch, workers):
+    # On the local process pool, also with more partitions than some years or genres have movies
+    monkeypatch.delenv(SCHEDULER_ENV, raising=False)
+    monkeypatch.setitem(execution_backends.BACKENDS, 'partitioned', PartitionedBackend(workers=workers))
+    movies_df, actors_df = cleaned_frames
+
+    assert check_parity(movies_df, actors_df, 'partitioned', *_years_and_genres(movies_df)) == []
+
+
+def test_partitioned_backend_matches_pandas_without_movies(cleaned_frames, monkeypatch):
+    monkeypatch.delenv(SCHEDULER_ENV, raising=False)
+    monkeypatch.setitem(execution_backends.BACKENDS, 'partitioned', PartitionedBackend(workers=2))
+    movies_df, actors_df = cleaned_frames
+    years, genres = _years_and_genres(movies_df)
+
+    assert check_parity(movies_df.iloc[:0], actors_df, 'partitioned', years[:1], genres[:1]) == []
+
+
+def test_parity_tells_missing_values_apart():
+    # The analyses log a missing year as None or nan, so the two are different results
+    _assert_same({'min_year': float('nan')}, {'min_year': float('nan')})
+    with pytest.raises(AssertionError):
+        _assert_same({'min_year': float('nan')}, {'min_year': None})
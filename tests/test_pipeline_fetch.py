@@ -0,0 +1,32 @@
+import re
+
+import pandas as pd
+
+from IMDB.data.pipeline_scheduler import StageLog
+
+
+def _sorted_rows(df):
+    # Tables fetched by key range come in key order, not in the database's row order
+    df = df.astype({column: object for column in df.select_dtypes('category').columns})
+    return df.sort_values(list(df.columns), na_position='first').reset_index(drop=True)
+
+
+def _assert_same_rows(actual, expected):
+    pd.testing.assert_frame_equal(_sorted_rows(actual), _sorted_rows(expected), check_dtype=False)
+
+def test_fetch_df_with_workers_fetches_tables_in_parallel(make_connection):
+    logger = StageLog()
+    # About 1600 roles, so the larger tables are fetched in several key ranges
+    pipelined = make_connection('pipelined', logger=logger, workers=2, partition_size=200)
+    pipelined.fetch_df()
+
+    partitions = [int(match.group(1)) for message in logger.messages
+                  for match in [re.search(r"fetched in (\d+) partition\(s\)", message)] if match]
+    assert any("Critical path" in message for message in logger.messages)
+    assert partitions and max(partitions) > 1
+    assert any("table EDA skipped" in message for message in logger.messages)
+
+    sequential = make_connection('sequential')
+    sequential.fetch_df()
+    _assert_same_rows(pipelined.merged_movies, sequential.merged_movies)
+    _assert_same_rows(pipelined.merged_actors, sequential.merged_actors)
@@ -0,0 +1,32 @@
+import os.path
+
+import pytest
+
+from IMDB.data import IMDB_Database_Obj
+from IMDB.data.shared_dataset import SHARED_MEMORY_DIR, _file_path
+
+pytest.importorskip('pyarrow')
+pytestmark = pytest.mark.skipif(not os.path.isdir(SHARED_MEMORY_DIR), reason="no shared-memory file system")
+
+
+def test_second_session_attaches_without_reading_the_caches(make_connection, monkeypatch):
+    first = make_connection('shared', shared_memory=True)
+    first.load_df()
+    dataset = first.shared_dataset
+    assert dataset is not None
+    try:
+        def fail(*args, **kwargs):
+            raise AssertionError("the stage caches were read")
+
+        second = make_connection('shared', shared_memory=True)
+        monkeypatch.setattr(second.cache_format, 'read', fail)
+        monkeypatch.setattr(IMDB_Database_Obj, 'read_snapshot', fail)
+        second.load_df()
+
+        assert second.shared_dataset == dataset
+        assert second.merged_movies.equals(first.merged_movies)
+        assert second.merged_actors.equals(first.merged_actors)
+    finally:
+        for name in IMDB_Database_Obj.IMDBConnection.SHARED_FRAMES:
+            if os.path.isfile(_file_path(dataset, name)):
+                os.remove(_file_path(dataset, name))
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from IMDB.data.pipeline_scheduler import StageLog
+
+
+def _sorted_rows(df):
+    # The spilled merge writes its rows partition by partition, so only the set of rows is compared
+    df = df.astype({column: object for column in df.select_dtypes('category').columns})
+    return df.sort_values(list(df.columns), na_position='first').reset_index(drop=True)
+
+
+def _assert_same_frame(actual, expected):
+    pd.testing.assert_frame_equal(_sorted_rows(actual), _sorted_rows(expected), check_dtype=False)
+
+
+def test_fetch_df_spills_the_actors_merge_over_budget(make_connection):
+    in_memory = make_connection('in_memory')
+    in_memory.fetch_df()
+
+    logger = StageLog()
+    spilled = make_connection('spilled', logger=logger, merge_memory_mb=0.01)
+    spilled.fetch_df()
+
+    assert any("out of core" in message for message in logger.messages)
+    _assert_same_frame(spilled.cache_format.read(spilled.file_path_actors),
+                       in_memory.cache_format.read(in_memory.file_path_actors))
+    _assert_same_frame(spilled.merged_actors, in_memory.merged_actors)
+
+
+def test_load_df_spills_after_the_movie_tables_are_loaded(make_connection):
+    in_memory = make_connection('in_memory')
+    in_memory.load_df()
+
+    logger = StageLog()
+    spilled = make_connection('spilled', logger=logger, merge_memory_mb=0.01)
+    spilled.load_df()
+
+    assert any("out of core" in message for message in logger.messages)
+    _assert_same_frame(spilled.merged_actors, in_memory.merged_actors)
+
+
+def test_merge_within_budget_stays_in_memory(make_connection):
+    logger = StageLog()
+    make_connection('in_memory', logger=logger, merge_memory_mb=1024).fetch_df()
+
+    assert not any("out of core" in message for message in logger.messages)
@@ -0,0 +1,50 @@
+from IMDB.data import compact_schema
+from IMDB.data.stage_manifest import code_version
+
+HELPERS = """
+SCHEMA = {'movie_id': 'integer'}
+
+def fill(df):
+    return df.ffill()
+
+def compact(df):
+    return df.astype(SCHEMA)
+"""
+
+
+def _stage_function(helpers, **replacements):
+    # Builds the stage and its helpers in a module of the package, as the real stages are
+    for old, new in replacements.items():
+        helpers = helpers.replace(old, new)
+    namespace = {'__name__': 'IMDB.data.versioned_stage'}
+    exec(helpers + "\ndef build(df):\n    return compact(fill(df))\n", namespace)
+    return namespace['build']
+
+
+def test_code_version_is_stable():
+    assert code_version(_stage_function(HELPERS)) == code_version(_stage_function(HELPERS))
+
+
+def test_method_rename_in_helper_changes_version():
+    assert code_version(_stage_function(HELPERS)) != code_version(_stage_function(HELPERS, ffill='bfill'))
+
+
+def test_constant_change_changes_version():
+    assert code_version(_stage_function(HELPERS)) != \
+        code_version(_stage_function(HELPERS, **{"'integer'": "'float'"}))
+
+
+def test_version_parts_by_value():
+    assert code_version(_stage_function(HELPERS), ['movie_id']) != \
+        code_version(_stage_function(HELPERS), ['movie_id', 'movie_rank'])
+
+
+def test_rename_in_stage_helper_changes_stage_version(make_connection, monkeypatch):
+    version = make_connection('cache').stages['cleaned_movies'][2]
+
+    # compact_df's column helper, with the method it calls on float columns renamed (astype -> astype_renamed)
+    code = compact_schema._compact_column.__code__
+    renamed = tuple(f"{name}_renamed" if name == 'astype' else name for name in code.co_names)
+    monkeypatch.setattr(compact_schema._compact_column, '__code__', code.replace(co_names=renamed))
+
+    assert make_connection('cache').stages['cleaned_movies'][2] != version
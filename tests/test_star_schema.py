@@ -0,0 +1,25 @@
+import pandas as pd
+
+from IMDB.data.dataset_version import DatasetVersion
+from IMDB.data.star_schema import StarSchema
+
+
+def _sorted_rows(df):
+    df = df.astype({column: object for column in df.select_dtypes('category').columns})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_wide_frames_are_rebuilt_from_the_star_schema(cleaned_frames):
+    movies_df, actors_df = cleaned_frames
+    dataset = StarSchema.from_wide(movies_df, actors_df)
+
+    pd.testing.assert_frame_equal(_sorted_rows(dataset.wide_movies()), _sorted_rows(movies_df), check_dtype=False)
+    pd.testing.assert_frame_equal(_sorted_rows(dataset.wide_actors()), _sorted_rows(actors_df), check_dtype=False)
+
+
+def test_version_does_not_keep_the_wide_frames(cleaned_frames):
+    version = DatasetVersion(None, None, StarSchema.from_wide(*cleaned_frames))
+    # Every access builds a new frame, none is held by the version
+
+    assert version.merged_movies is not version.merged_movies
+    assert version.merged_actors is not version.merged_actors
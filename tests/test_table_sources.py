@@ -0,0 +1,135 @@
+import os.path
+
+import pandas as pd
+import pytest
+
+from IMDB.data.build_sqlite_replica import TABLE_NAMES
+from IMDB.data.table_sources import CSVDirectorySource, SQLiteSource
+
+# (table, key) pairs read by key: a primary key and a foreign key with repeated values
+KEYED_TABLES = [('movies', 'id'), ('actors', 'id'), ('roles', 'movie_id'), ('movies_genres', 'movie_id')]
+CHUNK_SIZE = 97
+
+
+@pytest.fixture(scope='session')
+def csv_directory(tmp_path_factory, replica_tables):
+    directory = tmp_path_factory.mktemp('csv_source')
+    for table_name, df in replica_tables.items():
+        df.to_csv(os.path.join(directory, f"{table_name}.csv"), index=False)
+    return str(directory)
+
+
+@pytest.fixture(params=['sqlite', 'csv'])
+def source(request, replica_path, csv_directory):
+    source = SQLiteSource(replica_path) if request.param == 'sqlite' else CSVDirectorySource(csv_directory)
+    yield source
+    source.close()
+
+
+def _sorted_rows(df):
+    # Sources return the rows in no guaranteed order
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _assert_same_rows(actual, expected):
+    pd.testing.assert_frame_equal(_sorted_rows(actual[list(expected.columns)]), _sorted_rows(expected),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize('table_name', TABLE_NAMES)
+def test_read_table(source, replica_tables, table_name):
+    _assert_same_rows(source.read_table(table_name), replica_tables[table_name])
+
+
+def test_read_table_columns(source, replica_tables):
+    df = source.read_table('movies', columns=['id', 'year'])
+
+    assert sorted(df.columns) == ['id', 'year']
+    _assert_same_rows(df, replica_tables['movies'][['id', 'year']])
+
+
+@pytest.mark.parametrize('table_name, key', KEYED_TABLES)
+def test_read_table_chunks(source, replica_tables, table_name, key):
+    chunks = list(source.read_table_chunks(table_name, CHUNK_SIZE))
+    expected = replica_tables[table_name]
+
+    assert all(len(chunk) <= CHUNK_SIZE for chunk in chunks)
+    assert len(chunks) == -(-len(expected) // CHUNK_SIZE)
+    _assert_same_rows(pd.concat(chunks, ignore_index=True), expected)
+
+
+@pytest.mark.parametrize('table_name, key', KEYED_TABLES)
+@pytest.mark.parametrize('low, high', [(10, 40), (None, 25), (150, None), (None, None), (10_000, None)])
+def test_read_key_range(source, replica_tables, table_name, key, low, high):
+    expected = replica_tables[table_name]
+    if low is not None:
+        expected = expected[expected[key] >= low]
+    if high is not None:
+        expected = expected[expected[key] <= high]
+
+    _assert_same_rows(source.read_key_range(table_name, key, low, high), expected)
+
+
+@pytest.mark.parametrize('table_name, key', KEYED_TABLES)
+def test_key_stats(source, replica_tables, table_name, key):
+    keys = replica_tables[table_name][key]
+
+    assert tuple(source.key_stats(table_name, key)) == (keys.min(), keys.max(), len(keys))
+
+
+def test_sql_query_chunks_are_read_as_fetched(replica_path, replica_tables):
+    from sqlalchemy import event
+
+    source = SQLiteSource(replica_path)
+    rows_read = []
+
+    @event.listens_for(source.engine, 'connect')
+    def count_rows(dbapi_connection, _):
+        # Called by SQLite for every row it produces
+        dbapi_connection.create_function('count_row', 1, lambda value: rows_read.append(value) or value)
+
+    chunks = source.read_query_chunks("SELECT count_row(movie_id) AS movie_id FROM roles", CHUNK_SIZE)
+    first_chunk = next(chunks)
+
+    assert len(first_chunk) == CHUNK_SIZE
+    assert len(rows_read) < len(replica_tables['roles'])
+    assert sum(len(chunk) for chunk in chunks) + CHUNK_SIZE == len(replica_tables['roles'])
+    source.close()
+
+
+def test_mysql_connector_cursors_are_unbuffered():
+    pytest.importorskip('mysql.connector')
+    from IMDB.data.table_sources import MySQLSource
+
+    source = MySQLSource('localhost', 'guest', 'relational', 3306, 'imdb_ijs')
+
+    assert source.engine_options['connect_args']['buffered'] is False
+
+
+def test_file_source_tables_are_fetched_in_one_read(csv_directory, replica_tables, tmp_path, monkeypatch):
+    import types
+
+    from IMDB.data.IMDB_Database_Obj import IMDBConnection
+
+    source = CSVDirectorySource(csv_directory)
+    reads = []
+    read_table = source.read_table
+
+    def counted_read_table(table_name, columns=None):
+        reads.append(table_name)
+        return read_table(table_name, columns)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("a key range was read from a file")
+
+    monkeypatch.setattr(source, 'read_table', counted_read_table)
+    monkeypatch.setattr(source, 'read_key_range', fail)
+    monkeypatch.setattr(source, 'key_stats', fail)
+    # About 1600 roles, fetched in several key ranges from a SQL source
+    imdb_data = IMDBConnection(client=types.SimpleNamespace(ready=False), source=source, cache_dir=str(tmp_path),
+                               workers=2, partition_size=200)
+    imdb_data.load_tables()
+
+    assert sorted(reads) == sorted(TABLE_NAMES)
+    for table_name in TABLE_NAMES:
+        _assert_same_rows(imdb_data.dataframes[table_name], replica_tables[table_name])
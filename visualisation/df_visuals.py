@@ -1,17 +1,22 @@
 import pandas as pd
 from tabulate import tabulate
 
+from IMDB.visualisation.log_levels import INFO, log, log_enabled
 
-def printDF(df, showIndex=False, headers='keys', logger=None):
-    logger.write(tabulate(df, headers=headers, tablefmt='pretty', showindex=showIndex))
 
+def printDF(df, showIndex=False, headers='keys', logger=None, level=INFO):
+    log(logger, lambda: tabulate(df, headers=headers, tablefmt='pretty', showindex=showIndex), level)
 
-def printTitle(title, logger=None):
-    logger.write(f"\n\n***** {title} *****\n")
 
+def printTitle(title, logger=None, level=INFO):
+    log(logger, f"\n\n***** {title} *****\n", level)
 
-def dataframe_EDA(table_name, dataframe, logger=None):
-    printTitle(table_name, logger=logger)
+
+def dataframe_EDA(table_name, dataframe, logger=None, level=INFO):
+    # The summaries below scan the whole frame, skip them all if they would not be shown
+    if not log_enabled(logger, level):
+        return
+    printTitle(table_name, logger=logger, level=level)
     logger.write(dataframe.info)
 
     logger.write(f"\n\nNumber of Unique Items in {table_name}:")
@@ -21,5 +26,13 @@ def dataframe_EDA(table_name, dataframe, logger=None):
     logger.write(dataframe.apply(pd.unique))
 
     logger.write(f"\n\nTable: {table_name}")
-    printDF(dataframe.head(), logger=logger)
-    printDF(dataframe.tail(), logger=logger)
+    printDF(dataframe.head(), logger=logger, level=level)
+    printDF(dataframe.tail(), logger=logger, level=level)
+
+
+def sketch_EDA(table_name, profile, logger=None, level=INFO):
+    if not log_enabled(logger, level):
+        return
+    printTitle(table_name, logger=logger, level=level)
+    logger.write(f"Rows: {profile.rows} (~: approximate, from streaming sketches)")
+    printDF(profile.summary(), showIndex=True, logger=logger, level=level)
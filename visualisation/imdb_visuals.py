@@ -5,6 +5,8 @@ import seaborn as sns
 from matplotlib import pyplot as plt, ticker
 from matplotlib.lines import Line2D
 
+from IMDB.data.segment_kernels import SortedGroups
+
 
 """
     General
@@ -17,7 +19,7 @@ def plot_movie_count_vs_year(df, return_figure=False):
     plt.figure(figsize=(10, 6))
     ax = plt.subplot(111)
 
-    df.drop_duplicates(subset=['movie_id'], inplace=True)
+    df = df.drop_duplicates(subset=['movie_id'])
     movie_count_by_year = df.groupby('movie_year').agg({'movie_id': 'count'}).reset_index()
     movie_count_by_year.sort_values('movie_year', ascending=True, inplace=True)
     movie_count_by_year.rename(columns={'movie_id': 'movie_count'}, inplace=True)
@@ -43,7 +45,7 @@ def plot_genre_distribution(df, return_figure=False):
     plt.figure(figsize=(12, 6))
     ax = plt.subplot(111)
 
-    genre_counts = df.groupby('movie_genre').agg({'movie_id': 'count'}).reset_index()
+    genre_counts = df.groupby('movie_genre', observed=True).agg({'movie_id': 'count'}).reset_index()
     genre_counts.rename(columns={'movie_id': 'movie_count'}, inplace=True)
     genre_counts.sort_values(by='movie_count', inplace=True)
 
@@ -68,6 +70,7 @@ def plot_gender_distribution(df, return_figure=False):
 
     # Assuming 'gender' is the column containing gender information
     gender_count = df['gender(act)'].value_counts()
+    gender_count = gender_count[gender_count > 0]
 
     if len(gender_count) > 0:
         labels = gender_count.index.tolist()
@@ -91,7 +94,7 @@ def plot_gender_distribution(df, return_figure=False):
 def plot_movie_rank_binning(movies_df, bin_size, title, movie_rank=None, return_figure=False):
     """Plot a histogram of average movie ratings with specified bin size."""
 
-    movies_df = movies_df.drop_duplicates(subset=['movie_id']).copy()
+    movies_df = movies_df.drop_duplicates(subset=['movie_id'])
     plt.figure(figsize=(10, 6))
     ax = plt.subplot(111)
 
@@ -214,7 +217,7 @@ def plot_actor_occurrences(actor_occurrences, return_figure=False):
 
 def plot_actor_by_genre(merged_df, return_figure=False):
     # Actor count vs Genre
-    actors_by_genre = merged_df.groupby(['movie_genre']).agg({'actor_id': 'count'}).reset_index()
+    actors_by_genre = merged_df.groupby(['movie_genre'], observed=True).agg({'actor_id': 'count'}).reset_index()
     actors_by_genre.rename(columns={'actor_id': 'actor_count'}, inplace=True)
     actors_by_genre.sort_values(by='actor_count', ascending=True, inplace=True)
 
@@ -295,22 +298,10 @@ def plot_actor_genre_distribution(role_genres, return_figure=False):
 
 
 def plot_actor_performance(roles_list, return_figure=False):
-    # Calculate average movie rank for each year
-    years = [role[0] for role in roles_list]
-    ranks = [role[4] for role in roles_list]
-
-    year_stats = {}
-    for year, rank in zip(years, ranks):
-        if year not in year_stats:
-            year_stats[year] = {'sum': 0, 'count': 0}
-        year_stats[year]['sum'] += rank
-        year_stats[year]['count'] += 1
-
-    # Calculate average ranks for each year
-    avg_ranks = {year: stats['sum'] / stats['count'] for year, stats in year_stats.items()}
-
-    # Sort years
-    sorted_years, avg_counts = zip(*sorted(avg_ranks.items()))
+    # Calculate average movie rank for each year, in year order
+    year_groups = SortedGroups([role[0] for role in roles_list])
+    sorted_years = year_groups.keys
+    avg_counts = year_groups.reduce([role[4] for role in roles_list], 'mean')
 
     # Plotting
     plt.figure(figsize=(12, 6))
@@ -335,7 +326,7 @@ def plot_actor_performance(roles_list, return_figure=False):
 
 
 def plot_genre_count_vs_year(movies_df, genre, return_figure=False):
-    genre_years = (movies_df.groupby(['movie_year', 'movie_genre'])
+    genre_years = (movies_df.groupby(['movie_year', 'movie_genre'], observed=True)
                    .agg({'movie_id': 'count', 'movie_rank': 'mean'})
                    .reset_index())
     genre_years.rename(columns={'movie_id': 'movie_count', 'movie_rank': 'avg_movie_rank'}, inplace=True)
@@ -361,7 +352,7 @@ def plot_genre_count_vs_year(movies_df, genre, return_figure=False):
 
 
 def plot_genre_avg_vs_year(movies_df, genre, return_figure=False):
-    genre_years = (movies_df.groupby(['movie_year', 'movie_genre'])
+    genre_years = (movies_df.groupby(['movie_year', 'movie_genre'], observed=True)
                    .agg({'movie_id': 'count', 'movie_rank': 'mean'})
                    .reset_index())
     genre_years.rename(columns={'movie_id': 'movie_count', 'movie_rank': 'avg_movie_rank'}, inplace=True)
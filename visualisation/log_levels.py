@@ -0,0 +1,29 @@
+"""
+Level-gated logging on top of the loggers used across the package (any object with a write(text) method,
+e.g. the app window, an io.StringIO buffer or a StageLog). A logger shows the messages at or above its
+log_level attribute (INFO if it has none). Payloads can be deferred as callables, so table renders and
+summaries are only computed when a logger will show them.
+"""
+DEBUG = 10
+INFO = 20
+WARNING = 30
+# Level of a logger that shows nothing
+SILENT = 100
+
+
+class NullLogger:
+    """Logger of batch and headless runs: shows nothing, so no deferred payload is ever computed."""
+    log_level = SILENT
+
+    def write(self, text):
+        pass
+
+
+def log_enabled(logger, level=INFO):
+    return logger is not None and level >= getattr(logger, 'log_level', INFO)
+
+
+def log(logger, message, level=INFO):
+    """Writes message to logger if it shows level. A callable message is only called in that case."""
+    if log_enabled(logger, level):
+        logger.write(message() if callable(message) else message)